@@ -0,0 +1 @@
+''' benchmarks for the game engine; run each module from the repository root, e.g. python3 -m benchmarks.unit_memory '''
@@ -0,0 +1,93 @@
+'''
+Measures combat resolution throughput in dense melee clusters
+
+Each cluster is a square block of units in a checkerboard of the two teams, so every unit stands next to enemies.
+Every blue unit then attacks an adjacent red unit; the damage range of all units can be raised to make every
+attack an area attack that hits many units at once.
+
+Sample usage: python3 -m benchmarks.combat --clusters 16 --cluster_size 12 --damage_range 2
+'''
+
+import time
+from argparse import ArgumentParser
+
+from src.game_constants import Team, UnitType
+from src.game_state import GameState
+from src.map import Map
+from src.robot_controller import RobotController
+
+
+def make_clustered_game(num_clusters: int, cluster_size: int, unit_type: UnitType, damage_range: int) -> GameState:
+    '''Game on an open map with num_clusters checkerboard blocks of cluster_size x cluster_size units'''
+
+    clusters_per_row = max(1, int(num_clusters ** 0.5))
+    spacing = cluster_size + 4
+    size = spacing * (clusters_per_row + 1)
+
+    game_state = GameState(Map(size, size, blue_castle_loc= (0, 0), red_castle_loc= (size - 1, size - 1)))
+
+    for cluster in range(num_clusters):
+        left = 2 + (cluster % clusters_per_row) * spacing
+        bottom = 2 + (cluster // clusters_per_row) * spacing
+        for x in range(left, left + cluster_size):
+            for y in range(bottom, bottom + cluster_size):
+                team = Team.BLUE if (x + y) % 2 == 0 else Team.RED
+                game_state.place_unit(team, unit_type, x, y)
+
+    for team in Team:
+        for unit in game_state.units[team].values():
+            unit.damage_range = damage_range
+
+    #units cannot act on the turn they are placed
+    game_state.start_turn()
+    return game_state
+
+
+def run_attacks(game_state: GameState) -> tuple:
+    '''Every blue unit attacks an adjacent red unit; returns (number of attacks, seconds taken)'''
+
+    rc = RobotController(Team.BLUE, game_state)
+
+    #choose targets before timing, so only combat resolution is measured
+    attacks = []
+    for unit in game_state.units[Team.BLUE].values():
+        for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            target_id = game_state.get_unit_id_at(unit.x + dx, unit.y + dy)
+            if target_id is not None and target_id in game_state.units[Team.RED]:
+                attacks.append((unit.id, unit.x + dx, unit.y + dy))
+                break
+
+    start = time.perf_counter()
+    for attacking_unit_id, x, y in attacks:
+        rc.unit_attack_location(attacking_unit_id, x, y)
+    return len(attacks), time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--clusters", type=int, default=16)
+    parser.add_argument("--cluster_size", type=int, default=12)
+    parser.add_argument("--unit_type", type=str, default="SWORDSMAN", choices=[unit_type.name for unit_type in UnitType])
+    parser.add_argument("--damage_ranges", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'damage range':>12} {'attacks':>8} {'us/attack':>10} {'units left':>11}")
+
+    for damage_range in args.damage_ranges:
+        game_state = make_clustered_game(args.clusters, args.cluster_size, UnitType[args.unit_type], damage_range)
+
+        total_attacks, total_time = 0, 0.0
+        for _ in range(args.turns):
+            attacks, seconds = run_attacks(game_state)
+            total_attacks += attacks
+            total_time += seconds
+            game_state.start_turn()
+
+        units_left = sum(len(units) for units in game_state.units.values())
+        per_attack = total_time / max(total_attacks, 1) * 1e6
+        print(f"{damage_range:>12} {total_attacks:>8} {per_attack:>10.2f} {units_left:>11}")
+
+
+if __name__ == "__main__":
+    main()
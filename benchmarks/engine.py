@@ -0,0 +1,256 @@
+'''
+Times core engine operations in isolation across map sizes and unit counts
+
+Every operation is timed on a generated map (see src/map_generator.py) with the main castles near opposite corners
+and the given number of land units, half of each team, spread over the map at random with the teams mixed. For each map size and unit count, a fresh game is built
+for every repeat and the fastest repeat is kept. process_map only depends on the map size, so it is timed once per size;
+export_replay writes a replay of --replay_turns copies of the game's state.
+
+Results are printed as a table, and written as JSON with the environment they were measured in to --output ('-' for stdout).
+
+Sample usage: python3 -m benchmarks.engine --sizes 32 128 256 --units 100 1000 4000 --output results/engine.json
+'''
+
+import os
+import random
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple
+
+from benchmarks.harness import write_results
+from src.game import Game
+from src.game_constants import Team, UnitType, Direction
+from src.game_state import GameState
+from src.map_generator import generate_tiles, write_map
+from src.map_processor import process_map, array_to_map
+from src.robot_controller import RobotController
+
+
+UNIT_TYPES = [UnitType.KNIGHT, UnitType.WARRIOR, UnitType.SWORDSMAN, UnitType.DEFENDER]
+SENSE_RADIUS = 4
+NUM_CALLS = 1000 #calls made by operations that do not go over every unit
+
+#(number of calls, seconds taken) of one timed run of an operation
+Timing = Tuple[int, float]
+
+
+def make_game(tiles: List[List[str]], num_units: int, seed: int = 0) -> GameState:
+    '''
+    Game on the map given by tiles with num_units random land units, half of each team,
+    the teams' units mixed over the whole map so that units have enemies in range to attack
+    '''
+
+    rng = random.Random(seed)
+    game_state = GameState(array_to_map(tiles))
+    castle_locs = {(castle.x, castle.y) for team in Team for castle in game_state.buildings[team].values()}
+
+    #castle tiles are kept free so units can spawn
+    locations = [(x, y) for x in range(game_state.map.width) for y in range(game_state.map.height)
+                 if (x, y) not in castle_locs and all(game_state.is_unit_placeable(unit_type, x, y) for unit_type in UNIT_TYPES)]
+    for i, (x, y) in enumerate(rng.sample(locations, min(num_units, len(locations)))):
+        game_state.place_unit(Team.BLUE if i % 2 == 0 else Team.RED, rng.choice(UNIT_TYPES), x, y)
+
+    #units cannot act on the turn they are placed
+    game_state.start_turn()
+    return game_state
+
+
+def time_start_turn(game_state: GameState, rng: random.Random) -> Timing:
+    start = time.perf_counter()
+    for _ in range(NUM_CALLS):
+        game_state.start_turn()
+    return NUM_CALLS, time.perf_counter() - start
+
+
+def time_sense_units(game_state: GameState, rng: random.Random) -> Timing:
+    rc = RobotController(Team.BLUE, game_state)
+    centers = [(rng.randrange(game_state.map.width), rng.randrange(game_state.map.height)) for _ in range(NUM_CALLS)]
+
+    start = time.perf_counter()
+    for x, y in centers:
+        rc.sense_units_within_radius(Team.RED, x, y, SENSE_RADIUS)
+    return len(centers), time.perf_counter() - start
+
+
+def time_can_move(game_state: GameState, rng: random.Random) -> Timing:
+    rc = RobotController(Team.BLUE, game_state)
+    checks = [(unit_id, direction) for unit_id in game_state.units[Team.BLUE] for direction in Direction]
+
+    start = time.perf_counter()
+    for unit_id, direction in checks:
+        rc.can_move_unit_in_direction(unit_id, direction)
+    return len(checks), time.perf_counter() - start
+
+
+def time_move(game_state: GameState, rng: random.Random) -> Timing:
+    '''Moves every blue unit that can move one step in a random direction; only the moves are timed'''
+
+    rc = RobotController(Team.BLUE, game_state)
+    game_state.start_turn()
+
+    moves, seconds = 0, 0.0
+    for unit_id in list(game_state.units[Team.BLUE]):
+        directions = [direction for direction in Direction if direction != Direction.STAY and rc.can_move_unit_in_direction(unit_id, direction)]
+        if not directions:
+            continue
+        direction = rng.choice(directions)
+
+        start = time.perf_counter()
+        rc.move_unit_in_direction(unit_id, direction)
+        seconds += time.perf_counter() - start
+        moves += 1
+
+    return moves, seconds
+
+
+def time_attack(game_state: GameState, rng: random.Random) -> Timing:
+    '''Every blue unit with a red unit in range attacks its location'''
+
+    rc = RobotController(Team.BLUE, game_state)
+    game_state.start_turn()
+
+    #targets are chosen before timing, so only the attacks are measured
+    attacks = []
+    for unit in game_state.units[Team.BLUE].values():
+        targets = game_state.units_in_square(unit.x, unit.y, unit.attack_range, Team.RED)
+        if targets:
+            attacks.append((unit.id, targets[0].x, targets[0].y))
+
+    start = time.perf_counter()
+    for unit_id, x, y in attacks:
+        rc.unit_attack_location(unit_id, x, y)
+    return len(attacks), time.perf_counter() - start
+
+
+def time_spawn(game_state: GameState, rng: random.Random) -> Timing:
+    '''Spawns units from the blue castle, moving each spawned unit off the castle (untimed) to make room for the next'''
+
+    rc = RobotController(Team.BLUE, game_state)
+    castle = game_state.buildings[Team.BLUE][game_state.main_castle_ids[Team.BLUE]]
+    game_state.set_balance(Team.BLUE, UnitType.KNIGHT.cost * NUM_CALLS)
+
+    free = [(x, y) for x in range(game_state.map.width) for y in range(game_state.map.height)
+            if game_state.is_unit_placeable(UnitType.KNIGHT, x, y) and (x, y) != (castle.x, castle.y)]
+
+    spawns, seconds = 0, 0.0
+    for x, y in rng.sample(free, min(NUM_CALLS, len(free))):
+        start = time.perf_counter()
+        rc.spawn_unit(UnitType.KNIGHT, castle.id)
+        seconds += time.perf_counter() - start
+        spawns += 1
+
+        game_state.move_unit(game_state.get_unit_id_at(castle.x, castle.y), x, y)
+
+    return spawns, seconds
+
+
+def time_to_dict(game_state: GameState, rng: random.Random) -> Timing:
+    calls = 10
+    start = time.perf_counter()
+    for _ in range(calls):
+        game_state.to_dict()
+    return calls, time.perf_counter() - start
+
+
+#operations timed on a populated game, in the order they run on each game
+GAME_OPERATIONS = {
+    'sense_units_within_radius': time_sense_units,
+    'can_move_unit_in_direction': time_can_move,
+    'move_unit_in_direction': time_move,
+    'unit_attack_location': time_attack,
+    'spawn_unit': time_spawn,
+    'to_dict': time_to_dict,
+    'start_turn': time_start_turn,
+}
+
+
+def time_export_replay(game_state: GameState, map_path: str, directory: str, replay_turns: int) -> Timing:
+    '''Exports a replay with replay_turns copies of the game's state'''
+
+    game = Game("bots/nothing_bot.py", "bots/nothing_bot.py", map_path, os.path.join(directory, "replay.awap25r"))
+    game.game_state = game_state
+    game.map = game_state.map.to_dict()
+
+    state = game_state.to_dict()
+    game.replay = [{"turn_number": turn, "game_state": state} for turn in range(replay_turns)]
+
+    start = time.perf_counter()
+    game.export_replay(game.output_path)
+    return 1, time.perf_counter() - start
+
+
+def best_timing(timings: List[Timing]) -> Dict:
+    '''Result entry for the fastest per-call time among several runs'''
+
+    #runs that made no calls measured nothing; seconds_per_call is None if no run made any
+    timings = [timing for timing in timings if timing[0] > 0]
+    if not timings:
+        return {"calls": 0, "seconds_per_call": None}
+
+    calls, seconds = min(timings, key= lambda timing: timing[1] / timing[0])
+    return {"calls": calls, "seconds_per_call": seconds / calls}
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--units", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--replay_turns", type=int, default=50, help="turns in the replay timed by export_replay")
+    parser.add_argument("--output", type=str, default=None, help="file to write JSON results to, '-' for stdout")
+    args = parser.parse_args()
+
+    #the table goes to stderr when the JSON goes to stdout
+    table_file = sys.stderr if args.output == '-' else sys.stdout
+    def row(text: str):
+        print(text, file= table_file, flush= True)
+
+    row(f"{'operation':>27} {'size':>5} {'units':>6} {'calls':>6} {'us/call':>11}")
+
+    results = []
+    def add_result(operation: str, size: int, num_units, timings: List[Timing]):
+        result = {"operation": operation, "map_size": size, "units": num_units, **best_timing(timings)}
+        results.append(result)
+        per_call = "n/a" if result['seconds_per_call'] is None else f"{result['seconds_per_call'] * 1e6:.2f}"
+        row(f"{operation:>27} {size:>5} {str(num_units):>6} {result['calls']:>6} {per_call:>11}")
+
+    #the engine prints a message for every refused action, which is left out of the output
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+
+        for size in args.sizes:
+            map_path = os.path.join(directory, f"map_{size}.awap25m")
+            tiles = generate_tiles(size, size)
+            write_map(map_path, tiles)
+
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                process_map(map_path)
+                timings.append((1, time.perf_counter() - start))
+            add_result('process_map', size, None, timings)
+
+            for num_units in args.units:
+                #leave room on the map to move and spawn
+                if num_units > size * size // 2:
+                    continue
+
+                timings = {operation: [] for operation in GAME_OPERATIONS}
+                timings['export_replay'] = []
+                for repeat in range(args.repeats):
+                    game_state = make_game(tiles, num_units)
+                    rng = random.Random(repeat)
+                    for operation, time_operation in GAME_OPERATIONS.items():
+                        timings[operation].append(time_operation(game_state, rng))
+                    timings['export_replay'].append(time_export_replay(game_state, map_path, directory, args.replay_turns))
+
+                for operation, operation_timings in timings.items():
+                    add_result(operation, size, num_units, operation_timings)
+
+    write_results(args.output, "engine", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
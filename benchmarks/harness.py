@@ -0,0 +1,85 @@
+''' helpers shared by the benchmarks: timing, and machine-readable results with the environment they were measured in '''
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Dict, List, Optional
+
+
+def best_time(func, repeats: int) -> float:
+    '''Fastest of several runs of func, in seconds'''
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def get_git_revision() -> Dict:
+    '''Commit of the checkout the benchmark ran from, and whether it had uncommitted changes (None where git is unavailable)'''
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output= True, text= True, check= True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output= True, text= True, check= True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+
+def get_environment() -> Dict:
+    '''Description of the machine and software a benchmark runs on'''
+
+    #read from the package metadata, as importing pygame prints a message
+    try:
+        pygame_version = metadata.version('pygame')
+    except metadata.PackageNotFoundError:
+        pygame_version = None
+
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec= 'seconds'),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "pygame": pygame_version,
+        **get_git_revision(),
+    }
+
+
+def write_results(path: Optional[str], benchmark: str, parameters: Dict, results: List[Dict], summary: Optional[Dict] = None):
+    '''
+    Writes benchmark results as JSON, along with the parameters of the run, its environment and an optional summary of the results
+    The results go to stdout if path is '-', and nowhere if it is None
+    '''
+
+    if path is None:
+        return
+
+    document = {
+        "benchmark": benchmark,
+        "environment": get_environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+    if summary is not None:
+        document["summary"] = summary
+
+    if path == '-':
+        json.dump(document, sys.stdout, indent= 4)
+        print()
+        return
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok= True)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent= 4)
@@ -0,0 +1,46 @@
+'''
+Measures map load time against map size, comparing process_map with parsing the same file through ast.literal_eval
+
+Sample usage: python3 -m benchmarks.map_loading --sizes 10 100 500 1000
+'''
+
+import ast
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from benchmarks.harness import best_time
+from src.map_generator import generate_tiles, write_map
+from src.map_processor import process_map
+
+
+def literal_eval_file(file_name: str):
+    '''The parsing step of the original loader, for reference'''
+
+    with open(file_name, 'r') as f:
+        return ast.literal_eval(f.readline())
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'file (KB)':>10} {'process_map (ms)':>17} {'literal_eval (ms)':>18}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            file_name = os.path.join(directory, f"map_{size}.awap25m")
+            write_map(file_name, generate_tiles(size, size))
+
+            load_time = best_time(lambda: process_map(file_name), args.repeats) * 1e3
+            eval_time = best_time(lambda: literal_eval_file(file_name), args.repeats) * 1e3
+            file_size = os.path.getsize(file_name) / 1024
+
+            print(f"{size:>6} {file_size:>10.1f} {load_time:>17.2f} {eval_time:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
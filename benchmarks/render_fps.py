@@ -0,0 +1,68 @@
+'''
+Measures how many frames per second GameState.render draws with many units and buildings on the map
+
+Units and buildings are placed on a generated map (see src/map_generator.py). Between frames, a number of random units each step to a free neighboring tile, so every frame has changes to draw.
+Runs without a window through SDL's dummy video driver unless SDL_VIDEODRIVER is already set.
+
+Sample usage: python3 -m benchmarks.render_fps --size 50 --units 200 500 1000 --moves 50 --frames 100
+'''
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import random
+import time
+from argparse import ArgumentParser
+
+from src.game_constants import Team
+from src.game_state import GameState
+from src.map_generator import generate_map, make_scenario
+
+
+def make_populated_game(size: int, num_units: int, num_buildings: int, seed: int = 0) -> GameState:
+    '''Game on a generated size x size map with about num_units units and num_buildings buildings, half of each team'''
+    return make_scenario(generate_map(size, size, seed= seed), num_units // 2, num_buildings // 2, seed)
+
+
+def move_random_units(game_state: GameState, num_moves: int, rng: random.Random):
+    '''Moves num_moves random units one step each to a random neighboring tile, if it is free and they can walk on it'''
+
+    units = [unit for team in Team for unit in game_state.units[team].values()]
+    for unit in rng.sample(units, min(num_moves, len(units))):
+        dest_x, dest_y = unit.x + rng.randint(-1, 1), unit.y + rng.randint(-1, 1)
+        if game_state.is_unit_placeable(unit.type, dest_x, dest_y):
+            game_state.move_unit(unit.id, dest_x, dest_y)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--units", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--buildings", type=int, default=100)
+    parser.add_argument("--moves", type=int, default=50, help="units moved between frames")
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'units':>6} {'buildings':>10} {'ms/frame':>9} {'fps':>8}")
+
+    for num_units in args.units:
+        game_state = make_populated_game(args.size, num_units, args.buildings)
+        num_buildings = sum(len(buildings) for buildings in game_state.buildings.values())
+
+        #the first frame opens the window and loads the font
+        game_state.render()
+
+        rng = random.Random(1)
+        frame_time = 0.0
+        for _ in range(args.frames):
+            move_random_units(game_state, args.moves, rng)
+
+            start = time.perf_counter()
+            game_state.render()
+            frame_time += (time.perf_counter() - start) / args.frames
+
+        print(f"{num_units:>6} {num_buildings:>10} {frame_time * 1e3:>9.2f} {1 / frame_time:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
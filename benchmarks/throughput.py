@@ -0,0 +1,188 @@
+'''
+Measures end-to-end game throughput: full headless games between the bundled bots on fixed maps and seeds
+
+Each game runs in a fresh process, with Python's random module seeded and the game's output suppressed, for at most
+--max_turns turns (games between bots that never attack would otherwise not end). Reported per game and in total:
+turns per second, the split of turn time between bot code (play_turn, including the robot controller calls it makes)
+and the engine (everything else in a turn), replay bytes per turn and the peak RSS of the game's process;
+games per hour counts exporting the replay as well.
+
+With --baseline, the total turns per second over the games both runs played is compared against a results file
+written earlier with --output, and the benchmark exits with status 1 if it dropped by more than --threshold.
+
+Sample usage: python3 -m benchmarks.throughput --max_turns 200 --output results/throughput.json
+              python3 -m benchmarks.throughput --max_turns 200 --baseline results/throughput.json --threshold 0.1
+'''
+
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+from benchmarks.harness import write_results
+
+
+BOTS = ["nothing_bot", "attack_bot_v1", "builder_bot", "squire_bot"]
+MAPS = ["maps/simple_map.awap25m", "maps/scenic_backdrop.awap25m"]
+
+
+def run_game(blue_bot: str, red_bot: str, map_path: str, seed: int, max_turns: int, directory: str) -> Dict:
+    '''Plays one game in this process and measures it; meant to run in a fresh process per game'''
+
+    from src.game import Game, timed
+
+    random.seed(seed)
+    replay_path = os.path.join(directory, f"{blue_bot}_{red_bot}_{seed}.awap25r")
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        game = Game(f"bots/{blue_bot}.py", f"bots/{red_bot}.py", map_path, replay_path)
+        if game.blue_failed_init or game.red_failed_init:
+            return {"error": "a bot failed to initialize"}
+
+        #time spent in the bots' play_turn, which runs in a thread per turn; timed the way Game times it for a metrics
+        #hook, without the hook's per-call counting of controller calls, which would slow the bots down
+        bot_seconds = [0.0]
+        for player in (game.blue_player, game.red_player):
+            player.play_turn = timed(player.play_turn, bot_seconds)
+
+        winner = None
+        turns = 0
+        start = time.perf_counter()
+        while winner is None and turns < max_turns:
+            winner = game.run_turn()
+            turns += 1
+
+        #a game stopped at the turn cap is decided the way a game that ran out of turns would be
+        if winner is None:
+            winner = game.calculate_winner()
+        turn_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        game.export_replay(replay_path)
+        export_seconds = time.perf_counter() - start
+
+    replay_bytes = os.path.getsize(replay_path)
+    os.remove(replay_path)
+
+    return {
+        "turns": turns,
+        "winner": winner.name,
+        "turn_seconds": turn_seconds,
+        "bot_seconds": bot_seconds[0],
+        "engine_seconds": turn_seconds - bot_seconds[0],
+        "export_seconds": export_seconds,
+        "turns_per_second": turns / turn_seconds,
+        "replay_bytes": replay_bytes,
+        "replay_bytes_per_turn": replay_bytes / max(turns, 1),
+        #ru_maxrss is in kilobytes on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+    }
+
+
+def get_game_key(result: Dict) -> tuple:
+    return (result["blue"], result["red"], result["map"], result["seed"])
+
+
+def get_totals(results: List[Dict]) -> Dict:
+    '''Throughput over several games'''
+
+    games = [result for result in results if "error" not in result]
+    turns = sum(result["turns"] for result in games)
+    turn_seconds = sum(result["turn_seconds"] for result in games)
+    game_seconds = sum(result["turn_seconds"] + result["export_seconds"] for result in games)
+
+    return {
+        "games": len(games),
+        "turns": turns,
+        "turns_per_second": turns / turn_seconds if turn_seconds else 0.0,
+        "games_per_hour": 3600 * len(games) / game_seconds if game_seconds else 0.0,
+        "bot_fraction": sum(result["bot_seconds"] for result in games) / turn_seconds if turn_seconds else 0.0,
+        "peak_rss_mb": max((result["peak_rss_mb"] for result in games), default= 0.0),
+    }
+
+
+def compare_to_baseline(results: List[Dict], baseline: Dict, threshold: float) -> bool:
+    '''Prints how throughput compares to a baseline results file over the games both played, returns False on a regression'''
+
+    baseline_keys = {get_game_key(result) for result in baseline["results"] if "error" not in result}
+    common = [result for result in results if get_game_key(result) in baseline_keys]
+    if not common:
+        print("No games in common with the baseline")
+        return False
+
+    common_keys = {get_game_key(result) for result in common}
+    current = get_totals(common)["turns_per_second"]
+    previous = get_totals([result for result in baseline["results"] if get_game_key(result) in common_keys])["turns_per_second"]
+    change = current / previous - 1
+
+    print(f"Turns/s over {len(common)} common games: {current:.1f} now, {previous:.1f} at baseline ({change:+.1%}, threshold -{threshold:.0%})")
+    if change < -threshold:
+        print("REGRESSION: throughput dropped past the threshold")
+        return False
+
+    return True
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--bots", type=str, nargs="+", default=BOTS, help="every ordered pair of these bots plays on every map")
+    parser.add_argument("--maps", type=str, nargs="+", default=MAPS)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--max_turns", type=int, default=200)
+    parser.add_argument("--output", type=str, default=None, help="file to write JSON results to, '-' for stdout")
+    parser.add_argument("--baseline", type=str, default=None, help="results file to compare throughput against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="largest allowed drop in turns/s against the baseline")
+    args = parser.parse_args()
+
+    table_file = sys.stderr if args.output == '-' else sys.stdout
+    def row(text: str):
+        print(text, file= table_file, flush= True)
+
+    row(f"{'blue':>14} {'red':>14} {'map':>16} {'seed':>4} {'turns':>6} {'turns/s':>8} {'bot %':>6} {'B/turn':>8} {'RSS MB':>7}")
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        for map_path in args.maps:
+            for blue_bot in args.bots:
+                for red_bot in args.bots:
+                    for seed in args.seeds:
+                        #a fresh process per game, so peak RSS and module state are the game's own
+                        with context.Pool(1) as pool:
+                            measured = pool.apply(run_game, (blue_bot, red_bot, map_path, seed, args.max_turns, directory))
+
+                        result = {"blue": blue_bot, "red": red_bot, "map": map_path, "seed": seed, **measured}
+                        results.append(result)
+
+                        map_name = os.path.basename(map_path).split(".")[0]
+                        if "error" in result:
+                            row(f"{blue_bot:>14} {red_bot:>14} {map_name:>16} {seed:>4} {result['error']}")
+                            continue
+                        row(f"{blue_bot:>14} {red_bot:>14} {map_name:>16} {seed:>4} {result['turns']:>6} {result['turns_per_second']:>8.1f} "
+                            f"{100 * result['bot_seconds'] / result['turn_seconds']:>6.1f} {result['replay_bytes_per_turn']:>8.0f} {result['peak_rss_mb']:>7.1f}")
+
+    totals = get_totals(results)
+    row(f"Total: {totals['games']} games, {totals['turns']} turns, {totals['turns_per_second']:.1f} turns/s, {totals['games_per_hour']:.0f} games/hour, "
+        f"{totals['bot_fraction']:.1%} of turn time in bots, peak RSS {totals['peak_rss_mb']:.1f} MB")
+
+    write_results(args.output, "throughput", vars(args), results, totals)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+        with redirect_stdout(table_file):
+            passed = compare_to_baseline(results, baseline, args.threshold)
+        if not passed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+'''
+Measures the memory footprint of Unit and Building objects, and the cost of copying and serializing them,
+next to dict-based baselines laid out like the classes were before they used __slots__
+
+Sample usage: python3 -m benchmarks.unit_memory -n 100000
+'''
+
+import copy
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from src.game_constants import Team, UnitType, BuildingType
+from src.units import Unit
+from src.buildings import Building
+
+
+#the types held their tiles in lists, shared by every instance, rather than in tuples
+WALKABLE_TILES = {unit_type: list(unit_type.walkable_tiles) for unit_type in UnitType}
+PLACEABLE_TILES = {building_type: list(building_type.placeable_tiles) for building_type in BuildingType}
+
+
+class DictUnit:
+    '''
+    Baseline: a Unit as it was before __slots__, with an attribute __dict__, every type value copied onto the
+    instance and the default deepcopy
+    '''
+
+    id_counter = 0
+
+    def __init__(self, team: Team, type: UnitType, x: int, y: int, level: int = 1):
+        self.id = DictUnit.id_counter
+        DictUnit.id_counter += 1
+
+        self.team = team
+        self.type = type
+        self.x = x
+        self.y = y
+
+        self.turn_actions_remaining = 0
+        self.turn_movement_remaining = 0
+
+        self.attack_range = type.attack_range
+
+        self.health = type.health
+        self.damage = type.damage
+        self.defense = type.defense
+        self.damage_range = type.damage_range
+
+        self.level = level
+
+        self.walkable_tiles = WALKABLE_TILES[type]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "team": self.team.name,
+            "type": self.type.name,
+            "x": self.x,
+            "y": self.y,
+            "turn_actions_remaining": self.turn_actions_remaining,
+            "turn_movement_remaining": self.turn_movement_remaining,
+            "attack_range": self.attack_range,
+            "health": self.health,
+            "damage": self.damage,
+            "defense": self.defense,
+            "damage_range": self.damage_range,
+            "level": self.level
+        }
+
+
+class DictBuilding:
+    '''Baseline: a Building as it was before __slots__ (see DictUnit)'''
+
+    id_counter = 0
+
+    def __init__(self, team: Team, type: BuildingType, x: int, y: int, level: int = 1):
+        self.id = DictBuilding.id_counter
+        DictBuilding.id_counter += 1
+
+        self.team = team
+        self.type = type
+        self.x = x
+        self.y = y
+
+        self.health = type.health
+        self.damage = type.damage
+        self.defense = type.defense
+
+        self.attack_range = type.attack_range
+        self.damage_range = type.damage_range
+
+        self.turn_actions_remaining = 0
+
+        self.level = level
+
+        self.spawnable = type.spawnable
+
+        self.placeable_tiles = PLACEABLE_TILES[type]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "team": self.team.name,
+            "type": self.type.name,
+            "x": self.x,
+            "y": self.y,
+            "health": self.health,
+            "damage": self.damage,
+            "defense": self.defense,
+            "attack_range": self.attack_range,
+            "damage_range": self.damage_range,
+            "turn_actions_remaining": self.turn_actions_remaining,
+            "level": self.level
+        }
+
+
+def bytes_per_object(factory, n: int) -> float:
+    '''Average number of bytes allocated per object when n objects are kept alive at once'''
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [factory(i) for i in range(n)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    #the list itself holds one pointer per object
+    return (after - before) / len(objects) - 8
+
+
+def shallow_size(obj) -> int:
+    '''Size of the object itself plus its attribute __dict__, if it has one'''
+    return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, '__dict__') else 0)
+
+
+def seconds_per_call(func, objects) -> float:
+    '''Average time of func over every object in objects'''
+
+    start = time.perf_counter()
+    for obj in objects:
+        func(obj)
+    return (time.perf_counter() - start) / len(objects)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--num_objects", type=int, default=100000)
+    args = parser.parse_args()
+
+    n = args.num_objects
+
+    classes = [
+        ("Unit", lambda i: Unit(Team.BLUE, UnitType.KNIGHT, i % 100, i // 100)),
+        ("DictUnit", lambda i: DictUnit(Team.BLUE, UnitType.KNIGHT, i % 100, i // 100)),
+        ("Building", lambda i: Building(Team.RED, BuildingType.FARM_1, i % 100, i // 100)),
+        ("DictBuilding", lambda i: DictBuilding(Team.RED, BuildingType.FARM_1, i % 100, i // 100)),
+    ]
+
+    print(f"{'':12} {'shallow bytes':>14} {'bytes/object':>14} {'deepcopy (us)':>14} {'to_dict (us)':>14}")
+    for name, factory in classes:
+        objects = [factory(i) for i in range(min(n, 10000))]
+        size = bytes_per_object(factory, n)
+        deepcopy_time = seconds_per_call(copy.deepcopy, objects) * 1e6
+        to_dict_time = seconds_per_call(lambda obj: obj.to_dict(), objects) * 1e6
+        print(f"{name:12} {shallow_size(objects[0]):14} {size:14.1f} {deepcopy_time:14.2f} {to_dict_time:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,23 +13,12 @@ class BotPlayer(Player):
     def play_turn(self, rc: RobotController):
 
         team = rc.get_ally_team()
-        ally_castle_id = -1
-
-        ally_buildings = rc.get_buildings(team)
-        for building in ally_buildings:
-            if building.type == BuildingType.MAIN_CASTLE:
-                ally_castle_id = rc.get_id_from_building(building)[0]
-                break
-
+        ally_castle_ids = rc.get_building_ids_of_type(team, BuildingType.MAIN_CASTLE)
+        ally_castle_id = ally_castle_ids[0] if len(ally_castle_ids) > 0 else -1
 
         enemy = rc.get_enemy_team()
-        enemy_castle_id = -1
-
-        enemy_buildings = rc.get_buildings(enemy)
-        for building in enemy_buildings:
-            if building.type == BuildingType.MAIN_CASTLE:
-                enemy_castle_id = rc.get_id_from_building(building)[0]
-                break
+        enemy_castle_ids = rc.get_building_ids_of_type(enemy, BuildingType.MAIN_CASTLE)
+        enemy_castle_id = enemy_castle_ids[0] if len(enemy_castle_ids) > 0 else -1
 
         enemy_castle = rc.get_building_from_id(enemy_castle_id)
         if enemy_castle is None: 
@@ -27,38 +27,28 @@ class BotPlayer(Player):
 
     def play_turn(self, rc: RobotController):
         team = rc.get_ally_team()
-        ally_castle_id = -1
-
-        ally_buildings = rc.get_buildings(team)
-        for building in ally_buildings:
-            if building.type == BuildingType.MAIN_CASTLE:
-                ally_castle_id = rc.get_id_from_building(building)[0]
-                break
+        ally_castle_ids = rc.get_building_ids_of_type(team, BuildingType.MAIN_CASTLE)
+        ally_castle_id = ally_castle_ids[0] if len(ally_castle_ids) > 0 else -1
 
         enemy = rc.get_enemy_team()
-        enemy_castle_id = -1
-
-        enemy_buildings = rc.get_buildings(enemy)
-        for building in enemy_buildings:
-            if building.type == BuildingType.MAIN_CASTLE:
-                enemy_castle_id = rc.get_id_from_building(building)[0]
-                break
+        enemy_castle_ids = rc.get_building_ids_of_type(enemy, BuildingType.MAIN_CASTLE)
+        enemy_castle_id = enemy_castle_ids[0] if len(enemy_castle_ids) > 0 else -1
 
         enemy_castle = rc.get_building_from_id(enemy_castle_id)
         if enemy_castle is None:
             return
 
         # get current unit counts
-        units = rc.get_units(team)
-        total_units = len(units)
+        unit_counts = rc.get_unit_counts(team)
+        total_units = sum(unit_counts.values())
         if total_units == 0:
             if rc.can_spawn_unit(UnitType.KNIGHT, ally_castle_id):
                 rc.spawn_unit(UnitType.KNIGHT, ally_castle_id)
         else:
             # calculate current proportions
-            knights = sum(1 for u in units if u.type == UnitType.KNIGHT)
-            healers = sum(1 for u in units if u.type == UnitType.LAND_HEALER_1)
-            engineers = sum(1 for u in units if u.type == UnitType.ENGINEER)
+            knights = unit_counts[UnitType.KNIGHT]
+            healers = unit_counts[UnitType.LAND_HEALER_1]
+            engineers = unit_counts[UnitType.ENGINEER]
 
             # random choice based on proportions
             roll = random.random()
@@ -0,0 +1,43 @@
+import collections
+from argparse import ArgumentParser
+
+from src.map_generator import generate_tiles, write_map, CASTLE_PLACEMENTS, CORNERS
+
+"""
+Generates a random map file of any size, e.g. for testing how the engine scales
+Sample usage: python3 generate_map.py -o maps/stress_256.awap25m --width 256 --height 256 --water 0.2 --mountains 0.05 --sand 0.1
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("-o", "--output_file", type=str, required=True)
+
+    parser.add_argument("--width", type=int, default=64)
+    parser.add_argument("--height", type=int, default=64)
+
+    parser.add_argument("--water", type=float, default=0.15, help="Fraction of the map covered by lakes")
+    parser.add_argument("--mountains", type=float, default=0.05, help="Fraction of the map covered by mountain ridges")
+    parser.add_argument("--sand", type=float, default=0.1, help="Fraction of the map covered by sand, spreading from shores")
+
+    parser.add_argument("--castles", type=str, choices=CASTLE_PLACEMENTS, default=CORNERS, help="Where to place the main castles")
+    parser.add_argument(
+        "--asymmetric",
+        action="store_true",
+        help="Generate terrain over the whole map instead of mirroring one half onto the other",
+    )
+
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    tiles = generate_tiles(args.width, args.height, args.water, args.mountains, args.sand, args.castles, not args.asymmetric, args.seed)
+    write_map(args.output_file, tiles)
+
+    counts = collections.Counter(tile for column in tiles for tile in column)
+    mix = ", ".join(f"{tile} {count / (args.width * args.height):.1%}" for tile, count in counts.most_common())
+    print(f"Wrote {args.width}x{args.height} map to {args.output_file}: {mix}")
+
+
+if __name__ == "__main__":
+    main()
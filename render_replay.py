@@ -0,0 +1,40 @@
+import os
+import time
+from argparse import ArgumentParser
+
+from src.replay_frames import render_replay
+
+"""
+Renders the turns of a replay to images without opening a window, split across processes
+Sample usage: python3 render_replay.py replays/game_replay.awap25r -o frames
+              python3 render_replay.py replays/game_replay.awap25r -f apng -o game.png --step 2 --fps 20
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("replay_file", type=str)
+
+    parser.add_argument(
+        "-o", "--output", type=str, required=False, default="frames",
+        help="Directory to write one PNG per turn to (png), or the animated PNG file to write (apng)",
+    )
+
+    parser.add_argument("-f", "--format", type=str, choices=["png", "apng"], default="png")
+
+    parser.add_argument("--start", type=int, default=0, help="First turn to render, counting from 0")
+    parser.add_argument("--end", type=int, default=None, help="Turn to stop before (all turns by default)")
+    parser.add_argument("--step", type=int, default=1, help="Render every step-th turn")
+
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of rendering processes")
+    parser.add_argument("--fps", type=float, default=10, help="Turns shown per second in an animated PNG")
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    num_frames = render_replay(args.replay_file, args.output, args.format, args.start, args.end, args.step, args.workers, args.fps)
+    print(f"Rendered {num_frames} frames to {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
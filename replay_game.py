@@ -1 +1,164 @@
 '''replays the game using pygame given a replay file'''
+
+import time
+from argparse import ArgumentParser
+
+#src.renderer is imported before pygame, as it hides pygame's import message
+from src.renderer import Renderer
+from src.map import Map
+from src.replay_reader import ReplayReader
+from src.game_constants import Team, MapRender
+
+import pygame
+
+"""
+Plays a replay in a pygame window
+Controls: space pauses/resumes, left/right step one turn, up/down double/halve the speed, home/end jump to the
+first/last turn, and clicking or dragging along the timeline below the map seeks to that point of the game
+Sample usage: python3 replay_game.py replays/game_replay.awap25r --speed 10
+"""
+
+
+class ReplayViewer:
+    '''
+    Plays a replay in a pygame window, with a timeline to seek with and controls for speed and stepping
+
+    Every recorded turn holds the whole game state, and terrain is looked up from the map changes,
+    so seeking to any turn decodes just that turn (see ReplayReader), whatever turn was shown before
+    '''
+
+    MIN_SPEED = 0.25
+    MAX_SPEED = 256
+    FPS = 60
+
+    def __init__(self, reader: ReplayReader, speed: float = 10):
+        self.reader = reader
+        self.renderer = Renderer(Map.from_dict(reader.map))
+        self.tiles = reader.map["tiles"] #tiles the renderer's map was last brought up to date with
+
+        self.position = 0.0 #playback position in turns; the turn shown is its integer part
+        self.speed = speed #turns per second
+        self.paused = False
+        self.dragging = False #if the timeline is being dragged
+
+        self.shown = None #(turn, speed, paused) last drawn
+
+
+    def get_last_turn(self) -> int:
+        return len(self.reader) - 1
+
+
+    def seek(self, turn: int):
+        self.position = float(min(max(turn, 0), self.get_last_turn()))
+
+
+    def seek_to_screen_x(self, x: int):
+        '''Seeks to the turn at a horizontal position along the timeline'''
+
+        timeline = self.renderer.get_timeline_rect()
+        self.seek(round((x - timeline.left) / timeline.width * self.get_last_turn()))
+
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        '''Applies a key press or mouse action, returns False if the viewer should close'''
+
+        if event.type == pygame.QUIT:
+            return False
+
+        if event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                return False
+
+            elif event.key == pygame.K_SPACE:
+                #resuming at the end plays the game again
+                if self.paused and int(self.position) == self.get_last_turn():
+                    self.seek(0)
+                self.paused = not self.paused
+
+            elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                self.paused = True
+                self.seek(int(self.position) + (1 if event.key == pygame.K_RIGHT else -1))
+
+            elif event.key == pygame.K_UP:
+                self.speed = min(self.speed * 2, self.MAX_SPEED)
+            elif event.key == pygame.K_DOWN:
+                self.speed = max(self.speed / 2, self.MIN_SPEED)
+
+            elif event.key == pygame.K_HOME:
+                self.seek(0)
+            elif event.key == pygame.K_END:
+                self.seek(self.get_last_turn())
+
+        #the timeline takes clicks anywhere below the map
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and event.pos[1] >= self.renderer.height * MapRender.TILE_SIZE:
+            self.dragging = True
+            self.seek_to_screen_x(event.pos[0])
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            self.seek_to_screen_x(event.pos[0])
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.dragging = False
+
+        return True
+
+
+    def draw(self, turn: int):
+        '''Draws a turn of the replay, with the timeline at its position'''
+
+        tiles = self.reader.get_tiles(turn)
+        if tiles is not self.tiles:
+            self.renderer.set_terrain(tiles)
+            self.tiles = tiles
+
+        state = self.reader.get_state(turn)
+        lines = [
+            f'Turn: {state["turn"]} ({turn + 1}/{len(self.reader)})',
+            f'Blue: {state["balance"][Team.BLUE.name]}  Red: {state["balance"][Team.RED.name]}',
+        ]
+        if turn == self.get_last_turn():
+            lines[0] += f'  Winner: {self.reader.winner_color}'
+
+        pygame.display.set_caption(f'Replay - {self.speed:g} turns/s' + (' (paused)' if self.paused else ''))
+        self.renderer.snapshot_render(state, lines, turn / max(1, self.get_last_turn()))
+
+
+    def run(self):
+        '''Opens the window and plays the replay until the window is closed'''
+
+        self.renderer.init_render()
+        clock = pygame.time.Clock()
+
+        while True:
+            elapsed = clock.tick(self.FPS) / 1000
+
+            for event in pygame.event.get():
+                if not self.handle_event(event):
+                    pygame.quit()
+                    return
+
+            if not self.paused and not self.dragging:
+                self.position = min(self.position + elapsed * self.speed, self.get_last_turn())
+                if int(self.position) == self.get_last_turn():
+                    self.paused = True
+
+            #frames are only drawn when what they show changed
+            view = (int(self.position), self.speed, self.paused)
+            if view != self.shown:
+                self.draw(view[0])
+                self.shown = view
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("replay_file", type=str)
+    parser.add_argument("--speed", type=float, default=10, help="Turns shown per second")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reader = ReplayReader(args.replay_file)
+    print(f"Opened {len(reader)} turns in {time.perf_counter() - start:.2f}s")
+
+    ReplayViewer(reader, args.speed).run()
+
+
+if __name__ == "__main__":
+    main()
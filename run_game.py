@@ -1,4 +1,7 @@
 from src.game import Game
+from src.map_cache import MapCache
+from src.viewer import VIEWER_MODES, LIVE
+from src.metrics import MetricsFile, get_metrics_path
 from argparse import ArgumentParser
 import json
 
@@ -27,6 +30,42 @@ def main():
         help="Whether or not to display the game while it is running",
     )
 
+    parser.add_argument(
+        "--render_mode",
+        type=str,
+        choices=VIEWER_MODES,
+        default=LIVE,
+        help="With --render, 'live' follows the game and skips turns it cannot draw in time, 'buffered' shows every turn in order. "
+        "Either way the game runs at full speed; once it is over, the window stays open until every remaining turn has been shown (close it to stop early)",
+    )
+
+    parser.add_argument(
+        "--render_fps", type=float, required=False, default=10, help="With --render, frames drawn per second ('live') or turns shown per second ('buffered')"
+    )
+
+    parser.add_argument(
+        "--map_cache",
+        type=str,
+        required=False,
+        help="Directory to cache processed maps in, so repeated games on the same map skip processing it",
+    )
+
+    parser.add_argument(
+        "--map_cache_size", type=int, required=False, default=256, help="Size cap of the map cache in MB"
+    )
+
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Time each phase of every turn and count each bot's controller calls, written next to the replay as a .metrics.jsonl file",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record the number and time of each bot's controller calls per turn, printed at the end and saved in the replay",
+    )
+
     parser.add_argument( 
         "-o", "--output_file", type=str, required=False, default="replays/game_replay.awap25r" # AWAP format (used for CLI view)
     )
@@ -58,13 +97,22 @@ def main():
         red_path = args.red_path
         map_path = args.map_path
 
+    map_cache = MapCache(args.map_cache, args.map_cache_size * 1024 * 1024) if args.map_cache else None
+
+    metrics = MetricsFile(get_metrics_path(args.output_file)) if args.metrics else None
+
     game = Game(
-        blue_path=blue_path, red_path=red_path, map_path=map_path, output_path=args.output_file, render=render
+        blue_path=blue_path, red_path=red_path, map_path=map_path, output_path=args.output_file, render=render, map_cache=map_cache,
+        render_mode=args.render_mode, render_fps=args.render_fps, metrics=metrics, profile=args.profile
     )
     print("Game Start")
 
     game.run_game()
 
+    #the game does not wait for the viewer, but the window should get to show the end of the game
+    if game.viewer is not None:
+        game.viewer.wait()
+
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,34 @@
 ''' creates building objects (castle, farms, etc) '''
-from src.game_constants import GameConstants, BuildingType, Team, BuildingRender
+import copy
+from typing import List, Optional
+
+from src.game_constants import GameConstants, BuildingType, Team, BuildingRender, Tile
+from src.turn_clock import TurnClock
 
 class Building:
     '''
     This is an extensible building class with all the traits of a building.
     The specifications for a building/unit is given in src/game_constants.py
+
+    Traits that never change over a building's life (attack_range, damage_range, spawnable, placeable_tiles)
+    are read through the building's type unless they have been overridden on this building.
+
+    turn_actions_remaining is reset lazily: it reads as the type's full allowance once the
+    game's TurnClock has moved past the turn it was last written in.
     '''
 
+    __slots__ = (
+        'id', 'team', 'type', 'x', 'y',
+        'health', 'damage', 'defense',
+        '_turn_actions_remaining', 'level',
+        '_reset_turn', '_clock', #turn in which the per-turn values were last written, and the game's clock
+        '_attack_range', '_damage_range', '_spawnable', '_placeable_tiles', #per-building overrides of type data, None if not overridden
+    )
+
     #ID for participants to interface through instead of through the actual object for safety
     id_counter = 0
-    
-    def __init__(self, team: Team, type: BuildingType, x: int, y: int, level: int = 1, spawnable: bool= False):
+
+    def __init__(self, team: Team, type: BuildingType, x: int, y: int, level: int = 1, spawnable: bool= False, clock: Optional[TurnClock] = None):
 
         self.id = self.increment()
 
@@ -18,22 +36,22 @@ class Building:
         self.type = type
         self.x = x
         self.y = y
-        
+
         self.health = type.health
         self.damage = type.damage
         self.defense = type.defense
 
-        self.attack_range = type.attack_range
-        self.damage_range = type.damage_range
-
         #cannot move and cannot act the turn of its spawn
-        self.turn_actions_remaining = 0
+        self._clock = clock
+        self._reset_turn = clock.turn if clock is not None else 0
+        self._turn_actions_remaining = 0
 
         self.level = level
 
-        self.spawnable = type.spawnable
-
-        self.placeable_tiles = type.placeable_tiles #tiles that the building can be placed on
+        self._attack_range = None
+        self._damage_range = None
+        self._spawnable = None
+        self._placeable_tiles = None
 
 
     @staticmethod
@@ -42,6 +60,71 @@ class Building:
         Building.id_counter += 1
         return res
 
+    @property
+    def turn_actions_remaining(self) -> int:
+        if self._clock is not None and self._reset_turn != self._clock.turn:
+            return self.type.actions_per_turn
+        return self._turn_actions_remaining
+
+    @turn_actions_remaining.setter
+    def turn_actions_remaining(self, turn_actions_remaining: int):
+        if self._clock is not None:
+            self._reset_turn = self._clock.turn
+        self._turn_actions_remaining = turn_actions_remaining
+
+    @property
+    def attack_range(self) -> int:
+        return self.type.attack_range if self._attack_range is None else self._attack_range
+
+    @attack_range.setter
+    def attack_range(self, attack_range: int):
+        self._attack_range = attack_range
+
+    @property
+    def damage_range(self) -> int:
+        return self.type.damage_range if self._damage_range is None else self._damage_range
+
+    @damage_range.setter
+    def damage_range(self, damage_range: int):
+        self._damage_range = damage_range
+
+    @property
+    def spawnable(self) -> bool:
+        return self.type.spawnable if self._spawnable is None else self._spawnable
+
+    @spawnable.setter
+    def spawnable(self, spawnable: bool):
+        self._spawnable = spawnable
+
+    @property
+    def placeable_tiles(self) -> List[Tile]:
+        '''tiles that the building can be placed on'''
+        return self.type.placeable_tiles if self._placeable_tiles is None else self._placeable_tiles
+
+    @placeable_tiles.setter
+    def placeable_tiles(self, placeable_tiles: List[Tile]):
+        self._placeable_tiles = placeable_tiles
+
+    def __deepcopy__(self, memo):
+        '''
+        Copies every slot; only overridden type data can be mutable, so only it is deep copied
+        Unless the clock is copied along with the building, the copy is detached from it and keeps the current per-turn values
+        '''
+        res = Building.__new__(Building)
+        for name in Building.__slots__:
+            setattr(res, name, getattr(self, name))
+
+        if id(self._clock) in memo:
+            res._clock = memo[id(self._clock)]
+        else:
+            res._turn_actions_remaining = self.turn_actions_remaining
+            res._clock = None
+
+        if self._placeable_tiles is not None:
+            res._placeable_tiles = copy.deepcopy(self._placeable_tiles, memo)
+
+        return res
+
     def to_dict(self):
         """
         Converts the building into a dictionary representation for JSON replay files.
@@ -61,5 +144,5 @@ class Building:
             "level": self.level
         }
 
-    
+
 
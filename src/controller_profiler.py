@@ -0,0 +1,199 @@
+''' opt-in profiling of the robot controller calls each bot makes: how often it calls each method, and how long the calls take '''
+
+import copy
+import inspect
+import time
+from typing import Dict, List, Optional
+
+from src import robot_controller
+from src.metrics import API_METHODS
+from src.robot_controller import RobotController
+
+
+class TimedCopy:
+    '''
+    Stands in for the copy module in src.robot_controller while a profiled bot plays its turn, keeping a running
+    total of the time spent in deepcopy, which the controller uses to hand bots copies of its units, buildings and maps
+    '''
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.users = 0 #profiled turns in progress
+
+    def deepcopy(self, x, memo= None):
+        start = time.perf_counter()
+        try:
+            return copy.deepcopy(x, memo)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def __getattr__(self, name: str):
+        return getattr(copy, name)
+
+
+TIMED_COPY = TimedCopy()
+
+
+def install_timed_copy():
+    '''Makes src.robot_controller time its deepcopy calls, until every install is matched by uninstall_timed_copy'''
+
+    TIMED_COPY.users += 1
+    robot_controller.copy = TIMED_COPY
+
+
+def uninstall_timed_copy():
+    '''Gives src.robot_controller back the copy module once no profiled turn is in progress'''
+
+    TIMED_COPY.users = max(TIMED_COPY.users - 1, 0)
+    if TIMED_COPY.users == 0:
+        robot_controller.copy = copy
+
+
+class ProfilingController:
+    '''
+    Stands in for a RobotController, passing every call on to it and recording, for each public method, the number of
+    calls and the time they took (including the part of it spent in copy.deepcopy) during the current turn
+
+    start_turn and end_turn bracket each turn of the bot; the deepcopy calls of the controller are only timed in between,
+    so other games in the process are unaffected. end_turn adds the turn to the totals over the game; get_summary gives them.
+    Calls the controller makes to its own methods are part of the call that made them, not counted separately.
+    Methods that return generators are timed over every step of the iteration, counting as one call.
+    '''
+
+    def __init__(self, controller: RobotController):
+        #method name -> [calls, seconds, deepcopy seconds] this turn
+        self.turn_stats: Dict[str, List] = {}
+
+        #method name -> [calls, seconds, deepcopy seconds, most calls in a turn, most seconds in a turn] over the game
+        self.totals: Dict[str, List] = {}
+
+        #every turn ended: its total calls and seconds, and method name -> [calls, seconds, deepcopy seconds]
+        self.turns: List[Dict] = []
+
+        #set once the bot outlives its time limit
+        self.timed_out = False
+
+        for name in API_METHODS:
+            setattr(self, name, self.profiled(name, getattr(controller, name)))
+
+    def profiled(self, name: str, method):
+        stats = self.turn_stats
+        timed_copy = TIMED_COPY
+
+        def record(calls: int, start: float, copy_seconds: float):
+            #a bot left running past its time limit is no longer recorded
+            if self.timed_out:
+                return
+
+            entry = stats.get(name)
+            if entry is None:
+                entry = stats[name] = [0, 0.0, 0.0]
+            entry[0] += calls
+            entry[1] += time.perf_counter() - start
+            entry[2] += timed_copy.seconds - copy_seconds
+
+        def call(*args, **kwargs):
+            copy_seconds = timed_copy.seconds
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(1, start, copy_seconds)
+
+        if not inspect.isgeneratorfunction(method):
+            return call
+
+        #the work of a generator method is done as the bot iterates over it, so every step is timed as part of the call
+        def iterate(iterator):
+            while True:
+                copy_seconds = timed_copy.seconds
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    record(0, start, copy_seconds)
+                yield item
+
+        def call_generator(*args, **kwargs):
+            return iterate(call(*args, **kwargs))
+
+        return call_generator
+
+    def start_turn(self):
+        '''Starts timing the deepcopy calls of the controller for a turn of the bot'''
+        install_timed_copy()
+
+    def end_turn(self, timed_out: bool = False):
+        '''
+        Stops timing deepcopy calls, and adds the calls of the current turn to the totals
+        With timed_out, the bot is still running past its time limit: the turn is marked as timed out and nothing
+        the bot calls after this is recorded
+        '''
+
+        self.timed_out = timed_out
+        uninstall_timed_copy()
+
+        turn_stats = dict(self.turn_stats)
+        self.turn_stats.clear()
+
+        turn_calls, turn_seconds = 0, 0.0
+        for name, (calls, seconds, copy_seconds) in turn_stats.items():
+            totals = self.totals.get(name)
+            if totals is None:
+                totals = self.totals[name] = [0, 0.0, 0.0, 0, 0.0]
+            totals[0] += calls
+            totals[1] += seconds
+            totals[2] += copy_seconds
+            totals[3] = max(totals[3], calls)
+            totals[4] = max(totals[4], seconds)
+
+            turn_calls += calls
+            turn_seconds += seconds
+
+        turn = {
+            "calls": turn_calls,
+            "seconds": turn_seconds,
+            "methods": {name: list(stats) for name, stats in turn_stats.items()},
+        }
+        if timed_out:
+            turn["timed_out"] = True
+        self.turns.append(turn)
+
+    def get_summary(self) -> Dict:
+        '''
+        Totals over the game of every method called, the most expensive first, along with every turn's
+        calls and time, in total and per method ([calls, seconds, deepcopy seconds])
+        '''
+
+        methods = sorted(self.totals.items(), key= lambda item: -item[1][1])
+        return {
+            "calls": sum(totals[0] for totals in self.totals.values()),
+            "seconds": sum(totals[1] for totals in self.totals.values()),
+            "deepcopy_seconds": sum(totals[2] for totals in self.totals.values()),
+            "methods": {
+                name: {
+                    "calls": calls,
+                    "seconds": seconds,
+                    "deepcopy_seconds": copy_seconds,
+                    "max_calls_per_turn": max_calls,
+                    "max_seconds_per_turn": max_seconds,
+                }
+                for name, (calls, seconds, copy_seconds, max_calls, max_seconds) in methods
+            },
+            "turns": self.turns,
+        }
+
+
+def print_profile(team_name: str, summary: Dict, top: Optional[int] = 15):
+    '''Prints a table of the methods a bot called most expensively, from a ProfilingController summary'''
+
+    turns = max(len(summary["turns"]), 1)
+    print(f"{team_name} controller calls: {summary['calls']} over {len(summary['turns'])} turns, "
+          f"{summary['seconds']:.3f} s ({summary['seconds'] / turns * 1e3:.3f} ms/turn), {summary['deepcopy_seconds']:.3f} s in deepcopy")
+
+    print(f"{'method':>36} {'calls':>8} {'total ms':>10} {'deepcopy':>9} {'us/call':>9} {'max calls/turn':>15} {'max ms/turn':>12}")
+    for name, method in list(summary["methods"].items())[:top]:
+        print(f"{name:>36} {method['calls']:>8} {method['seconds'] * 1e3:>10.2f} {method['deepcopy_seconds'] / (method['seconds'] or 1):>9.0%} "
+              f"{method['seconds'] / method['calls'] * 1e6:>9.2f} {method['max_calls_per_turn']:>15} {method['max_seconds_per_turn'] * 1e3:>12.3f}")
@@ -0,0 +1,77 @@
+''' typed log of everything that changes in a game, so players and tools can follow the game state incrementally '''
+
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from src.game_constants import Team, UnitType, BuildingType, Tile
+
+
+class EventType(Enum):
+    '''Kinds of changes to the game state'''
+
+    SPAWNED = 'spawned' # a unit entered the game
+    MOVED = 'moved' # a unit moved; (x, y) is its new location
+    DAMAGED = 'damaged' # a unit or building lost health; value is its new health
+    HEALED = 'healed' # a unit gained health; value is its new health
+    DIED = 'died' # a unit left the game (killed, sold or disbanded)
+    BUILT = 'built' # a building entered the game
+    DESTROYED = 'destroyed' # a building left the game (destroyed or sold)
+    TILE_CHANGED = 'tile_changed' # the tile at (x, y) changed; object_type is the new Tile
+    BALANCE_CHANGED = 'balance_changed' # a team's balance changed; value is the new balance
+
+
+class GameEvent(NamedTuple):
+    '''
+    One change to the game state
+
+    object_id and object_type identify the unit or building changed (unit and building ids can overlap, the type tells them apart);
+    they are None for balance changes, and object_type is the new Tile for tile changes
+    '''
+
+    turn: int
+    type: EventType
+    team: Optional[Team]
+    object_id: Optional[int]
+    object_type: Optional[Union[UnitType, BuildingType, Tile]]
+    x: int = -1
+    y: int = -1
+    value: Union[int, float] = 0
+
+
+class EventLog:
+    '''
+    Append-only log of GameEvents with a cursor per team marking where that team's last turn ended
+
+    Events are numbered from the start of the game; once both teams' cursors have passed an event,
+    it is dropped from memory
+    '''
+
+    def __init__(self):
+        self.events: List[GameEvent] = []
+        self.start = 0 #number of the first event still held
+
+        self.turn_ends: Dict[Team, int] = {Team.BLUE: 0, Team.RED: 0}
+
+
+    def emit(self, event: GameEvent):
+        self.events.append(event)
+
+
+    def get_end(self) -> int:
+        '''Number of the next event to be emitted'''
+        return self.start + len(self.events)
+
+
+    def end_turn(self, team: Team):
+        '''Marks the end of a team's turn, dropping the events both teams have seen'''
+        self.turn_ends[team] = self.get_end()
+
+        seen = min(self.turn_ends.values())
+        if seen - self.start > len(self.events) // 2:
+            del self.events[:seen - self.start]
+            self.start = seen
+
+
+    def get_events_since_turn_end(self, team: Team) -> List[GameEvent]:
+        '''Events emitted since the end of a team's last turn, oldest first'''
+        return self.events[self.turn_ends[team] - self.start:]
@@ -19,6 +19,10 @@ from src.robot_controller import RobotController
 from src.player import Player
 
 from src.map_processor import process_map
+from src.map_cache import MapCache
+from src.viewer import Viewer, LIVE
+from src.controller_profiler import ProfilingController, print_profile
+from src.metrics import TurnMetrics, PhaseTimer, CountingController, NO_TIMER, BOT_PHASES, START_TURN, TO_DICT, RECORD_TURN
 
 
 def import_file(module_name, file_path):
@@ -35,13 +39,37 @@ def import_file(module_name, file_path):
 
 
 
+def timed(play_turn, seconds: List[float]):
+    '''Wraps a bot's play_turn to add the time it takes to seconds[0]'''
+
+    def timed_play_turn(controller):
+        start = time.perf_counter()
+        try:
+            play_turn(controller)
+        finally:
+            seconds[0] += time.perf_counter() - start
+
+    return timed_play_turn
+
+
 class Game:
-    def __init__(self, blue_path: str, red_path: str, map_path: str, output_path: str, render= False):
+    def __init__(self, blue_path: str, red_path: str, map_path: str, output_path: str, render= False, map_cache: Optional[MapCache]= None, render_mode: str= LIVE, render_fps: float= 10,
+                 metrics: Optional[TurnMetrics]= None, profile: bool= False):
         
-        self.map = process_map(map_path)
+        #load the map through the processed map cache if one is given
+        self.map = process_map(map_path) if map_cache is None else map_cache.load_map(map_path)
         self.game_state = GameState(map=self.map)
 
+        #with render, the game is shown by a viewer process (see src/viewer.py) started when the game runs
         self.render = render
+        self.render_mode = render_mode
+        self.render_fps = render_fps
+        self.viewer: Optional[Viewer] = None
+        self.map_changes_published = 0 #number of map changes already sent to the viewer
+
+        #with a metrics hook, every turn's phases are timed and the bots' controller calls counted (see src/metrics.py)
+        self.metrics = metrics
+
         self.output_path = output_path
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -69,6 +97,17 @@ class Game:
         #initialize controller
         self.blue_controller = RobotController(Team.BLUE, self.game_state)
         self.red_controller = RobotController(Team.RED, self.game_state)
+
+        #with profile, the time of every controller call is recorded per bot and turn, and summarized in the replay
+        self.profilers: Dict[Team, ProfilingController] = {}
+        if profile:
+            self.profilers = {Team.BLUE: ProfilingController(self.blue_controller), Team.RED: ProfilingController(self.red_controller)}
+            self.blue_controller = self.profilers[Team.BLUE]
+            self.red_controller = self.profilers[Team.RED]
+
+        if self.metrics is not None:
+            self.blue_controller = CountingController(self.blue_controller)
+            self.red_controller = CountingController(self.red_controller)
         self.replay = []  # To store turn-by-turn replay information
         self.map = self.game_state.map.to_dict()
 
@@ -76,6 +115,22 @@ class Game:
         """Record data of the current turn into the replay."""
         self.replay.append(turn_data)
 
+        if self.viewer is not None:
+            self.publish_state(turn_data["game_state"])
+
+    def publish_state(self, state: Dict):
+        """Send a game state to the viewer, along with the map if it changed since the last state sent."""
+        tiles = None
+        if len(self.game_state.changed_maps) > self.map_changes_published:
+            tiles = self.game_state.changed_maps[-1]
+            self.map_changes_published = len(self.game_state.changed_maps)
+
+        self.viewer.publish(state, tiles)
+
+    def time_phase(self, phase: str):
+        """Context timing a phase of the turn for the metrics hook, doing nothing without one."""
+        return NO_TIMER if self.metrics is None else PhaseTimer(self.metrics, phase)
+
     def export_replay(self, filename: str):
         """Export the replay object to a JSON file with the winner at the top level."""
         replay_data = {
@@ -86,8 +141,11 @@ class Game:
                 "changed-maps": self.game_state.changed_maps
             },
             "winner_color": self.replay[0].get("winner_color", "None"),
-            "replay": self.replay
         }
+        if self.profilers:
+            replay_data["controller-profile"] = {team.name: profiler.get_summary() for team, profiler in self.profilers.items()}
+        replay_data["replay"] = self.replay
+
         with open(filename, 'w') as f:
             json.dump(replay_data, f, indent=4)
 
@@ -100,18 +158,41 @@ class Game:
 
         # Create a thread that runs player.play_turn.
         # This function might not exist if the player code is broken, so we need to handle that.
+        # With metrics, play_turn is timed from inside the thread to tell the bot's time from the thread's overhead.
+        bot_seconds = [0.0]
         try:
-            thread = Thread(target=player.play_turn, args=[controller], daemon=True)
+            play_turn = player.play_turn
+            if self.metrics is not None:
+                play_turn = timed(play_turn, bot_seconds)
+            wall_start = time.perf_counter()
+            thread = Thread(target=play_turn, args=[controller], daemon=True)
         except:
             print(f"Failed to call player code for {team}. Are you inheriting the Player class?")
             return False
 
+        if team in self.profilers:
+            self.profilers[team].start_turn()
+
         # Run in separate thread with time limit
         func_time = time.time()
         thread.start()
         thread.join(self.game_state.time_remaining[team])
         func_time = time.time() - func_time
 
+        if team in self.profilers:
+            self.profilers[team].end_turn(timed_out= thread.is_alive())
+
+        if self.metrics is not None:
+            wall_seconds = time.perf_counter() - wall_start
+            # a bot still running past its time limit spent all of it
+            if thread.is_alive():
+                bot_seconds[0] = wall_seconds
+            bot_phase, thread_phase = BOT_PHASES[team]
+            self.metrics.record_phase(bot_phase, bot_seconds[0])
+            self.metrics.record_phase(thread_phase, max(wall_seconds - bot_seconds[0], 0.0))
+            self.metrics.record_calls(team, controller.counts)
+            controller.counts.clear()
+
         # Check if thread timed out
         if thread.is_alive() or func_time > self.game_state.time_remaining[team]:
             self.game_state.time_remaining[team] = 0
@@ -128,12 +209,15 @@ class Game:
         red_lose = self.game_state.red_main_castle_id not in self.game_state.buildings[Team.RED]  # red castle destroyed
 
         # record last turn for replay file (health of one should be 0)
+        with self.time_phase(TO_DICT):
+            state = self.game_state.to_dict()
         turn_data = {
             "turn_number": len(self.replay), 
-            "game_state": self.game_state.to_dict(),  
+            "game_state": state,  
         }
 
-        self.record_turn(turn_data)
+        with self.time_phase(RECORD_TURN):
+            self.record_turn(turn_data)
 
 
         # check if one main castle is destroyed while the other is not (definitive win)
@@ -168,12 +252,8 @@ class Game:
         }
 
         for team in Team:
-            # add unit costs
-            for unit in self.game_state.units[team].values():
-                total_balance[team] += unit.type.cost
-            # add building costs
-            for building in self.game_state.buildings[team].values():
-                total_balance[team] += building.type.cost
+            # add unit and building costs
+            total_balance[team] += self.game_state.asset_value[team]
 
         if total_balance[Team.BLUE] > total_balance[Team.RED]:
             print('BLUE WINS')
@@ -197,17 +277,24 @@ class Game:
         '''Runs the turn by running passive changes on game_state, and calls player turns'''
 
 
+        if self.metrics is not None:
+            self.metrics.start_turn(len(self.replay))
+
         #procedurally start the turn
-        self.game_state.start_turn()
+        with self.time_phase(START_TURN):
+            self.game_state.start_turn()
 
         #add time to each player
         self.game_state.time_remaining[Team.BLUE] += GameConstants.ADDITIONAL_TIME_PER_TURN
         self.game_state.time_remaining[Team.RED] += GameConstants.ADDITIONAL_TIME_PER_TURN
 
 
-        #run player code, blue goes first then red
+        #run player code, blue goes first then red; each player's next events start from the end of its turn
         blue_success = self.call_player_code(Team.BLUE)
+        self.game_state.events.end_turn(Team.BLUE)
+
         red_success = self.call_player_code(Team.RED)
+        self.game_state.events.end_turn(Team.RED)
 
         if not blue_success and not red_success:  # Both failed
             
@@ -228,12 +315,15 @@ class Game:
             return self.calculate_winner()
         
 
+        with self.time_phase(TO_DICT):
+            state = self.game_state.to_dict()
         turn_data = {
             "turn_number": len(self.replay), # Removed + 1 because the map now takes up one spot
-            "game_state": self.game_state.to_dict(),  
+            "game_state": state,  
         }
 
-        self.record_turn(turn_data)
+        with self.time_phase(RECORD_TURN):
+            self.record_turn(turn_data)
 
         return None
 
@@ -241,29 +331,43 @@ class Game:
         '''Initializes the bots and runs the game. Exports the JSON when finished'''
 
         # Check if we initialized players successfully
-        if self.blue_failed_init and self.red_failed_init:
-            print('Both blue and red failed to initialize. Nobody wins.')
-            return None
-        elif self.blue_failed_init:
-            print("Blue failed to initialize. Red wins.")
-            return Team.RED
-        elif self.red_failed_init:
-            print("Red failed to initialize. Blue wins.")
-            return Team.BLUE
-
+        if self.blue_failed_init or self.red_failed_init:
+            if self.blue_failed_init and self.red_failed_init:
+                print('Both blue and red failed to initialize. Nobody wins.')
+                winner = None
+            elif self.blue_failed_init:
+                print("Blue failed to initialize. Red wins.")
+                winner = Team.RED
+            else:
+                print("Red failed to initialize. Blue wins.")
+                winner = Team.BLUE
+
+            # the metrics of a game that never started are still closed off
+            if self.metrics is not None:
+                self.metrics.end_game(winner)
+            return winner
+
+
+        #the viewer draws at its own pace, so the game never waits for it
+        if self.render:
+            self.viewer = Viewer(self.map, self.render_mode, self.render_fps)
+            self.publish_state(self.game_state.to_dict())
 
         while True:
-            if self.render:
-                self.game_state.render()
-                time.sleep(.1)
-
             winner = self.run_turn()
 
             if winner is not None:
                 self.export_replay(self.output_path) 
 
-                if self.render:
-                    self.game_state.render()
+                for team, profiler in self.profilers.items():
+                    print_profile(team.name, profiler.get_summary())
+
+                if self.metrics is not None:
+                    self.metrics.end_game(winner)
+
+                if self.viewer is not None:
+                    self.publish_state(self.game_state.to_dict())
+                    self.viewer.close()
 
                 return winner
             
\ No newline at end of file
@@ -86,6 +86,15 @@ class Direction(Enum):
 
 
 
+class TargetPolicy(Enum):
+    '''How auto attacks choose a target among the enemies in an attacker's range'''
+
+    LOWEST_HEALTH = 'lowest_health' # weakest first, ties broken by distance
+    NEAREST = 'nearest' # closest first, ties broken by health
+    HIGHEST_VALUE = 'highest_value' # most costly first, ties broken by health
+
+
+
 
 
 '''
@@ -113,10 +122,11 @@ class BuildingType (Enum):
 
         self.spawnable = spawnable # Can spawn units if True
 
+        #stored as tuples since units and buildings share them through their type
         if placeable_tiles is None: #typical land building
-            self.placeable_tiles = [Tile.GRASS, Tile.SAND]
+            self.placeable_tiles = (Tile.GRASS, Tile.SAND)
         else:
-            self.placeable_tiles = placeable_tiles #tiles that it can be placed on
+            self.placeable_tiles = tuple(placeable_tiles) #tiles that it can be placed on
 
 
     #in the order of (health, cost, attack_range, damage_range, cooldown, damage, defense, actions_per_turn, coins_per_turn, spawnable, placeable_tiles)
@@ -149,9 +159,9 @@ class UnitType (Enum):
         self.heal_amount = heal_amount
 
         if walkable_tiles is None:
-            self.walkable_tiles = [Tile.GRASS, Tile.SAND, Tile.BRIDGE]
+            self.walkable_tiles = (Tile.GRASS, Tile.SAND, Tile.BRIDGE)
         else:
-            self.walkable_tiles = walkable_tiles
+            self.walkable_tiles = tuple(walkable_tiles)
 
 
     #in the order of (health, cost, attack range, cooldown, damage, defense, actions_per_turn, move_range, damage range, heal_amount, [spawnable buildings])
@@ -224,7 +234,7 @@ class TileColors:
         Tile.ERROR : (0, 0, 0), #white
         Tile.MOUNTAIN : (128, 128, 128), #gray
         Tile.GRASS : (0, 128, 0), #green
-        Tile.SAND : (3, 2), #yellow
+        Tile.SAND : (240, 220, 130), #yellow
         Tile.WATER : (173, 216, 230), #light blue
         Tile.BRIDGE : (222, 184, 135), #brown
     }
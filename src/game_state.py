@@ -1,20 +1,26 @@
 ''' file that contains the game state at a given instnace; can change the game state through functions (attack function, spawn function) '''
 
 from src.map import Map
-from src.game_constants import Team, GameConstants, UnitType, BuildingType, MapRender
+from src.game_constants import Team, GameConstants, UnitType, BuildingType, MapRender, Tile, TargetPolicy
 from src.buildings import Building
 from src.units import Unit
+from src.turn_clock import TurnClock
+from src.spatial import clip_square, get_ring_offsets
+from src.unit_ranking import UnitRanking, RANKING_KEYS
+from src.events import EventLog, EventType, GameEvent
 
 from src.exceptions import GameException
 
 from src.renderer import Renderer
 
+import heapq
+from bisect import bisect_left
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide" #stop the command line pygame printout
 import pygame
 import pygame.font as font
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 class GameState:
@@ -34,7 +40,8 @@ class GameState:
 
         self.balance = {Team.BLUE: GameConstants.STARTING_BALANCE, Team.RED: GameConstants.STARTING_BALANCE}
 
-        self.turn = 0
+        #shared with every unit and building, so their per-turn values reset lazily when the turn advances
+        self.clock = TurnClock()
 
         self.has_rendered = False #if the pygame has been initialized
         self.tile_size = -1
@@ -42,17 +49,39 @@ class GameState:
         self.buildings: Dict[Team, Dict[int, Building]] = {Team.BLUE: {}, Team.RED: {}}
         self.units: Dict[Team, Dict[int, Unit]] = {Team.BLUE: {}, Team.RED: {}}
 
-        #get main castle to buildings; add players' main castle given by map into buildings
-        red_main_castle = Building(Team.RED, BuildingType.MAIN_CASTLE, self.map.red_castle_loc[0], self.map.red_castle_loc[1], spawnable= True)
-        blue_main_castle = Building(Team.BLUE, BuildingType.MAIN_CASTLE, self.map.blue_castle_loc[0], self.map.blue_castle_loc[1], spawnable= True)
-        #this is to know when we deleted the building (ie when the game ends)
-
         self.building_placeable_map = [[True for y in range(self.map.height)] for x in range(self.map.width)]
         self.unit_placeable_map = [[True for y in range(self.map.height)] for x in range(self.map.width)]
-        #set building_placeable
-        self.building_placeable_map[self.map.red_castle_loc[0]][self.map.red_castle_loc[1]] = False
-        self.building_placeable_map[self.map.blue_castle_loc[0]][self.map.blue_castle_loc[1]] = False
 
+        #occupancy index: id of the unit/building standing on each tile, None if empty
+        self.unit_id_map: List[List[Optional[int]]] = [[None for y in range(self.map.height)] for x in range(self.map.width)]
+        self.building_id_map: List[List[Optional[int]]] = [[None for y in range(self.map.height)] for x in range(self.map.width)]
+
+        self.FARMS = [BuildingType.FARM_1, BuildingType.FARM_2, BuildingType.FARM_3]
+
+        #running total of each team's farm income, kept up to date as farms are placed and removed
+        self.income = {Team.BLUE: 0, Team.RED: 0}
+
+        #running total of each team's assets (total cost of all units and buildings), kept up to date as objects are added and removed
+        self.asset_value = {Team.BLUE: 0, Team.RED: 0}
+
+        #type index: each team's units/buildings of each type, keyed by id in the same order as self.units/self.buildings
+        self.units_by_type: Dict[Team, Dict[UnitType, Dict[int, Unit]]] = {team: {unit_type: {} for unit_type in UnitType} for team in Team}
+        self.buildings_by_type: Dict[Team, Dict[BuildingType, Dict[int, Building]]] = {team: {building_type: {} for building_type in BuildingType} for team in Team}
+
+        #rankings of each team's units by a key in RANKING_KEYS, created the first time they are queried and kept up to date after
+        self.unit_rankings: Dict[Team, Dict[str, UnitRanking]] = {Team.BLUE: {}, Team.RED: {}}
+
+        #flat indices (x * height + y) of the tiles where buildings can currently be placed, in increasing order, for each
+        #set of placeable tiles, created the first time they are queried and kept up to date after
+        self.building_candidates: Dict[int, List[int]] = {}
+
+        #log of every change to the game state, read by the robot controllers
+        self.events = EventLog()
+
+        #get main castle to buildings; add players' main castle given by map into buildings
+        red_main_castle = Building(Team.RED, BuildingType.MAIN_CASTLE, self.map.red_castle_loc[0], self.map.red_castle_loc[1], spawnable= True, clock= self.clock)
+        blue_main_castle = Building(Team.BLUE, BuildingType.MAIN_CASTLE, self.map.blue_castle_loc[0], self.map.blue_castle_loc[1], spawnable= True, clock= self.clock)
+        #this is to know when we deleted the building (ie when the game ends)
 
         self.main_castle_ids: Dict[Team, int] = {Team.RED: red_main_castle.id, Team.BLUE: blue_main_castle.id}
 
@@ -60,16 +89,14 @@ class GameState:
         self.blue_main_castle_id = self.main_castle_ids[Team.BLUE]
 
         #add to buildings
-        self.buildings[Team.BLUE][blue_main_castle.id] = blue_main_castle
-        self.buildings[Team.RED][red_main_castle.id] = red_main_castle
+        self.add_building(blue_main_castle)
+        self.add_building(red_main_castle)
 
 
         self.time_remaining = {Team.BLUE: GameConstants.INITIAL_TIME_POOL, Team.RED: GameConstants.INITIAL_TIME_POOL}
 
         self.renderer = Renderer(self.map)
 
-        self.FARMS = [BuildingType.FARM_1, BuildingType.FARM_2, BuildingType.FARM_3]
-
         self.previousBuildingsRed = None
         
         self.previousBuildingsBlue = None 
@@ -78,6 +105,15 @@ class GameState:
         self.changed_maps = [] # changed map on that turn, list of 2D maps
 
     
+    @property
+    def turn(self) -> int:
+        return self.clock.turn
+
+    @turn.setter
+    def turn(self, turn: int):
+        self.clock.turn = turn
+
+
     '''
     -----------------------
     Simple helper functions
@@ -144,6 +180,101 @@ class GameState:
         return self.buildings[team][building_id]
 
 
+    def get_unit_id_at(self, x: int, y: int) -> Optional[int]:
+        '''
+        Gets the id of the unit on tile (x, y) from the occupancy index
+        Returns None if the tile is empty or out of bounds
+        '''
+        if not self.map.in_bounds(x, y):
+            return None
+
+        return self.unit_id_map[x][y]
+
+
+    def get_building_id_at(self, x: int, y: int) -> Optional[int]:
+        '''
+        Gets the id of the building on tile (x, y) from the occupancy index
+        Returns None if the tile is empty or out of bounds
+        '''
+        if not self.map.in_bounds(x, y):
+            return None
+
+        return self.building_id_map[x][y]
+
+
+    '''
+    -------------------------------------------------------------
+    Spatial Queries
+
+    NOTE: distances are chebyshev (chessboard) distances, so the
+    objects within a radius of a tile are those in a square around it
+    -------------------------------------------------------------
+    '''
+
+    def units_in_square(self, x: int, y: int, radius: int, team: Optional[Team] = None) -> List[Unit]:
+        '''
+        Gets the units within chebyshev distance radius of (x, y), of one team or of both if team is None
+        Units are ordered by id, which is the order they appear in self.units
+        '''
+        return self.objects_in_square(self.unit_id_map, self.units, x, y, radius, team)
+
+
+    def buildings_in_square(self, x: int, y: int, radius: int, team: Optional[Team] = None) -> List[Building]:
+        '''
+        Gets the buildings within chebyshev distance radius of (x, y), of one team or of both if team is None
+        Buildings are ordered by id, which is the order they appear in self.buildings
+        '''
+        return self.objects_in_square(self.building_id_map, self.buildings, x, y, radius, team)
+
+
+    def best_units_in_square(self, team: Team, ranking_name: str, x: int, y: int, radius: int, k: int) -> List[Unit]:
+        '''
+        Gets up to k of a team's units within chebyshev distance radius of (x, y) that rank best by
+        RANKING_KEYS[ranking_name] (smallest key first, ties broken by id)
+
+        Small squares are ranked directly from the occupancy index; larger ones are answered from the team's
+        per-region heaps for that ranking, which are built on first use
+        '''
+        min_x, max_x, min_y, max_y = clip_square(x, y, radius, self.map.width, self.map.height)
+        key = RANKING_KEYS[ranking_name]
+
+        if (max_x - min_x) * (max_y - min_y) <= UnitRanking.REGION_SIZE ** 2:
+            return heapq.nsmallest(k, self.units_in_square(x, y, radius, team), key= lambda unit: (key(unit), unit.id))
+
+        if ranking_name not in self.unit_rankings[team]:
+            ranking = UnitRanking(key)
+            for unit in self.units[team].values():
+                ranking.update(unit)
+            self.unit_rankings[team][ranking_name] = ranking
+
+        units = self.units[team]
+        return [units[unit_id] for unit_id in self.unit_rankings[team][ranking_name].best_in_bounds(min_x, max_x, min_y, max_y, k)]
+
+
+    def objects_in_square(self, id_map: List[List[Optional[int]]], objects: Dict[Team, Dict[int, object]], x: int, y: int, radius: int, team: Optional[Team]) -> list:
+        '''
+        Shared implementation of units_in_square and buildings_in_square
+
+        Reads the occupancy index over the square when it covers fewer tiles than there are objects to check,
+        and otherwise checks every object of the team(s) against the square's bounds
+        '''
+        min_x, max_x, min_y, max_y = clip_square(x, y, radius, self.map.width, self.map.height)
+
+        team_objects = [objects[Team.BLUE], objects[Team.RED]] if team is None else [objects[team]]
+
+        if (max_x - min_x) * (max_y - min_y) <= sum(map(len, team_objects)):
+            ids = [object_id for column in id_map[min_x:max_x] for object_id in column[min_y:max_y] if object_id is not None]
+            if len(ids) > 1:
+                ids.sort()
+            #ids are unique across teams, so each id is in at most one of the dicts
+            return [objs[object_id] for object_id in ids for objs in team_objects if object_id in objs]
+
+        in_square = [obj for objs in team_objects for obj in objs.values() if min_x <= obj.x < max_x and min_y <= obj.y < max_y]
+        if team is None:
+            in_square.sort(key= lambda obj: obj.id)
+        return in_square
+
+
     '''
     --------------------------------------
     Unit and Building Placeable Map access
@@ -161,12 +292,29 @@ class GameState:
         if not self.building_placeable_map[x][y]:
             return False
         
-        if self.map.tiles[x][y] not in building_type.placeable_tiles:
+        if not self.map.placeable_masks[building_type][x * self.map.height + y]:
             return False
 
         return True
     
 
+    def get_building_candidates(self, building_type: BuildingType) -> List[int]:
+        '''
+        Flat indices (x * height + y) of every tile where building_type can currently be placed, in increasing order
+        This is the list the game state keeps up to date, so it must not be modified, and it changes as buildings are placed
+
+        The candidates are shared by every building type with the same placeable tiles; they are found from the
+        placeable mask and building placeable map the first time they are asked for, and after that only
+        change when a building is added or removed or a tile changes
+        '''
+        bits = self.map.get_tile_bits(building_type.placeable_tiles)
+
+        if bits not in self.building_candidates:
+            self.building_candidates[bits] = [x * self.map.height + y for x, y in self.map.get_mask_locations(self.map.masks[bits]) if self.building_placeable_map[x][y]]
+
+        return self.building_candidates[bits]
+
+
     def is_unit_placeable(self, unit_type: UnitType, x: int, y: int) -> bool:
         '''At most one unit per tile'''
         if not self.map.in_bounds(x, y):
@@ -175,12 +323,127 @@ class GameState:
         if not self.unit_placeable_map[x][y]:
             return False
         
-        if self.map.tiles[x][y] not in unit_type.walkable_tiles:
+        if not self.map.walkable_masks[unit_type][x * self.map.height + y]:
             return False
 
         return True
+
+
+    def is_tile_walkable(self, unit: Unit, x: int, y: int) -> bool:
+        '''
+        Checks if a unit can stand on tile (x, y) given the terrain, ignoring other units
+        Precondition that (x, y) is in bounds
+        '''
+        #units whose walkable tiles were overridden cannot use their type's mask
+        if unit.walkable_tiles is not unit.type.walkable_tiles:
+            return self.map.tiles[x][y] in unit.walkable_tiles
+
+        return self.map.walkable_masks[unit.type][x * self.map.height + y] == 1
     
 
+    '''
+    -------------------------------------------------------------
+    Object Bookkeeping Functions
+
+    NOTE: every unit and building enters and leaves the game through
+    these, so they keep the placeable maps, occupancy index and
+    running totals and type index up to date
+    -------------------------------------------------------------
+    '''
+
+    def add_unit(self, unit: Unit):
+        '''
+        Adds a unit to the game procedurally
+        Precondition that its tile is free for a unit
+        '''
+        self.units[unit.team][unit.id] = unit
+
+        self.unit_placeable_map[unit.x][unit.y] = False
+        self.unit_id_map[unit.x][unit.y] = unit.id
+
+        self.asset_value[unit.team] += unit.type.cost
+        self.units_by_type[unit.team][unit.type][unit.id] = unit
+
+        self.update_unit_rankings(unit)
+
+        self.emit_event(EventType.SPAWNED, unit.team, unit.id, unit.type, unit.x, unit.y, unit.health)
+
+
+    def add_building(self, building: Building):
+        '''
+        Adds a building to the game procedurally
+        Precondition that its tile is free for a building
+        '''
+        self.buildings[building.team][building.id] = building
+
+        self.building_placeable_map[building.x][building.y] = False
+        self.building_id_map[building.x][building.y] = building.id
+        self.update_building_candidates(building.x, building.y)
+
+        if building.type in self.FARMS:
+            self.income[building.team] += building.type.coins_per_turn
+
+        self.asset_value[building.team] += building.type.cost
+        self.buildings_by_type[building.team][building.type][building.id] = building
+
+        self.emit_event(EventType.BUILT, building.team, building.id, building.type, building.x, building.y, building.health)
+
+
+    def set_unit_health(self, unit: Unit, health: int):
+        '''
+        Sets a unit's health; every change to a unit's health goes through here so the unit rankings and event log stay up to date
+        Does not delete the unit if it was killed
+        '''
+        if health != unit.health:
+            self.emit_event(EventType.DAMAGED if health < unit.health else EventType.HEALED, unit.team, unit.id, unit.type, unit.x, unit.y, health)
+
+        unit.health = health
+        self.update_unit_rankings(unit)
+
+
+    def set_building_health(self, building: Building, health: int):
+        '''
+        Sets a building's health; every change to a building's health goes through here so the event log stays up to date
+        Does not delete the building if it was destroyed
+        '''
+        if health != building.health:
+            self.emit_event(EventType.DAMAGED if health < building.health else EventType.HEALED, building.team, building.id, building.type, building.x, building.y, health)
+
+        building.health = health
+
+
+    def set_balance(self, team: Team, balance: int):
+        '''Sets a team's balance; every change to a balance goes through here so the event log stays up to date'''
+        if balance != self.balance[team]:
+            self.emit_event(EventType.BALANCE_CHANGED, team, None, None, value= balance)
+
+        self.balance[team] = balance
+
+
+    def emit_event(self, event_type: EventType, team: Optional[Team], object_id: Optional[int], object_type, x: int = -1, y: int = -1, value: int = 0):
+        '''Adds an event for the current turn to the event log'''
+        self.events.emit(GameEvent(self.turn, event_type, team, object_id, object_type, x, y, value))
+
+
+    def update_building_candidates(self, x: int, y: int):
+        '''Refreshes whether (x, y) is a candidate in every set of building placement candidates that has been created'''
+        i = x * self.map.height + y
+        for bits, candidates in self.building_candidates.items():
+            j = bisect_left(candidates, i)
+            present = j < len(candidates) and candidates[j] == i
+            if self.building_placeable_map[x][y] and self.map.masks[bits][i]:
+                if not present:
+                    candidates.insert(j, i)
+            elif present:
+                del candidates[j]
+
+
+    def update_unit_rankings(self, unit: Unit):
+        '''Refreshes a unit in every ranking of its team that has been created'''
+        for ranking in self.unit_rankings[unit.team].values():
+            ranking.update(unit)
+
+
     '''
     -------------------------
     Object Creation Functions
@@ -194,10 +457,9 @@ class GameState:
             print('unit failed to place')
             return False
         
-        new_unit = Unit(team, unit_type, x, y, level)
+        new_unit = Unit(team, unit_type, x, y, level, clock= self.clock)
 
-        self.units[team][new_unit.id] = new_unit
-        self.unit_placeable_map[x][y] = False
+        self.add_unit(new_unit)
         return True
 
 
@@ -225,13 +487,34 @@ class GameState:
             print('building failed to place')
             return False
         
-        new_building = Building(team, building_type, x, y, level)
+        new_building = Building(team, building_type, x, y, level, clock= self.clock)
 
-        self.buildings[team][new_building.id] = new_building
-        self.building_placeable_map[x][y] = False
+        self.add_building(new_building)
         return True
 
 
+    '''
+    ------------------
+    Terrain Functions
+    ------------------
+    '''
+
+    def set_tile(self, x: int, y: int, tile: Tile):
+        '''
+        Changes the tile at (x, y), keeping the map's masks up to date and recording the change for the replay
+        Precondition that (x, y) is in bounds
+        '''
+        self.map.set_tile(x, y, tile)
+        self.update_building_candidates(x, y)
+        self.renderer.invalidate_tile(x, y)
+
+        self.emit_event(EventType.TILE_CHANGED, None, None, tile, x, y)
+
+        # Record the map change
+        self.changed_maps.append(self.map.to_2d_list())
+        self.changed_turns.append(self.turn)
+
+
     '''
     -------------------------
     Object Movement functions
@@ -258,14 +541,28 @@ class GameState:
 
         unit = self.units[team][unit_id]
 
+        #staying in place (Direction.STAY) changes nothing, so it is not reported as a move
+        if (unit.x, unit.y) == (dest_x, dest_y):
+            return True
+
         #change placeable map configurations
         self.unit_placeable_map[unit.x][unit.y] = True #can now place unit in old location
         self.unit_placeable_map[dest_x][dest_y] = False #can't place unit in new location
 
+        #change occupancy index
+        self.unit_id_map[unit.x][unit.y] = None
+        self.unit_id_map[dest_x][dest_y] = unit_id
+
         #change unit state
         unit.x = dest_x
         unit.y = dest_y
 
+        self.update_unit_rankings(unit)
+
+        self.emit_event(EventType.MOVED, team, unit_id, unit.type, dest_x, dest_y)
+
+        return True
+
 
     '''
     ----------------------------------------------------------
@@ -279,8 +576,19 @@ class GameState:
         Removes unit from game procedurally
         Precondition of safety for team/unit_id
         '''
+        unit = self.units[team][unit_id]
         #can place another unit at that location
-        self.unit_placeable_map[self.units[team][unit_id].x][self.units[team][unit_id].y] = True
+        self.unit_placeable_map[unit.x][unit.y] = True
+        self.unit_id_map[unit.x][unit.y] = None
+
+        self.asset_value[team] -= unit.type.cost
+        del self.units_by_type[team][unit.type][unit_id]
+
+        for ranking in self.unit_rankings[team].values():
+            ranking.remove(unit_id)
+
+        self.emit_event(EventType.DIED, team, unit_id, unit.type, unit.x, unit.y)
+
         #delete from units list
         del self.units[team][unit_id]
 
@@ -289,8 +597,20 @@ class GameState:
         Removes building from game procedurally
         Precondition of safety for team/building_id
         '''
+        building = self.buildings[team][building_id]
         #can place another building at that location
-        self.building_placeable_map[self.buildings[team][building_id].x][self.buildings[team][building_id].y] = True #can now place
+        self.building_placeable_map[building.x][building.y] = True #can now place
+        self.building_id_map[building.x][building.y] = None
+        self.update_building_candidates(building.x, building.y)
+
+        if building.type in self.FARMS:
+            self.income[team] -= building.type.coins_per_turn
+
+        self.asset_value[team] -= building.type.cost
+        del self.buildings_by_type[team][building.type][building_id]
+
+        self.emit_event(EventType.DESTROYED, team, building_id, building.type, building.x, building.y)
+
         #delete from buildings list
         del self.buildings[team][building_id]
         
@@ -311,12 +631,15 @@ class GameState:
         if team is None:
             return False
 
-        self.units[team][unit_id].health -= dmg
+        self.set_unit_health(self.units[team][unit_id], self.units[team][unit_id].health - dmg)
 
         #if unit is destroyed
         if self.units[team][unit_id].health <= 0:
             #remove unit from game
             self.delete_unit(team, unit_id)
+            return True
+
+        return False
 
 
     def damage_building(self, building_id: int, dmg: int) -> bool:
@@ -333,7 +656,7 @@ class GameState:
         if team is None: #no action is taken
             return False
 
-        self.buildings[team][building_id].health -= dmg
+        self.set_building_health(self.buildings[team][building_id], self.buildings[team][building_id].health - dmg)
 
         #if building is destroyed
         if self.buildings[team][building_id].health <= 0:
@@ -344,6 +667,62 @@ class GameState:
         return False
             
 
+    def damage_units(self, units: List[Unit], dmg: int) -> List[Unit]:
+        '''
+        Damages every unit in a list by the same non-negative damage, then deletes the killed ones
+        Returns the units that survived, in their original order
+        '''
+        if dmg < 0:
+            raise GameException('damage must be non-negative')
+
+        survivors = []
+        for unit in units:
+            self.set_unit_health(unit, unit.health - dmg)
+            if unit.health > 0:
+                survivors.append(unit)
+            else:
+                self.delete_unit(unit.team, unit.id)
+
+        return survivors
+
+
+    def damage_buildings(self, buildings: List[Building], dmg: int) -> List[Building]:
+        '''
+        Damages every building in a list by the same non-negative damage, then deletes the defeated ones
+        Returns the buildings that survived, in their original order
+        '''
+        if dmg < 0:
+            raise GameException('damage must be non-negative')
+
+        survivors = []
+        for building in buildings:
+            self.set_building_health(building, building.health - dmg)
+            if building.health > 0:
+                survivors.append(building)
+            else:
+                self.delete_building(building.team, building.id)
+
+        return survivors
+
+
+    def resolve_area_attack(self, target_team: Team, x: int, y: int, radius: int, dmg: int, hit_buildings: bool = True) -> int:
+        '''
+        Resolves an area attack of dmg on target_team's objects within chebyshev distance radius of (x, y)
+
+        Every object hit takes the damage at once and the killed ones are removed, so the result does not depend
+        on the order objects are hit in. Survivors are the ones able to retaliate.
+        Returns the total retaliation damage, the sum of the surviving objects' defense
+        '''
+        surviving_units = self.damage_units(self.units_in_square(x, y, radius, target_team), dmg)
+        retaliation = sum(unit.defense for unit in surviving_units)
+
+        if hit_buildings:
+            surviving_buildings = self.damage_buildings(self.buildings_in_square(x, y, radius, target_team), dmg)
+            retaliation += sum(building.defense for building in surviving_buildings)
+
+        return retaliation
+
+
     def sell_unit(self, team: Team, unit_id: int) -> bool:
         '''Sells a unit for a discounted price; unit must be at least a certain level of health'''
 
@@ -359,7 +738,7 @@ class GameState:
             return False
 
         #add to balance
-        self.balance[team] += unit.type.cost * GameConstants.UNIT_SELL_DISCOUNT
+        self.set_balance(team, self.balance[team] + unit.type.cost * GameConstants.UNIT_SELL_DISCOUNT)
 
         #remove from units list
         self.delete_unit(team, unit_id)
@@ -382,7 +761,7 @@ class GameState:
             return False
 
         #add to balance
-        self.balance[team] += building.type.cost * GameConstants.UNIT_SELL_DISCOUNT
+        self.set_balance(team, self.balance[team] + building.type.cost * GameConstants.UNIT_SELL_DISCOUNT)
 
         #remove from units list
         self.delete_building(team, building_id)
@@ -390,6 +769,120 @@ class GameState:
         return True
 
 
+    '''
+    -----------------------------------------------------------
+    Attack Functions
+
+    NOTE: these resolve attacks that are already known to be valid;
+    the robot controller checks validity for players' attacks
+    -----------------------------------------------------------
+    '''
+
+    def unit_attack(self, attacking_unit: Unit, x: int, y: int):
+        '''
+        Resolves an attack by a unit on location (x, y), hitting the enemy units and buildings within its damage range
+        The unit takes the surviving opponents' total defense in retaliation
+        '''
+        attacking_unit.turn_actions_remaining -= 1
+
+        retaliation = self.resolve_area_attack(self.get_opposite_team(attacking_unit.team), x, y, attacking_unit.damage_range, attacking_unit.damage)
+
+        if retaliation > 0:
+            self.damage_unit(attacking_unit.id, retaliation)
+
+
+    def building_attack(self, attacking_building: Building, x: int, y: int):
+        '''
+        Resolves an attack by a building on location (x, y), hitting only the enemy units within its damage range
+        Buildings take no retaliation
+        '''
+        attacking_building.turn_actions_remaining -= 1
+
+        self.resolve_area_attack(self.get_opposite_team(attacking_building.team), x, y, attacking_building.damage_range, attacking_building.damage, hit_buildings= False)
+
+
+    def choose_target(self, attacker, policy: TargetPolicy, hit_buildings: bool) -> Optional[Tuple[int, int]]:
+        '''
+        Chooses the location of the enemy to attack among those within the attacker's attack range, by policy
+        Only enemy units are considered unless hit_buildings; ties are broken by id
+        Returns None if no enemy is in range
+        '''
+        enemy_team = self.get_opposite_team(attacker.team)
+        x, y, attack_range = attacker.x, attacker.y, attacker.attack_range
+
+        if policy == TargetPolicy.NEAREST:
+            #search ring by ring outwards, stopping at the first ring with an enemy in it
+            enemy_units, enemy_buildings = self.units[enemy_team], self.buildings[enemy_team]
+            for ring in range(attack_range + 1):
+                in_ring = []
+                for dx, dy in get_ring_offsets(ring):
+                    target_x, target_y = x + dx, y + dy
+                    if not (0 <= target_x < self.map.width and 0 <= target_y < self.map.height):
+                        continue
+
+                    unit_id = self.unit_id_map[target_x][target_y]
+                    if unit_id is not None and unit_id in enemy_units:
+                        in_ring.append(enemy_units[unit_id])
+
+                    building_id = self.building_id_map[target_x][target_y]
+                    if hit_buildings and building_id is not None and building_id in enemy_buildings:
+                        in_ring.append(enemy_buildings[building_id])
+
+                if in_ring:
+                    target = min(in_ring, key= lambda target: (target.health, target.id))
+                    return target.x, target.y
+
+            return None
+
+        targets = self.units_in_square(x, y, attack_range, enemy_team)
+        if hit_buildings:
+            targets += self.buildings_in_square(x, y, attack_range, enemy_team)
+
+        if not targets:
+            return None
+
+        if policy == TargetPolicy.LOWEST_HEALTH:
+            key = lambda target: (target.health, max(abs(target.x - x), abs(target.y - y)), target.id)
+        else:
+            key = lambda target: (-target.type.cost, target.health, target.id)
+
+        target = min(targets, key= key)
+        return target.x, target.y
+
+
+    def auto_attack(self, team: Team, policy: TargetPolicy, units: bool = True, buildings: bool = True) -> int:
+        '''
+        Every unit and/or building of a team with an action left and damage to deal attacks
+        the enemy in its attack range chosen by policy, in order of id
+
+        Returns the number of attacks made
+        '''
+        num_attacks = 0
+
+        if units:
+            #copy, since attackers can be killed by retaliation
+            for attacking_unit in list(self.units[team].values()):
+                if attacking_unit.damage <= 0 or attacking_unit.turn_actions_remaining <= 0 or attacking_unit.id not in self.units[team]:
+                    continue
+
+                target = self.choose_target(attacking_unit, policy, hit_buildings= True)
+                if target is not None:
+                    self.unit_attack(attacking_unit, *target)
+                    num_attacks += 1
+
+        if buildings:
+            for attacking_building in list(self.buildings[team].values()):
+                if attacking_building.damage <= 0 or attacking_building.turn_actions_remaining <= 0:
+                    continue
+
+                target = self.choose_target(attacking_building, policy, hit_buildings= False)
+                if target is not None:
+                    self.building_attack(attacking_building, *target)
+                    num_attacks += 1
+
+        return num_attacks
+
+
     '''
     --------------
     Turn Mechanics
@@ -401,29 +894,12 @@ class GameState:
         Procedurally start the next turn by resetting unit/building turn values among other mechanics
         '''
 
+        # advancing the clock resets all units' and buildings' actions and movement remaining this turn
         self.turn += 1
 
-        # reset all units' actions and movement remaining this turn
-        for team_units in self.units.values():
-            for curr_unit in team_units.values():
-                curr_unit.turn_actions_remaining = curr_unit.type.actions_per_turn
-                curr_unit.turn_movement_remaining = curr_unit.type.move_range
-
-        #reset all buildings' actions remaining this turn
-        for team_buildings in self.buildings.values():
-            for curr_building in team_buildings.values():
-                curr_building.turn_actions_remaining = curr_building.type.actions_per_turn
-
-
-        # add passive income to balance
-        self.balance[Team.RED] += GameConstants.PASSIVE_COINS_PER_TURN
-        self.balance[Team.BLUE] += GameConstants.PASSIVE_COINS_PER_TURN
-
-        # add farm's income to balance
-        for team in [Team.RED, Team.BLUE]:
-            for building in self.buildings[team].values():
-                if building.type in self.FARMS:
-                    self.balance[team] += building.type.coins_per_turn
+        # add passive income and farms' income to balance
+        self.set_balance(Team.RED, self.balance[Team.RED] + GameConstants.PASSIVE_COINS_PER_TURN + self.income[Team.RED])
+        self.set_balance(Team.BLUE, self.balance[Team.BLUE] + GameConstants.PASSIVE_COINS_PER_TURN + self.income[Team.BLUE])
 
 
 
@@ -464,15 +940,10 @@ class GameState:
             self.renderer.unit_render(unit)
 
         #render game_state (turn, balance, etc.)
-        BLACK = (0, 0, 0)
-        turn_text = font.SysFont('Comic Sans MS', 10).render(f'Turn: {self.turn}', True, BLACK)
-        blue_balance_text = font.SysFont('Comic Sans MS', 10).render(f'Blue balance: {self.balance[Team.BLUE]}', True, BLACK)
-        red_balance_text = font.SysFont('Comic Sans MS', 10).render(f'Red balance: {self.balance[Team.RED]}', True, BLACK)
-        self.renderer.screen.blit(turn_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 5), (20, 10)))
-        self.renderer.screen.blit(blue_balance_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 20), (20, 10)))
-        self.renderer.screen.blit(red_balance_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 35), (20, 10)))
-
-        pygame.display.update()
+        self.renderer.status_render([f'Turn: {self.turn}', f'Blue balance: {self.balance[Team.BLUE]}', f'Red balance: {self.balance[Team.RED]}'])
+
+        #draw only what changed since the last frame
+        self.renderer.update_display()
 
     def save_previous_state(self, blueBuildings, redBuildings):
         '''Saves the previous state of buildings to prevent export of empty list into json'''
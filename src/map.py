@@ -2,8 +2,9 @@
 
 from src.exceptions import GameException
 
-from src.game_constants import Tile, TileColors, Team
-from typing import List, Tuple
+from src.game_constants import Tile, TileColors, Team, UnitType, BuildingType
+from src.terrain_components import TerrainComponents
+from typing import Dict, Iterable, List, Optional, Tuple
 
 class Map:
     '''
@@ -33,14 +34,23 @@ class Map:
                    x == width -->
 
 
+    Alongside self.tiles, the terrain is kept as a compact grid of tile ids, self.tile_ids[x * height + y].
+    For each set of tiles that a unit type can walk on or a building type can be placed on, a legality mask
+    over the same grid is precomputed (1 where legal, 0 where not) and kept up to date by set_tile,
+    as are the connected components of each set of walkable tiles.
     '''
 
-    def __init__(self, width=50, height=50, tiles: List[List[Tile]]=None, blue_castle_loc: Tuple[int, int]= (-1, -1), red_castle_loc: Tuple[int, int]= (-1, -1)):
+    def __init__(self, width=50, height=50, tiles: List[List[Tile]]=None, blue_castle_loc: Tuple[int, int]= (-1, -1), red_castle_loc: Tuple[int, int]= (-1, -1), tile_ids: Optional[bytearray]= None, masks: Optional[Dict[int, bytearray]]= None, components: Optional[Dict[int, TerrainComponents]]= None):
         self.width = width
         self.height = height
         
         # hardcoded map for now
         self.tiles = tiles
+        if self.tiles is None and tile_ids is not None:
+            tiles_by_id = [Tile.ERROR] * 256
+            for tile in Tile:
+                tiles_by_id[tile.tile_id] = tile
+            self.tiles = [list(map(tiles_by_id.__getitem__, tile_ids[x * height:(x + 1) * height])) for x in range(width)]
         if self.tiles is None:
             self.tiles = [[Tile.GRASS for y in range(self.height)] for x in range(self.width)]
 
@@ -49,6 +59,25 @@ class Map:
         if not self.in_bounds(*blue_castle_loc) or not self.in_bounds(*red_castle_loc):
             raise GameException('Given main castle locations invalid')
 
+        #compact terrain grid, indexed by x * height + y
+        self.tile_ids = tile_ids
+        if self.tile_ids is None:
+            self.tile_ids = bytearray(tile.tile_id for column in self.tiles for tile in column)
+
+        #legality masks, shared between all types with the same set of legal tiles (precomputed ones may be given, e.g. from a cache)
+        self.masks: Dict[int, bytearray] = {} if masks is None else masks
+        self.walkable_masks: Dict[UnitType, bytearray] = {unit_type: self.get_mask(unit_type.walkable_tiles) for unit_type in UnitType}
+        self.placeable_masks: Dict[BuildingType, bytearray] = {building_type: self.get_mask(building_type.placeable_tiles) for building_type in BuildingType}
+
+        #connected components of the terrain for every distinct set of walkable tiles, kept up to date by set_tile
+        self.components: Dict[int, TerrainComponents] = {} if components is None else components
+        self.walkable_components: Dict[UnitType, TerrainComponents] = {}
+        for unit_type in UnitType:
+            bits = self.get_tile_bits(unit_type.walkable_tiles)
+            if bits not in self.components:
+                self.components[bits] = TerrainComponents(self.width, self.height, self.masks[bits])
+            self.walkable_components[unit_type] = self.components[bits]
+
     def in_bounds(self, x: int, y: int) -> bool:
         '''
         checks if self.tiles[x][y] is in bounds,
@@ -65,6 +94,87 @@ class Map:
         
         return self.tiles[x][y] == tile_type
 
+    def is_walkable(self, unit_type: UnitType, x: int, y: int) -> bool:
+        '''checks if a unit of unit_type can stand on location (x, y) given the terrain'''
+
+        if not self.in_bounds(x, y):
+            return False
+
+        return self.walkable_masks[unit_type][x * self.height + y] == 1
+
+    def is_placeable(self, building_type: BuildingType, x: int, y: int) -> bool:
+        '''checks if a building of building_type can be placed on location (x, y) given the terrain'''
+
+        if not self.in_bounds(x, y):
+            return False
+
+        return self.placeable_masks[building_type][x * self.height + y] == 1
+
+    def is_reachable(self, unit_type: UnitType, x1: int, y1: int, x2: int, y2: int) -> bool:
+        '''
+        checks if a unit of unit_type could walk from (x1, y1) to (x2, y2) given the terrain alone
+        (other units and movement costs are not considered)
+        '''
+
+        if not self.in_bounds(x1, y1) or not self.in_bounds(x2, y2):
+            return False
+
+        return self.walkable_components[unit_type].is_connected(x1, y1, x2, y2)
+
+    def set_tile(self, x: int, y: int, tile: Tile):
+        '''changes the tile at location (x, y), keeping the tile id grid, legality masks and components up to date'''
+
+        self.tiles[x][y] = tile
+
+        i = x * self.height + y
+        old_tile_id = self.tile_ids[i]
+        self.tile_ids[i] = tile.tile_id
+
+        for bits, mask in self.masks.items():
+            mask[i] = (bits >> tile.tile_id) & 1
+
+        for bits, components in self.components.items():
+            was_walkable = (bits >> old_tile_id) & 1
+            is_walkable = (bits >> tile.tile_id) & 1
+
+            if is_walkable and not was_walkable:
+                components.add_tile(x, y)
+            elif was_walkable and not is_walkable:
+                components.relabel()
+
+    @staticmethod
+    def get_tile_bits(tiles: Iterable[Tile]) -> int:
+        '''bit set of tile ids, used to identify a set of legal tiles'''
+
+        bits = 0
+        for tile in tiles:
+            bits |= 1 << tile.tile_id
+        return bits
+
+    def get_mask(self, tiles: Iterable[Tile]) -> bytearray:
+        '''
+        gets the legality mask of a set of tiles: mask[x * height + y] is 1 if self.tiles[x][y] is in tiles, 0 otherwise
+        masks are computed once per distinct set of tiles and shared
+        '''
+
+        bits = self.get_tile_bits(tiles)
+
+        if bits not in self.masks:
+            table = bytes((bits >> tile_id) & 1 for tile_id in range(256))
+            self.masks[bits] = bytearray(self.tile_ids.translate(table))
+
+        return self.masks[bits]
+
+    def get_mask_locations(self, mask: bytearray) -> List[Tuple[int, int]]:
+        '''gets all locations (x, y) where a mask is set'''
+
+        res = []
+        i = mask.find(1)
+        while i != -1:
+            res.append(divmod(i, self.height))
+            i = mask.find(1, i + 1)
+        return res
+
     def get_tile_color(self, x, y) -> Tuple[int, int, int]:
         '''Accesses the dict defined in Tile_Colors, and gets the tile colors'''
 
@@ -92,4 +202,12 @@ class Map:
         """
         Converts the map into a 2D list of tile names.
         """
-        return [[tile.name if hasattr(tile, 'name') else str(tile) for tile in row] for row in self.tiles]
\ No newline at end of file
+        return [[tile.name if hasattr(tile, 'name') else str(tile) for tile in row] for row in self.tiles]
+    @staticmethod
+    def from_dict(map_data: Dict) -> 'Map':
+        '''
+        Builds a map from its dictionary representation (as in replay files), e.g. to draw a game outside of the process running it
+        Main castle locations are not part of the representation, so they are set to (0, 0)
+        '''
+        tiles = [[Tile[name] for name in column] for column in map_data["tiles"]]
+        return Map(map_data["width"], map_data["height"], tiles, blue_castle_loc= (0, 0), red_castle_loc= (0, 0))
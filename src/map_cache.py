@@ -0,0 +1,197 @@
+''' on-disk cache of processed maps and their precomputed tables, keyed by the hash of the map file '''
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Dict, Optional, Tuple
+
+from src.map import Map
+from src.map_processor import array_to_map
+from src.terrain_components import TerrainComponents
+
+
+class MapCache:
+    '''
+    Caches processed maps in a directory so that games played on the same map skip parsing and precomputation
+
+    Each entry is one file named after the SHA-256 of the map file's contents. It holds a fixed header followed by
+    raw sections (the tile id grid, every legality mask, and the component labels and union-find parents of every
+    set of walkable tiles), each starting at an 8-byte aligned offset. Entries are memory-mapped and every section
+    is copied once, straight from the mapping into its bytearray or array, without decoding; the copy is needed
+    because the masks and components are updated in place as tiles change during a game:
+
+        header:  magic, width, height, blue castle (x, y), red castle (x, y), number of sections
+        section: name (e.g. b'tiles', b'mask:44', b'labels:44', b'parents:44'), length, then length bytes of data
+
+    Label and parent arrays are stored in the machine's native byte order, so a cache directory should not be
+    shared between machines of different architectures.
+
+    The cache is capped at max_bytes; when a new entry pushes it over the cap, the least recently used entries are removed.
+    '''
+
+    MAGIC = b'AWAP25C2'
+    HEADER = struct.Struct('<8sIIiiiiI')
+    SECTION = struct.Struct('<32sQ')
+    EXTENSION = '.awap25c'
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def get_path(self, data: bytes) -> str:
+        '''Path of the cache entry for a map file with the given contents'''
+        return os.path.join(self.directory, hashlib.sha256(data).hexdigest() + self.EXTENSION)
+
+
+    def load_map(self, file_name: str) -> Map:
+        '''Loads a map file through the cache, processing and caching it on a miss'''
+
+        with open(file_name, 'rb') as f:
+            data = f.read()
+
+        path = self.get_path(data)
+
+        cached = self.read(path)
+        if cached is not None:
+            #mark as recently used for eviction
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return cached
+
+        new_map = array_to_map(json.loads(data))
+        self.write(path, new_map)
+        self.evict(keep= path)
+        return new_map
+
+
+    def read(self, path: str) -> Optional[Map]:
+        '''Reads a cache entry, returning None if it is missing or unreadable'''
+
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access= mmap.ACCESS_READ) as buffer, memoryview(buffer) as view:
+                magic, width, height, blue_x, blue_y, red_x, red_y, num_sections = self.HEADER.unpack_from(buffer, 0)
+                if magic != self.MAGIC:
+                    return None
+
+                #section name -> (offset, length) in the file
+                sections: Dict[str, Tuple[int, int]] = {}
+                offset = self.align(self.HEADER.size)
+                for _ in range(num_sections):
+                    name, length = self.SECTION.unpack_from(buffer, offset)
+                    offset += self.SECTION.size
+                    if offset + length > len(buffer):
+                        return None
+                    sections[name.rstrip(b'\0').decode()] = (offset, length)
+                    offset = self.align(offset + length)
+
+                #slicing the memoryview rather than the mmap avoids an intermediate bytes copy of each section
+                def read_bytes(name: str) -> bytearray:
+                    offset, length = sections[name]
+                    return bytearray(view[offset:offset + length])
+
+                def read_ints(name: str) -> array:
+                    offset, length = sections[name]
+                    ints = array('i')
+                    ints.frombytes(view[offset:offset + length])
+                    return ints
+
+                if 'tiles' not in sections or sections['tiles'][1] != width * height:
+                    return None
+                tile_ids = read_bytes('tiles')
+
+                masks = {int(name[len('mask:'):]): read_bytes(name) for name, (_, length) in sections.items() if name.startswith('mask:') and length == len(tile_ids)}
+
+                components = {}
+                for bits, mask in masks.items():
+                    if f'labels:{bits}' not in sections or f'parents:{bits}' not in sections:
+                        continue
+
+                    labels, parents = read_ints(f'labels:{bits}'), read_ints(f'parents:{bits}')
+                    if len(labels) == len(tile_ids):
+                        components[bits] = TerrainComponents(width, height, mask, labels, parents)
+
+        except (OSError, ValueError, BufferError, struct.error):
+            return None
+
+        return Map(width, height, blue_castle_loc= (blue_x, blue_y), red_castle_loc= (red_x, red_y), tile_ids= tile_ids, masks= masks, components= components)
+
+
+    def write(self, path: str, cached_map: Map):
+        '''Writes a cache entry atomically, so concurrent readers never see a partial file'''
+
+        sections = [('tiles', cached_map.tile_ids)]
+        sections += [(f'mask:{bits}', mask) for bits, mask in cached_map.masks.items()]
+        for bits, components in cached_map.components.items():
+            sections.append((f'labels:{bits}', components.labels.tobytes()))
+            sections.append((f'parents:{bits}', components.parents.tobytes()))
+
+        header = self.HEADER.pack(self.MAGIC, cached_map.width, cached_map.height, *cached_map.blue_castle_loc, *cached_map.red_castle_loc, len(sections))
+        chunks = [header, self.padding(len(header))]
+        offset = self.align(len(header))
+        for name, data in sections:
+            chunks.append(self.SECTION.pack(name.encode(), len(data)))
+            chunks.append(data)
+            offset += self.SECTION.size + len(data)
+            chunks.append(self.padding(offset))
+            offset = self.align(offset)
+
+        #the cache is only an optimization, so failing to write it is not an error
+        try:
+            fd, temp_path = tempfile.mkstemp(dir= self.directory, suffix= '.tmp')
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(chunks)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+    def evict(self, keep: Optional[str] = None):
+        '''Removes the least recently used entries until the cache is within max_bytes'''
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+    @staticmethod
+    def align(offset: int) -> int:
+        return (offset + 7) & ~7
+
+    @staticmethod
+    def padding(offset: int) -> bytes:
+        return bytes(MapCache.align(offset) - offset)
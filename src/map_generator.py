@@ -0,0 +1,292 @@
+''' generates random maps of any size, and games populated with many units and buildings, for scaling tests '''
+
+import json
+import random
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+from src.exceptions import GameException
+from src.game_constants import Team, Tile, UnitType, BuildingType
+from src.game_state import GameState
+from src.map import Map
+from src.map_processor import array_to_map, BLUE_CASTLE, RED_CASTLE
+
+
+#castle placements: CORNERS puts the castles near opposite corners, RANDOM puts the blue castle anywhere
+#(and the red one at its mirror image on symmetric maps, anywhere otherwise)
+CORNERS = 'corners'
+RANDOM = 'random'
+CASTLE_PLACEMENTS = (CORNERS, RANDOM)
+
+#tiles land units can walk on
+LAND = (Tile.GRASS.name, Tile.SAND.name, Tile.BRIDGE.name)
+
+
+def get_neighbors(x: int, y: int, width: int, height: int) -> List[Tuple[int, int]]:
+    '''The up to 4 tiles sharing an edge with (x, y)'''
+    return [(nx, ny) for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)) if 0 <= nx < width and 0 <= ny < height]
+
+
+def grow_region(tiles: List[List[str]], rng: random.Random, tile: str, count: int, frontier: List[Tuple[int, int]], limit: int) -> int:
+    '''
+    Turns up to count grass tiles (x, y) with x * height + y < limit into tile, growing outwards from the frontier in random order,
+    so regions come out as irregular blobs
+    Returns the number of tiles changed
+    '''
+
+    width, height = len(tiles), len(tiles[0])
+    changed = 0
+
+    while frontier and changed < count:
+        #take a random frontier tile (swapping it to the end to pop it cheaply)
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        x, y = frontier.pop()
+
+        if tiles[x][y] != Tile.GRASS.name or x * height + y >= limit:
+            continue
+
+        tiles[x][y] = tile
+        changed += 1
+        frontier.extend(get_neighbors(x, y, width, height))
+
+    return changed
+
+
+def add_ridge(tiles: List[List[str]], rng: random.Random, count: int, limit: int) -> int:
+    '''
+    Draws a mountain ridge of up to count tiles as a random walk that mostly keeps its heading,
+    changing only grass tiles (x, y) with x * height + y < limit
+    Returns the number of tiles changed
+    '''
+
+    width, height = len(tiles), len(tiles[0])
+    headings = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+
+    x, y = divmod(rng.randrange(limit), height)
+    heading = rng.randrange(len(headings))
+    length = rng.randint(max(width, height) // 4 + 1, max(width, height))
+
+    changed = 0
+    for _ in range(length):
+        if changed >= count or not (0 <= x < width and 0 <= y < height):
+            break
+
+        if tiles[x][y] == Tile.GRASS.name and x * height + y < limit:
+            tiles[x][y] = Tile.MOUNTAIN.name
+            changed += 1
+
+        #turn 45 degrees now and then
+        if rng.random() < 0.2:
+            heading = (heading + rng.choice((-1, 1))) % len(headings)
+        x, y = x + headings[heading][0], y + headings[heading][1]
+
+    return changed
+
+
+def is_land_connected(tiles: List[List[str]], start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    '''If a land unit can walk from start to end'''
+
+    width, height = len(tiles), len(tiles[0])
+    seen = {start}
+    queue = deque([start])
+
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == end:
+            return True
+
+        for neighbor in get_neighbors(x, y, width, height):
+            if neighbor not in seen and tiles[neighbor[0]][neighbor[1]] in LAND:
+                seen.add(neighbor)
+                queue.append(neighbor)
+
+    return False
+
+
+def generate_tiles(width: int, height: int, water: float = 0.15, mountains: float = 0.05, sand: float = 0.1, castles: str = CORNERS, symmetric: bool = True, seed: int = 0) -> List[List[str]]:
+    '''
+    Generates the tiles of a map as written to map files, arr[x][y] being the name of the tile at (x, y)
+
+    water, mountains and sand are the approximate fractions of the map covered by each. Water forms lakes of random sizes,
+    mountains form ridges and sand spreads along shores (or forms patches if there is no water); the rest is grass.
+    Symmetric maps look the same to both teams: the terrain is mirrored through the center of the map, and so are the castles.
+
+    Each castle is surrounded by grass, and a land route between the castles is guaranteed, bridging water and
+    cutting through mountains where needed.
+    '''
+
+    if width < 2 or height < 2:
+        raise GameException('Maps need to be at least 2x2')
+    if min(water, mountains, sand) < 0 or water + mountains + sand > 0.9:
+        raise GameException('Terrain fractions must be non-negative and leave at least 10% of the map as grass')
+    if castles not in CASTLE_PLACEMENTS:
+        raise GameException(f'Unknown castle placement {castles}, expected one of {CASTLE_PLACEMENTS}')
+
+    rng = random.Random(seed)
+    area = width * height
+    tiles = [[Tile.GRASS.name] * height for _ in range(width)]
+
+    #symmetric maps get terrain on the first half of their tiles (in x * height + y order), which is then mirrored
+    limit = (area + 1) // 2 if symmetric else area
+
+    #lakes of up to a tenth of the water each
+    remaining = round(water * limit)
+    while remaining > 0:
+        size = rng.randint(1, max(1, round(water * limit / 10)))
+        remaining -= grow_region(tiles, rng, Tile.WATER.name, min(size, remaining), [divmod(rng.randrange(limit), height)], limit) or 1
+
+    remaining = round(mountains * limit)
+    while remaining > 0:
+        remaining -= add_ridge(tiles, rng, remaining, limit) or 1
+
+    #sand spreads from every shore at once, or from a few random spots on maps without water
+    shores = [neighbor for x in range(width) for y in range(height) if tiles[x][y] == Tile.WATER.name for neighbor in get_neighbors(x, y, width, height)]
+    if not shores:
+        shores = [divmod(rng.randrange(limit), height) for _ in range(max(1, limit // 200))]
+    grow_region(tiles, rng, Tile.SAND.name, round(sand * limit), shores, limit)
+
+    def mirror(x: int, y: int) -> Tuple[int, int]:
+        return width - 1 - x, height - 1 - y
+
+    #copy the first half of the map onto the second, rotated 180 degrees
+    if symmetric:
+        for x in range(width):
+            for y in range(height):
+                if x * height + y >= limit:
+                    tiles[x][y] = tiles[mirror(x, y)[0]][mirror(x, y)[1]]
+
+    if castles == CORNERS:
+        margin = min(width, height) // 10
+        blue = (margin, margin)
+        red = mirror(*blue)
+    else:
+        blue = (rng.randrange(width), rng.randrange(height))
+        red = mirror(*blue) if symmetric else (rng.randrange(width), rng.randrange(height))
+        while red == blue:
+            blue = (rng.randrange(width), rng.randrange(height))
+            red = mirror(*blue) if symmetric else (rng.randrange(width), rng.randrange(height))
+
+    def set_land(x: int, y: int):
+        '''Makes a tile (and its mirror image on symmetric maps) walkable for land units, keeping sand and bridges'''
+        for tx, ty in ([(x, y), mirror(x, y)] if symmetric else [(x, y)]):
+            if tiles[tx][ty] == Tile.WATER.name:
+                tiles[tx][ty] = Tile.BRIDGE.name
+            elif tiles[tx][ty] not in LAND:
+                tiles[tx][ty] = Tile.GRASS.name
+
+    #castles stand in a patch of grass
+    for cx, cy in (blue, red):
+        for x in range(max(0, cx - 1), min(width, cx + 2)):
+            for y in range(max(0, cy - 1), min(height, cy + 2)):
+                tiles[x][y] = Tile.GRASS.name
+
+    if not is_land_connected(tiles, blue, red):
+        x, y = blue
+        while (x, y) != red:
+            x += (red[0] > x) - (red[0] < x)
+            y += (red[1] > y) - (red[1] < y)
+            set_land(x, y)
+
+    tiles[blue[0]][blue[1]] = BLUE_CASTLE
+    tiles[red[0]][red[1]] = RED_CASTLE
+    return tiles
+
+
+def generate_map(width: int, height: int, water: float = 0.15, mountains: float = 0.05, sand: float = 0.1, castles: str = CORNERS, symmetric: bool = True, seed: int = 0) -> Map:
+    '''Generates a map (see generate_tiles)'''
+    return array_to_map(generate_tiles(width, height, water, mountains, sand, castles, symmetric, seed))
+
+
+def write_map(file_name: str, tiles: List[List[str]]):
+    '''Writes tiles to a map file that process_map can load'''
+
+    with open(file_name, 'w') as f:
+        json.dump(tiles, f, separators= (',', ':'))
+
+
+def populate(game_state: GameState, units_per_team: int, buildings_per_team: int, seed: int = 0,
+             unit_types: Optional[Sequence[UnitType]] = None, building_types: Optional[Sequence[BuildingType]] = None):
+    '''
+    Places up to units_per_team units and buildings_per_team buildings of random types for each team,
+    each team on the tiles closer to its own main castle (fewer if a team runs out of legal tiles for them)
+
+    Types are drawn from unit_types and building_types, all unit types and every building but the main castle by default.
+    Units are kept off the main castles so the castles can still spawn units.
+    '''
+
+    rng = random.Random(seed)
+    game_map = game_state.map
+    unit_types = list(UnitType) if unit_types is None else list(unit_types)
+    building_types = [building_type for building_type in BuildingType if building_type != BuildingType.MAIN_CASTLE] if building_types is None else list(building_types)
+
+    castles = {team: game_state.buildings[team][game_state.main_castle_ids[team]] for team in Team}
+    castle_locs = {(castle.x, castle.y) for castle in castles.values()}
+
+    def get_side(x: int, y: int) -> Team:
+        distances = {team: (x - castle.x) ** 2 + (y - castle.y) ** 2 for team, castle in castles.items()}
+        return Team.BLUE if distances[Team.BLUE] <= distances[Team.RED] else Team.RED
+
+    def shuffled_sides(mask: bytearray, cache: dict):
+        '''Legal locations of a mask, split by side and shuffled; types with the same mask share them'''
+        if id(mask) in cache:
+            return cache[id(mask)]
+
+        sides = cache[id(mask)] = {team: [] for team in Team}
+        for x, y in game_map.get_mask_locations(mask):
+            if (x, y) not in castle_locs:
+                sides[get_side(x, y)].append((x, y))
+        for locations in sides.values():
+            rng.shuffle(locations)
+        return sides
+
+    #candidate locations of each type, taken from the end as objects are placed
+    building_cache, unit_cache = {}, {}
+    building_locations = {building_type: shuffled_sides(game_map.placeable_masks[building_type], building_cache) for building_type in building_types}
+    unit_locations = {unit_type: shuffled_sides(game_map.walkable_masks[unit_type], unit_cache) for unit_type in unit_types}
+
+    for team in Team:
+        placed = 0
+        types = list(building_types)
+        while placed < buildings_per_team and types:
+            building_type = rng.choice(types)
+            locations = building_locations[building_type][team]
+            while locations and not game_state.is_building_placeable(building_type, *locations[-1]):
+                locations.pop()
+
+            if not locations:
+                types.remove(building_type)
+                continue
+
+            game_state.place_building(team, building_type, *locations.pop())
+            placed += 1
+
+        placed = 0
+        types = list(unit_types)
+        while placed < units_per_team and types:
+            unit_type = rng.choice(types)
+            locations = unit_locations[unit_type][team]
+            while locations and not game_state.is_unit_placeable(unit_type, *locations[-1]):
+                locations.pop()
+
+            if not locations:
+                types.remove(unit_type)
+                continue
+
+            game_state.place_unit(team, unit_type, *locations.pop())
+            placed += 1
+
+
+def make_scenario(game_map: Map, units_per_team: int, buildings_per_team: int, seed: int = 0,
+                  unit_types: Optional[Sequence[UnitType]] = None, building_types: Optional[Sequence[BuildingType]] = None) -> GameState:
+    '''
+    Game on a map with units and buildings already placed for both teams (see populate),
+    started so that every unit can act
+    '''
+
+    game_state = GameState(game_map)
+    populate(game_state, units_per_team, buildings_per_team, seed, unit_types, building_types)
+
+    #units cannot act on the turn they are placed
+    game_state.start_turn()
+    return game_state
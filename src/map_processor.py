@@ -1,55 +1,67 @@
 ''' helper geometry functions to help with maps '''
 
 from src.map import Map
-from typing import Optional
-import ast
+from typing import Dict, List, Optional
+import json
+from collections import defaultdict
+from src.exceptions import GameException
 from src.game_constants import Tile
 
+# tile id of every tile name that can appear in a map file; anything else decodes to Tile.ERROR
+TILE_IDS: Dict[str, int] = {tile.name: tile.tile_id for tile in Tile if tile != Tile.ERROR}
+
+BLUE_CASTLE = 'BLUE CASTLE'
+RED_CASTLE = 'RED CASTLE'
+
+# main castles stand on grass
+TILE_IDS[BLUE_CASTLE] = Tile.GRASS.tile_id
+TILE_IDS[RED_CASTLE] = Tile.GRASS.tile_id
+
+
 def process_map(file_name: str) -> Optional[Map]:
+    '''
+    Loads a map file, a JSON 2D list of tile names where arr[x][y] is the tile at (x, y)
+    '''
 
     with open(file_name, 'r') as f:
-        arrAsStr = f.readline()
+        arr = json.load(f)
 
-    arr = ast.literal_eval(arrAsStr)
+    return array_to_map(arr)
 
-    height = len(arr)
-    width = len(arr[0])
 
-    blue_castle_loc = (-1, -1)
-    red_castle_loc = (-1, -1)
+def array_to_map(arr: List[List[str]]) -> Map:
+    '''
+    Builds a map from a 2D list of tile names where arr[x][y] is the tile at (x, y)
 
-    for i in range(height): 
-        for j in range(width):
-            if arr[i][j] == 'BLUE CASTLE':
-                blue_castle_loc = (i, j)
-                arr[i][j] = 'GRASS'
+    Tile names are decoded through a lookup table straight into the map's compact tile id grid
+    '''
 
-            if arr[i][j] == 'RED CASTLE':
-                red_castle_loc = (i, j)
-                arr[i][j] = 'GRASS'
+    width = len(arr)
+    height = len(arr[0])
 
-    tiles = list(map(lambda row : list(map(lambda x: string_to_tile(x), row)), arr))
+    blue_castle_loc = (-1, -1)
+    red_castle_loc = (-1, -1)
 
-    return Map(width, height, tiles, blue_castle_loc, red_castle_loc)
+    tile_ids = bytearray()
+    lookup = defaultdict(lambda: Tile.ERROR.tile_id, TILE_IDS).__getitem__
 
-    
+    for x, column in enumerate(arr):
+        if len(column) != height:
+            raise GameException(f'Map column {x} has {len(column)} tiles, expected {height}')
 
+        if BLUE_CASTLE in column:
+            blue_castle_loc = (x, column.index(BLUE_CASTLE))
 
-def string_to_tile(tile_str : str) -> Tile:
+        if RED_CASTLE in column:
+            red_castle_loc = (x, column.index(RED_CASTLE))
 
-    if tile_str == "GRASS":
-        return Tile.GRASS
+        tile_ids.extend(map(lookup, column))
 
-    if tile_str == "MOUNTAIN":
-        return Tile.MOUNTAIN
+    return Map(width, height, blue_castle_loc= blue_castle_loc, red_castle_loc= red_castle_loc, tile_ids= tile_ids)
 
-    if tile_str == "SAND":
-        return Tile.SAND
 
-    if tile_str == "WATER":
-        return Tile.WATER
 
-    if tile_str == "BRIDGE":
-        return Tile.BRIDGE
 
-    return Tile.ERROR
\ No newline at end of file
+def string_to_tile(tile_str : str) -> Tile:
+
+    return Tile.__members__.get(tile_str, Tile.ERROR)
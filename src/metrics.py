@@ -0,0 +1,192 @@
+''' hooks that receive the time spent in each phase of a game's turns, and the robot controller calls each bot makes '''
+
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from src.game_constants import Team
+from src.robot_controller import RobotController
+
+
+#phases of a turn timed by Game.run_turn; each bot's turn is split into running its play_turn and the
+#overhead of the thread it runs in (creating, starting and joining it)
+START_TURN = 'start_turn'
+BLUE_BOT = 'blue_bot'
+BLUE_THREAD = 'blue_thread_overhead'
+RED_BOT = 'red_bot'
+RED_THREAD = 'red_thread_overhead'
+TO_DICT = 'to_dict'
+RECORD_TURN = 'record_turn'
+PHASES = (START_TURN, BLUE_BOT, BLUE_THREAD, RED_BOT, RED_THREAD, TO_DICT, RECORD_TURN)
+
+BOT_PHASES = {Team.BLUE: (BLUE_BOT, BLUE_THREAD), Team.RED: (RED_BOT, RED_THREAD)}
+
+#public methods of the robot controller, the API bots call
+API_METHODS = [name for name, value in vars(RobotController).items() if callable(value) and not name.startswith('_')]
+
+
+class TurnMetrics:
+    '''
+    Hook given to a Game to receive measurements of every turn; this base class ignores them
+
+    Game calls start_turn at the start of each turn, then record_phase for every phase of the turn it times
+    (see PHASES) and record_calls once per bot with the number of calls it made to each robot controller method
+    that turn. end_game is called once the game is over and its replay exported.
+    '''
+
+    def start_turn(self, turn: int):
+        pass
+
+    def record_phase(self, phase: str, seconds: float):
+        pass
+
+    def record_calls(self, team: Team, counts: Dict[str, int]):
+        pass
+
+    def end_game(self, winner: Optional[Team]):
+        pass
+
+
+class PhaseTimer:
+    '''Context that times a phase of a turn and reports it to a metrics hook'''
+
+    __slots__ = ('metrics', 'phase', 'start')
+
+    def __init__(self, metrics: TurnMetrics, phase: str):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.metrics.record_phase(self.phase, time.perf_counter() - self.start)
+
+
+#what a game without a metrics hook times its phases with
+NO_TIMER = nullcontext()
+
+
+class CountingController:
+    '''
+    Stands in for a RobotController, passing every call on to it and counting the calls made to each of its
+    public methods since counts was last cleared (calls the controller makes to its own methods are not counted)
+    '''
+
+    def __init__(self, controller: RobotController):
+        self.counts: Dict[str, int] = {}
+        for name in API_METHODS:
+            setattr(self, name, self.counted(name, getattr(controller, name)))
+
+    def counted(self, name: str, method):
+        counts = self.counts
+
+        def call(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return method(*args, **kwargs)
+
+        return call
+
+
+def get_metrics_path(replay_path: str) -> str:
+    '''Path of the metrics file written next to a replay'''
+    return os.path.splitext(replay_path)[0] + '.metrics.jsonl'
+
+
+class MetricsFile(TurnMetrics):
+    '''
+    Writes the measurements of every turn to a file as they come in, one JSON object per line:
+
+        {"turn": 3, "phases": {"start_turn": seconds, ...}, "calls": {"BLUE": {"get_units": 2, ...}, "RED": {...}}}
+
+    At the end of the game it appends a line {"summary": ...} with the totals over all turns, and prints them as a table.
+    The file is only created once there is something to write, and end_game always writes the summary and closes it.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None #opened when the first line is written
+
+        self.turn: Optional[Dict] = None
+        self.turns = 0
+        self.phase_totals = {phase: 0.0 for phase in PHASES}
+        self.phase_max = {phase: 0.0 for phase in PHASES}
+        self.call_totals: Dict[str, Dict[str, int]] = {team.name: {} for team in Team}
+
+    def start_turn(self, turn: int):
+        self.write_turn()
+        self.turn = {"turn": turn, "phases": {}, "calls": {}}
+
+    def record_phase(self, phase: str, seconds: float):
+        phases = self.turn["phases"]
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def record_calls(self, team: Team, counts: Dict[str, int]):
+        self.turn["calls"][team.name] = dict(counts)
+
+    def write_line(self, line: str):
+        if self.file is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'w')
+
+        self.file.write(line + '\n')
+
+    def write_turn(self):
+        '''Writes the current turn to the file and adds it to the totals'''
+
+        if self.turn is None:
+            return
+
+        self.write_line(json.dumps(self.turn, separators= (',', ':')))
+
+        self.turns += 1
+        for phase, seconds in self.turn["phases"].items():
+            self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + seconds
+            self.phase_max[phase] = max(self.phase_max.get(phase, 0.0), seconds)
+        for team, counts in self.turn["calls"].items():
+            totals = self.call_totals[team]
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+
+        self.turn = None
+
+    def get_summary(self, winner: Optional[Team]) -> Dict:
+        '''Totals of every phase and controller method over the turns written so far'''
+
+        return {
+            "turns": self.turns,
+            "winner": winner.name if winner is not None else None,
+            "phases": {
+                phase: {"total_seconds": total, "mean_seconds": total / max(self.turns, 1), "max_seconds": self.phase_max[phase]}
+                for phase, total in self.phase_totals.items()
+            },
+            "calls": {team: dict(sorted(totals.items(), key= lambda item: -item[1])) for team, totals in self.call_totals.items()},
+        }
+
+    def end_game(self, winner: Optional[Team]):
+        self.write_turn()
+
+        summary = self.get_summary(winner)
+        self.write_line(json.dumps({"summary": summary}))
+        self.file.close()
+
+        print_summary(summary)
+        print(f"Turn metrics written to {self.path}")
+
+
+def print_summary(summary: Dict, top: int = 5):
+    '''Prints the summary of a metrics file as a table of phases, and each bot's most called controller methods'''
+
+    turns = max(summary["turns"], 1)
+    total = sum(phase["total_seconds"] for phase in summary["phases"].values()) or 1.0
+
+    print(f"{'phase':>20} {'total s':>9} {'ms/turn':>9} {'max ms':>9} {'share':>7}")
+    for phase, times in summary["phases"].items():
+        print(f"{phase:>20} {times['total_seconds']:>9.3f} {times['mean_seconds'] * 1e3:>9.3f} {times['max_seconds'] * 1e3:>9.3f} {times['total_seconds'] / total:>7.1%}")
+
+    for team, counts in summary["calls"].items():
+        calls = [f"{name} {count}" for name, count in list(counts.items())[:top]]
+        print(f"{team} made {sum(counts.values())} controller calls ({sum(counts.values()) / turns:.1f}/turn): {', '.join(calls) or 'none'}")
@@ -6,12 +6,27 @@ import pygame
 import pygame.font as font
 
 from src.map import Map
-from src.game_constants import Team, MapRender, BuildingRender, UnitRender
+from src.game_constants import Team, Tile, UnitType, BuildingType, MapRender, BuildingRender, UnitRender
 from src.buildings import Building
 from src.units import Unit
 
+from typing import Dict, List, Optional, Set, Tuple
+
 class Renderer:
-    '''Contains helper functions that draws in pygame what is required'''
+    '''
+    Contains helper functions that draws in pygame what is required
+
+    The font is loaded once, and the text of each unit/building type is rendered once per team color
+    and reused, so drawing an object is a single blit
+
+    The terrain and grid are drawn once into a background surface, and only redrawn for tiles invalidated by
+    map changes. A frame is collected first (map_render, then building_render/unit_render for every object,
+    then status_render) and drawn by update_display, which only repaints the tiles whose terrain or objects
+    changed since the last frame and updates just those parts of the window
+
+    Frames can also be drawn from game state dicts (GameState.to_dict, as stored in replays) with set_terrain and
+    snapshot_render, so a game can be drawn by a process that only receives its states
+    '''
 
     def __init__(self, map: Map):
 
@@ -20,6 +35,24 @@ class Renderer:
         self.width = map.width
         self.height = map.height
 
+        #pre-rendered text surfaces, keyed by (text, color)
+        self.glyphs: Dict[Tuple[str, Tuple[int, int, int]], pygame.Surface] = {}
+
+        #terrain and grid of the whole window, None until the first frame
+        self.background: Optional[pygame.Surface] = None
+        #tiles whose terrain changed since the background was last updated
+        self.dirty_terrain: Set[Tuple[int, int]] = set()
+
+        #glyphs to draw on each tile, for the frame being collected and the last frame drawn
+        self.frame: Dict[Tuple[int, int], List[pygame.Surface]] = {}
+        self.drawn: Optional[Dict[Tuple[int, int], List[pygame.Surface]]] = None
+
+        self.status: List[str] = []
+        self.progress: Optional[float] = None #position shown on the timeline below the status, None for no timeline
+
+        #headless renderers draw into an offscreen surface instead of a window
+        self.headless = False
+
 
     def get_screen_coords(self, x: int, y: int) -> tuple[tuple[int, int], tuple[int, int]]:
         '''
@@ -31,64 +64,203 @@ class Renderer:
         return ((left, top), (MapRender.TILE_SIZE, MapRender.TILE_SIZE))
 
 
-    def init_render(self):
-        '''Initializes the pygame window'''
-        pygame.init()
-        pygame.display.set_caption("Game State Visualizer")
-        self.screen = pygame.display.set_mode((self.width * MapRender.TILE_SIZE, self.height * MapRender.TILE_SIZE + 50)) #+50 for the text at the bottom
+    def get_window_size(self) -> Tuple[int, int]:
+        return (self.width * MapRender.TILE_SIZE, self.height * MapRender.TILE_SIZE + 50) #+50 for the text at the bottom
 
-    def map_render(self):
-        '''Renders the map background'''
+
+    def init_render(self, headless: bool = False):
+        '''Initializes the pygame window, or with headless an offscreen surface of the same size (e.g. to save frames as images)'''
+
+        self.headless = headless
+        size = self.get_window_size()
+
+        if headless:
+            font.init()
+            self.screen = pygame.Surface(size)
+        else:
+            pygame.init()
+            pygame.display.set_caption("Game State Visualizer")
+            self.screen = pygame.display.set_mode(size)
+
+        #looking up a system font is slow, so it is only done once
+        self.font = font.SysFont('Comic Sans MS', 10)
+
+        #a new window needs everything drawn
+        self.background = None
+        self.drawn = None
+
+
+    def get_glyph(self, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        '''Gets the rendered surface of a short piece of text in a color, rendering it the first time it is needed'''
+
+        glyph = self.glyphs.get((text, color))
+        if glyph is None:
+            glyph = self.font.render(text, True, color)
+            self.glyphs[(text, color)] = glyph
+
+        return glyph
+
+
+    def invalidate_tile(self, x: int, y: int):
+        '''Marks the terrain of a tile as changed, so it is redrawn in the next frame'''
+        self.dirty_terrain.add((x, y))
+
+
+    def terrain_render(self):
+        '''Draws the whole map background (tiles and grid) into the background surface'''
+
+        self.background = pygame.Surface(self.screen.get_size())
 
         #all of the background is white
-        self.screen.fill((255, 255, 255))
+        self.background.fill((255, 255, 255))
 
         #draw tiles and map
         for x in range(self.width):
             for y in range(self.height):
 
                 color = self.map.get_tile_color(x, y)
-                pygame.draw.rect(self.screen, color, self.get_screen_coords(x, y))
+                pygame.draw.rect(self.background, color, self.get_screen_coords(x, y))
 
         #draw vertical lines for grid
         for x in range(self.map.width+1):
             bottom = (x*MapRender.TILE_SIZE, 0)
             top = (x*MapRender.TILE_SIZE, self.height*MapRender.TILE_SIZE)
 
-            pygame.draw.line(self.screen, MapRender.BORDER_COLOR, bottom, top)
+            pygame.draw.line(self.background, MapRender.BORDER_COLOR, bottom, top)
 
         #draw horizontal lines for grid
         for y in range(self.map.height+1):
             left = (0, y*MapRender.TILE_SIZE)
             right = (self.width*MapRender.TILE_SIZE, y*MapRender.TILE_SIZE)
-            pygame.draw.line(self.screen, MapRender.BORDER_COLOR, left, right)
+            pygame.draw.line(self.background, MapRender.BORDER_COLOR, left, right)
 
+        self.dirty_terrain.clear()
 
-    def building_render(self, building: Building):
-        '''Renders a building on the screen'''
 
-        render_text = BuildingRender.text[building.type]
-        render_color = BuildingRender.BUILDING_COLOR[building.team]
+    def tile_terrain_render(self, x: int, y: int):
+        '''Redraws one tile of the background, with the grid lines along its left and top edges that its fill covers'''
+
+        (left, top), area = self.get_screen_coords(x, y)
+        pygame.draw.rect(self.background, self.map.get_tile_color(x, y), ((left, top), area))
+
+        pygame.draw.line(self.background, MapRender.BORDER_COLOR, (left, top), (left, top + MapRender.TILE_SIZE - 1))
+        pygame.draw.line(self.background, MapRender.BORDER_COLOR, (left, top), (left + MapRender.TILE_SIZE - 1, top))
+
+
+    def map_render(self):
+        '''Starts collecting a frame, bringing the map background up to date'''
+
+        if self.background is None:
+            self.terrain_render()
+
+        for x, y in self.dirty_terrain:
+            self.tile_terrain_render(x, y)
+
+        self.frame = {}
 
-        text = font.SysFont('Comic Sans MS', 10).render(render_text, True, render_color)
 
-        (x1, y1), area = self.get_screen_coords(building.x, building.y)
+    def building_render(self, building: Building):
+        '''Renders a building on the screen'''
 
-        self.screen.blit(text, ((x1 + MapRender.TILE_SIZE//4, y1 + MapRender.TILE_SIZE//4), area))
+        text = self.get_glyph(BuildingRender.text[building.type], BuildingRender.BUILDING_COLOR[building.team])
+        self.frame.setdefault((building.x, building.y), []).append(text)
 
 
     def unit_render(self, unit: Unit):
         '''Renders a unit on the screen'''
 
-        render_text = UnitRender.text[unit.type]
-        render_color = UnitRender.UNIT_COLOR[unit.team]
+        text = self.get_glyph(UnitRender.text[unit.type], UnitRender.UNIT_COLOR[unit.team])
+        self.frame.setdefault((unit.x, unit.y), []).append(text)
+
+
+    def set_terrain(self, tiles: List[List[str]]):
+        '''Brings the map up to date with a grid of tile names (as in replay files), invalidating the tiles that changed'''
+
+        for x, column in enumerate(tiles):
+            for y, name in enumerate(column):
+                if self.map.tiles[x][y].name != name:
+                    self.map.set_tile(x, y, Tile[name])
+                    self.invalidate_tile(x, y)
+
 
-        text = font.SysFont('Comic Sans MS', 10).render(render_text, True, render_color)
+    def snapshot_render(self, snapshot: Dict, lines: Optional[List[str]] = None, progress: Optional[float] = None):
+        '''Collects and draws a whole frame from a game state dict, with the turn and balances as status unless other lines are given'''
 
-        (x1, y1), area = self.get_screen_coords(unit.x, unit.y)
+        self.map_render()
 
-        self.screen.blit(text, ((x1 + MapRender.TILE_SIZE//4, y1 + MapRender.TILE_SIZE//4), area))
-        
+        #same drawing order as GameState.render: red then blue buildings, then red then blue units
+        for team in (Team.RED, Team.BLUE):
+            for building in snapshot["buildings"][team.name]:
+                text = self.get_glyph(BuildingRender.text[BuildingType[building["type"]]], BuildingRender.BUILDING_COLOR[team])
+                self.frame.setdefault((building["x"], building["y"]), []).append(text)
 
-    
+        for team in (Team.RED, Team.BLUE):
+            for unit in snapshot["units"][team.name]:
+                text = self.get_glyph(UnitRender.text[UnitType[unit["type"]]], UnitRender.UNIT_COLOR[team])
+                self.frame.setdefault((unit["x"], unit["y"]), []).append(text)
 
+        if lines is None:
+            balance = snapshot["balance"]
+            lines = [f'Turn: {snapshot["turn"]}', f'Blue balance: {balance[Team.BLUE.name]}', f'Red balance: {balance[Team.RED.name]}']
+        self.status_render(lines, progress)
+
+        self.update_display()
+
+
+    def status_render(self, lines: List[str], progress: Optional[float] = None):
+        '''
+        Renders lines of text (turn, balances, etc.) in the space below the map
+        With a progress between 0 and 1, a timeline filled up to it is drawn under two lines of text
+        '''
+        self.status = lines
+        self.progress = progress
+
+
+    def get_timeline_rect(self) -> pygame.Rect:
+        '''Area of the timeline below the status text'''
+        return pygame.Rect(5, self.height * MapRender.TILE_SIZE + 38, self.width * MapRender.TILE_SIZE - 10, 8)
+
+
+    def update_display(self):
+        '''Draws the collected frame, repainting and updating only the parts of the window that changed'''
+
+        if self.drawn is None:
+            #the first frame shows the whole background, then every object on it
+            self.screen.blit(self.background, (0, 0))
+            changed = set(self.frame)
+        else:
+            changed = {tile for tile in self.frame.keys() | self.drawn.keys() if self.frame.get(tile) != self.drawn.get(tile)}
+        changed |= self.dirty_terrain
+        self.dirty_terrain = set()
+
+        rects = []
+        for x, y in changed:
+            (left, top), area = self.get_screen_coords(x, y)
+            rect = pygame.Rect((left, top), area)
+
+            self.screen.blit(self.background, rect, rect)
+            for glyph in self.frame.get((x, y), ()):
+                #glyphs are clipped to their tile, so repainting a tile never leaves parts of a glyph on its neighbors
+                self.screen.blit(glyph, (left + MapRender.TILE_SIZE//4, top + MapRender.TILE_SIZE//4), (0, 0, area[0] - MapRender.TILE_SIZE//4, area[1] - MapRender.TILE_SIZE//4))
+
+            rects.append(rect)
+
+        #the text at the bottom is redrawn every frame
+        status_rect = pygame.Rect(0, self.height * MapRender.TILE_SIZE + 1, self.width * MapRender.TILE_SIZE, 49)
+        self.screen.blit(self.background, status_rect, status_rect)
+        for i, line in enumerate(self.status):
+            self.screen.blit(self.font.render(line, True, (0, 0, 0)), (5, self.height * MapRender.TILE_SIZE + 5 + 15 * i))
+        if self.progress is not None:
+            timeline = self.get_timeline_rect()
+            pygame.draw.rect(self.screen, (200, 200, 200), timeline)
+            pygame.draw.rect(self.screen, (90, 90, 90), (timeline.left, timeline.top, round(timeline.width * self.progress), timeline.height))
+        rects.append(status_rect)
+
+        if self.headless:
+            pass
+        elif self.drawn is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+        self.drawn = self.frame
@@ -0,0 +1,165 @@
+''' offscreen rendering of replay turns to images, split across a pool of processes '''
+
+import multiprocessing
+import os
+import struct
+import zlib
+from typing import BinaryIO, List, Optional, Sequence
+
+#src.renderer is imported before pygame, as it hides pygame's import message
+from src.renderer import Renderer
+from src.map import Map
+from src.replay_reader import ReplayReader
+
+import pygame
+
+
+class FrameRenderer:
+    '''
+    Draws the turns of a replay into an offscreen surface
+
+    Each worker process keeps one, so the replay is read and the font loaded once per process. Turns given in
+    order reuse the renderer's cached background, and the terrain is only brought up to date when it changed.
+    '''
+
+    def __init__(self, replay_path: str):
+        self.reader = ReplayReader(replay_path)
+
+        self.renderer = Renderer(Map.from_dict(self.reader.map))
+        self.renderer.init_render(headless= True)
+        self.tiles = self.reader.map["tiles"] #tiles the renderer's map was last brought up to date with
+
+
+    def render(self, i: int) -> pygame.Surface:
+        '''Draws turn i of the replay, returning the surface it is drawn on'''
+
+        tiles = self.reader.get_tiles(i)
+        if tiles is not self.tiles:
+            self.renderer.set_terrain(tiles)
+            self.tiles = tiles
+
+        self.renderer.snapshot_render(self.reader.get_state(i))
+        return self.renderer.screen
+
+
+#frame renderer of a worker process, set up by init_worker
+worker: Optional[FrameRenderer] = None
+
+
+def init_worker(replay_path: str):
+    global worker
+    worker = FrameRenderer(replay_path)
+
+
+def save_png_frames(turns: Sequence[int], output_dir: str) -> int:
+    '''Renders turns into output_dir as turn_<i>.png files, returning how many were written'''
+
+    for i in turns:
+        pygame.image.save(worker.render(i), os.path.join(output_dir, f'turn_{i:05d}.png'))
+
+    return len(turns)
+
+
+def compress_frames(turns: Sequence[int]) -> List[bytes]:
+    '''Renders turns, returning each as zlib-compressed PNG image data (RGB rows, each with filter type 0)'''
+
+    frames = []
+    for i in turns:
+        surface = worker.render(i)
+        pixels = pygame.image.tobytes(surface, 'RGB')
+        stride = 3 * surface.get_width()
+
+        rows = b''.join(b'\x00' + pixels[y:y + stride] for y in range(0, len(pixels), stride))
+        frames.append(zlib.compress(rows))
+
+    return frames
+
+
+class ApngWriter:
+    '''
+    Writes an animated PNG one frame at a time, so frames never have to be held in memory together
+
+    Every frame covers the whole image; players that do not support animation show the first frame
+    '''
+
+    def __init__(self, file: BinaryIO, width: int, height: int, num_frames: int, fps: float):
+        self.file = file
+        self.width = width
+        self.height = height
+        self.sequence = 0 #sequence number of the next animation chunk
+        self.num_frames = 0
+
+        #frame delays are stored as a fraction of a second, with 16 bit numerator and denominator
+        self.delay = (100, min(65535, max(1, round(100 * fps))))
+
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        self.write_chunk(b'acTL', struct.pack('>II', num_frames, 0)) #0: loop forever
+
+
+    def write_chunk(self, chunk_type: bytes, data: bytes):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+
+    def add_frame(self, compressed: bytes):
+        '''Adds a frame given as compressed image data (see compress_frames)'''
+
+        self.write_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, self.width, self.height, 0, 0, *self.delay, 0, 0))
+        self.sequence += 1
+
+        #the first frame is the default image, later ones are animation-only data
+        if self.num_frames == 0:
+            self.write_chunk(b'IDAT', compressed)
+        else:
+            self.write_chunk(b'fdAT', struct.pack('>I', self.sequence) + compressed)
+            self.sequence += 1
+
+        self.num_frames += 1
+
+
+    def close(self):
+        self.write_chunk(b'IEND', b'')
+
+
+def split_turns(turns: Sequence[int], num_chunks: int) -> List[Sequence[int]]:
+    '''Splits turns into up to num_chunks runs of consecutive turns of about the same length'''
+
+    size = max(1, -(-len(turns) // num_chunks))
+    return [turns[i:i + size] for i in range(0, len(turns), size)]
+
+
+def render_replay(replay_path: str, output_path: str, image_format: str = 'png', start: int = 0, end: Optional[int] = None, step: int = 1, workers: int = 1, fps: float = 10) -> int:
+    '''
+    Renders every step-th turn in [start, end) of a replay across a pool of worker processes, returning the number of frames written
+
+    With image_format 'png', output_path is a directory that gets one image per turn, written by the workers as
+    they go. With 'apng', output_path is a single animated PNG; frames come back to this process in order and are
+    appended to the file as each run of turns finishes.
+    '''
+
+    reader = ReplayReader(replay_path)
+    turns = range(len(reader))[start:end:step]
+
+    #each worker renders a few runs of consecutive turns, so the pool stays balanced and redraws stay incremental
+    chunks = split_turns(turns, 4 * workers)
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, initializer= init_worker, initargs= (replay_path,)) as pool:
+
+        if image_format == 'png':
+            os.makedirs(output_path, exist_ok= True)
+            return sum(pool.starmap(save_png_frames, [(chunk, output_path) for chunk in chunks]))
+
+        width, height = Renderer(Map.from_dict(reader.map)).get_window_size()
+
+        with open(output_path, 'wb') as f:
+            writer = ApngWriter(f, width, height, len(turns), fps)
+            for frames in pool.imap(compress_frames, chunks):
+                for frame in frames:
+                    writer.add_frame(frame)
+            writer.close()
+
+        return writer.num_frames
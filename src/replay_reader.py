@@ -0,0 +1,147 @@
+''' reads replay files, giving the game state and terrain of each recorded turn '''
+
+import json
+import mmap
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+#every recorded turn is an object whose first key is "turn_number"; no other object in a replay has that key
+TURN_KEY = re.compile(rb'"turn_number"\s*:')
+
+
+class ReplayReader:
+    '''
+    Reads a replay file (as written by Game.export_replay), decoding turns only when they are asked for
+
+    The file is memory-mapped rather than read, so its turns are paged in by the OS as they are used instead of
+    being held in memory as one string. Opening a replay decodes the values before its turns (map, map changes,
+    winner) and finds the byte offset where each turn starts with a single regular expression pass over the mapping.
+    A turn is decoded from its own slice of the file the first time it is needed, and the most recently used ones
+    are kept, so any turn of a long game can be read without decoding the ones before it.
+
+    Turns are numbered by their position in the replay. Every turn holds the full game state, and the map is
+    only stored again when it changes (map-changes in the file), so the terrain of a turn is the last map changed
+    at or before its turn number, found by binary search over the turns with changes.
+    '''
+
+    CACHE_SIZE = 256 #decoded turns kept
+
+    def __init__(self, path: str, cache_size: int = CACHE_SIZE):
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access= mmap.ACCESS_READ)
+
+        self.decoder = json.JSONDecoder()
+        self.cache: OrderedDict[int, Dict] = OrderedDict()
+        self.cache_size = cache_size
+
+        header = self.read_header()
+        if header is None:
+            #unexpected layout: decode the whole file
+            header = json.loads(self.buffer[:])
+            self.offsets = []
+            for i, turn in enumerate(header["replay"]):
+                self.offsets.append(-1)
+                self.cache[i] = turn
+            self.cache_size = len(self.offsets)
+
+        self.id = header.get("ID")
+        self.winner_color = header.get("winner_color", "None")
+        self.controller_profile: Optional[Dict] = header.get("controller-profile") #with Game(profile= True)
+        self.map = header["map"]
+
+        self.changed_turns: List[int] = header["map-changes"]["changed-turns"]
+        self.changed_maps: List[List[List[str]]] = header["map-changes"]["changed-maps"]
+
+
+    @staticmethod
+    def skip_whitespace(text: str, pos: int) -> int:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        return pos
+
+
+    def read_header(self) -> Optional[Dict]:
+        '''
+        Decodes the top level values before "replay" and indexes where each turn starts,
+        returns None if the file is not laid out the way Game.export_replay writes it
+        '''
+
+        #only the text before the first turn is decoded; without turns, that is the whole file
+        first_turn = TURN_KEY.search(self.buffer)
+        text = self.buffer[:len(self.buffer) if first_turn is None else first_turn.start()].decode('utf-8')
+
+        header = {}
+        pos = self.skip_whitespace(text, 0)
+        if not text.startswith('{', pos):
+            return None
+
+        pos += 1
+        while True:
+            pos = self.skip_whitespace(text, pos)
+            key, pos = self.decoder.raw_decode(text, pos)
+
+            pos = self.skip_whitespace(text, pos)
+            if not text.startswith(':', pos):
+                return None
+            pos = self.skip_whitespace(text, pos + 1)
+
+            if key == "replay":
+                break
+
+            header[key], pos = self.decoder.raw_decode(text, pos)
+            pos = self.skip_whitespace(text, pos)
+            if not text.startswith(',', pos):
+                return None
+            pos += 1
+
+        #the replay is the last value, so the rest of the file is its turns
+        if "map" not in header or "map-changes" not in header:
+            return None
+
+        #offsets into the file are in bytes
+        pos = len(text[:pos].encode('utf-8'))
+        self.offsets: List[int] = [self.buffer.rfind(b'{', pos, match.start()) for match in TURN_KEY.finditer(self.buffer, pos)]
+        return header
+
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+
+    def get_turn(self, i: int) -> Dict:
+        '''Record of turn i ({"turn_number": ..., "game_state": ...}), decoding it if it is not cached'''
+
+        if i < 0:
+            i += len(self)
+
+        turn = self.cache.get(i)
+        if turn is not None:
+            self.cache.move_to_end(i)
+            return turn
+
+        #a turn ends before the next one starts, so its slice holds it whole
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.buffer)
+        turn, _ = self.decoder.raw_decode(self.buffer[self.offsets[i]:end].decode('utf-8'))
+        self.cache[i] = turn
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last= False)
+
+        return turn
+
+
+    def get_state(self, i: int) -> Dict:
+        '''Game state (GameState.to_dict) recorded for turn i'''
+        return self.get_turn(i)["game_state"]
+
+
+    def get_tiles(self, i: int) -> List[List[str]]:
+        '''Tile names of the map at turn i, indexed [x][y]; the same list is returned for turns with the same terrain'''
+
+        changes = bisect_right(self.changed_turns, self.get_state(i)["turn"])
+        if changes == 0:
+            return self.map["tiles"]
+
+        return self.changed_maps[changes - 1]
@@ -3,17 +3,20 @@ This file contains all the functions that a player can call in their bot
 '''
 
 import copy, math
-from typing import List, Optional, Dict, Tuple
+from bisect import bisect_right
+from typing import Iterator, List, Optional, Dict, Tuple
 
 from src.exceptions import GameException
 
-from src.game_constants import Team, UnitType, BuildingType, Direction, Tile
+from src.game_constants import Team, UnitType, BuildingType, Direction, Tile, TargetPolicy
 from src.map import Map
 
 from src.units import Unit
 from src.buildings import Building
 from src.game_constants import GameConstants
 from src.game_state import GameState
+from src import spatial
+from src.events import GameEvent
 
 
 class RobotController:
@@ -60,6 +63,11 @@ class RobotController:
         return list(self.__game_state.units[team].keys())
 
 
+    def get_unit_ids_of_type(self, team: Team, unit_type: UnitType) -> List[int]:
+        '''Gets a list of the specified team's available unit ids of a given UnitType'''
+        return list(self.__game_state.units_by_type[team][unit_type].keys())
+
+
     def get_buildings(self, team: Team) -> List[Building]:
         '''Gets a list of the specified team's available buildings'''
         return copy.deepcopy(list(self.__game_state.buildings[team].values()))
@@ -67,6 +75,10 @@ class RobotController:
     def get_building_ids(self, team: Team) -> List[Building]:
         '''Gets a list of the specified team's available building ids'''
         return list(self.__game_state.buildings[team].keys())
+
+    def get_building_ids_of_type(self, team: Team, building_type: BuildingType) -> List[int]:
+        '''Gets a list of the specified team's available building ids of a given BuildingType'''
+        return list(self.__game_state.buildings_by_type[team][building_type].keys())
     
 
     def get_unit_placeable_map(self) -> List[List[bool]]:
@@ -78,10 +90,64 @@ class RobotController:
         '''Returns a 2D boolean map that is True if an arbitrary building can be placed on (x, y) and False if not'''
         return copy.deepcopy(self.__game_state.building_placeable_map)
 
+    def get_building_placeable_locations(self, building_type: BuildingType) -> Iterator[Tuple[int, int]]:
+        '''
+        Iterates over every location (x, y) where building_type can be placed, by tile type and other buildings, in order of x then y
+        Funds are not checked
+
+        The locations are read from the game state as the iteration goes, so each step costs O(log n) and it is
+        safe to build while iterating: locations that stop being valid are skipped once they are reached
+        '''
+        height = self.__game_state.map.height
+        candidates = self.__game_state.get_building_candidates(building_type)
+
+        #the next candidate after the last one given, found again each step as building changes the candidates
+        j = 0
+        while j < len(candidates):
+            i = candidates[j]
+            yield divmod(i, height)
+            j = bisect_right(candidates, i)
+
 
     def get_balance(self, team: Team) -> int:
         '''Gets the gold balance of a certain team'''
         return self.__game_state.balance[team]
+
+
+    def get_events_since_last_turn(self) -> List[GameEvent]:
+        '''
+        Gets every change to the game since the end of the player's last turn (or since the start of the game), oldest first:
+        units spawned, moved, damaged, healed and died, buildings built, damaged and destroyed, tiles changed and balances changed
+
+        This includes the opponent's turn and the start of this turn, as well as anything the player has done so far this turn,
+        so a bot can keep its own view of the game up to date without rebuilding it from get_units/get_buildings
+        '''
+        return self.__game_state.events.get_events_since_turn_end(self.__team)
+    
+
+    def get_unit_id_at(self, x: int, y: int) -> Optional[int]:
+        '''Gets the id of the unit on tile (x, y), or None if there is no unit there'''
+        return self.__game_state.get_unit_id_at(x, y)
+
+
+    def get_building_id_at(self, x: int, y: int) -> Optional[int]:
+        '''Gets the id of the building on tile (x, y), or None if there is no building there'''
+        return self.__game_state.get_building_id_at(x, y)
+    
+
+    def get_asset_value(self, team: Team) -> int:
+        '''Gets the total cost of all of a certain team's units and buildings (used to break ties)'''
+        return self.__game_state.asset_value[team]
+
+
+    def get_unit_counts(self, team: Team) -> Dict[UnitType, int]:
+        '''Gets the number of units of each UnitType a certain team has'''
+        return {unit_type: len(units) for unit_type, units in self.__game_state.units_by_type[team].items()}
+
+
+    def get_building_counts(self, team: Team) -> Dict[BuildingType, int]:
+        '''Gets the number of buildings of each BuildingType a certain team has'''
+        return {building_type: len(buildings) for building_type, buildings in self.__game_state.buildings_by_type[team].items()}
     
 
     def get_team_of_unit(self, unit_id: int) -> Optional[Team]:
@@ -150,17 +216,22 @@ class RobotController:
         It is also the minimum number of moves in chess that a king needs to move from (x1, y1) to (x2, y2)
         '''
 
-        return max(abs(x1 - x2), abs(y1 - y2))
+        return spatial.get_chebyshev_distance(x1, y1, x2, y2)
 
     def chebyshev_distance_valid(self, x1: int, y1: int, x2: int, y2: int, radius: int) -> bool:
         ''' 
         Returns True if the chebyshev (chessboard) distance between (x1, y1) and (x2, y2) <= radius 
         '''
-        
-        if self.get_chebyshev_distance(x1, y1, x2, y2) <= radius:
-            return True
-        
-        return False
+        return abs(x1 - x2) <= radius and abs(y1 - y2) <= radius
+    
+
+
+    def is_reachable(self, unit_type: UnitType, x1: int, y1: int, x2: int, y2: int) -> bool:
+        '''
+        Returns True if a unit of unit_type could walk from (x1, y1) to (x2, y2) over the current terrain
+        Only the terrain is considered, not other units or movement costs, so False means the trip is impossible
+        '''
+        return self.__game_state.map.is_reachable(unit_type, x1, y1, x2, y2)
     
 
 
@@ -181,14 +252,7 @@ class RobotController:
         if radius < 0:
             raise GameException("Radius must be non-negative")
 
-        in_range: List[Unit] = []
-
-        for unit in self.__game_state.units[team].values():
-            #if chebyshev distance between unit and (x, y) <= radius, then valid
-            if self.chebyshev_distance_valid(unit.x, unit.y, x, y, radius):
-                in_range.append(copy.deepcopy(unit))
-
-        return in_range
+        return copy.deepcopy(self.__game_state.units_in_square(x, y, radius, team))
 
 
 
@@ -202,14 +266,7 @@ class RobotController:
         if radius < 0:
             raise GameException("Radius must be non-negative")
         
-        in_range: List[Building] = []
-
-        for building in self.__game_state.buildings[team].values():
-            #if chebyshev distance between building and (x, y) <= radius, then valid
-            if self.chebyshev_distance_valid(building.x, building.y, x, y, radius):
-                in_range.append(copy.deepcopy(building))
-
-        return in_range
+        return copy.deepcopy(self.__game_state.buildings_in_square(x, y, radius, team))
 
     def sense_objects_within_radius(self, team: Team, x: int, y: int, radius: int) -> Tuple[List[Unit], List[Building]]:
         '''
@@ -232,7 +289,7 @@ class RobotController:
             return ([], []) # returns nothing if unit_id is invalid
         
         unit = self.__game_state.units[team][unit_id]
-        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.range)
+        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.attack_range)
 
 
     def sense_objects_within_building_range(self, team: Team, building_id: int) -> Tuple[List[Unit], List[Building]]:
@@ -245,8 +302,58 @@ class RobotController:
             print("sense_objects_within_building_range(): Not valid building id")
             return ([], []) # returns nothing if building_id is invalid
         
-        unit = self.__game_state.units[team][building_id]
-        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.range)
+        building = self.__game_state.buildings[team][building_id]
+        return self.sense_objects_within_radius(team, building.x, building.y, building.attack_range)
+
+
+    def get_weakest_enemies_in_range(self, unit_id: int, k: int = 1) -> List[int]:
+        '''
+        Returns the ids of up to k enemy units within the attack range of an ally unit, lowest health first
+        Ties are broken by id
+        '''
+        if unit_id not in self.__game_state.units[self.__team]:
+            print("get_weakest_enemies_in_range(): invalid ally unit_id")
+            return []
+
+        unit = self.__game_state.units[self.__team][unit_id]
+        enemies = self.__game_state.best_units_in_square(self.get_enemy_team(), 'weakest', unit.x, unit.y, unit.attack_range, k)
+        return [enemy.id for enemy in enemies]
+
+
+    def get_most_valuable_enemies_in_range(self, unit_id: int, k: int = 1) -> List[int]:
+        '''
+        Returns the ids of up to k enemy units within the attack range of an ally unit, highest cost first
+        Ties are broken by id
+        '''
+        if unit_id not in self.__game_state.units[self.__team]:
+            print("get_most_valuable_enemies_in_range(): invalid ally unit_id")
+            return []
+
+        unit = self.__game_state.units[self.__team][unit_id]
+        enemies = self.__game_state.best_units_in_square(self.get_enemy_team(), 'most_valuable', unit.x, unit.y, unit.attack_range, k)
+        return [enemy.id for enemy in enemies]
+
+
+    def get_most_damaged_ally_in_range(self, healer_id: int) -> Optional[int]:
+        '''
+        Returns the id of the ally unit within a healer's range that is missing the most health (below its type's health),
+        or None if no ally in range is damaged. The healer itself is not considered
+        '''
+        if healer_id not in self.__game_state.units[self.__team]:
+            print("get_most_damaged_ally_in_range(): invalid ally healer_id")
+            return None
+
+        healer = self.__game_state.units[self.__team][healer_id]
+        if healer.type.heal_amount <= 0:
+            print("get_most_damaged_ally_in_range(): unit is not a healer")
+            return None
+
+        #the healer itself may rank first, so look at one more ally than needed
+        for ally in self.__game_state.best_units_in_square(self.__team, 'most_damaged', healer.x, healer.y, healer.attack_range, 2):
+            if ally.id != healer_id and ally.health < ally.type.health:
+                return ally.id
+
+        return None
 
 
     '''
@@ -308,11 +415,7 @@ class RobotController:
             print('can_build_building(): (x, y) given are out of bounds')
             return False
 
-        #checks if building can be built
-        if building_type.placeable_tiles is not None and self.__game_state.map.tiles[x][y] not in building_type.placeable_tiles:
-            return False
-
-        #checks for other units and tile type
+        #checks for other buildings and tile type
         if not self.__game_state.is_building_placeable(building_type, x, y):
             return False
         
@@ -340,7 +443,7 @@ class RobotController:
             return False
         
         # decrease balance
-        self.__game_state.balance[self.__team] -= unit_type.cost
+        self.__game_state.set_balance(self.__team, self.__game_state.balance[self.__team] - unit_type.cost)
 
         return True
 
@@ -358,7 +461,7 @@ class RobotController:
             return False
 
         #decrease balance
-        self.__game_state.balance[self.__team] -= building_type.cost
+        self.__game_state.set_balance(self.__team, self.__game_state.balance[self.__team] - building_type.cost)
         
         return True
 
@@ -648,7 +751,6 @@ class RobotController:
         if not self.can_unit_attack_location(attacking_unit_id, x, y):
             return False
 
-        enemy_team = self.get_enemy_team()
         attacking_unit = self.__game_state.get_unit_from_id(attacking_unit_id)
 
         # basic validity
@@ -656,74 +758,8 @@ class RobotController:
             return False
 
 
-        # get all opponents within damage range
-        #list of ids
-        opponent_units_hit: List[int] = []
-        opponent_buildings_hit: List[int] = []
-
-
-        #sense all opponents hit
-        for unit in self.__game_state.units[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(unit.x, unit.y, x, y, attacking_unit.damage_range):
-                opponent_units_hit.append(unit.id)
-
-        for building in self.__game_state.buildings[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(building.x, building.y, x, y, attacking_unit.damage_range):
-                opponent_buildings_hit.append(building.id)
-
-        #unit actions per turn decrement
-        attacking_unit.turn_actions_remaining -= 1
-
-        #damage opponent's units
-        dead_units = [] #indices to delete
-        for i in range(len(opponent_units_hit)):
-            unit_id_hit = opponent_units_hit[i]
-            #if opponent unit killed, then delete it from the list because they cannot retaliate
-            if self.__game_state.damage_unit(unit_id_hit, attacking_unit.damage):
-                dead_units.append(i) #delete it here to not mess up the indexing
-
-        for i in dead_units:
-            del opponent_units_hit[i]
-
-
-        #damage opponent's buildings
-        dead_buildings = [] #indices to delete
-        for i in range(len(opponent_buildings_hit)):
-            building_id_hit = opponent_buildings_hit[i]
-            #if opponent building defeated, then delete from the list because they cannot retaliate
-            if self.__game_state.damage_building(building_id_hit, attacking_unit.damage):
-                dead_buildings.append(i)
-
-        for i in dead_buildings:
-            del opponent_buildings_hit[i]
-
-
-
-        #retaliation: damage player's unit if opponent is not killed and player in range
-        for enemy_unit_id in opponent_units_hit:
-            enemy_unit = self.__game_state.get_unit_from_id(enemy_unit_id)
-
-            # basic validity
-            if enemy_unit is None:
-                print('unit_attack_location(): invalid enemy unit id')
-                return False
-
-            if self.__game_state.damage_unit(attacking_unit_id, enemy_unit.defense):
-                return True #if killed, then simply return
-            
-        
-        for enemy_building_id in opponent_buildings_hit:
-            enemy_building = self.__game_state.get_building_from_id(enemy_building_id)
-
-            # basic validity
-            if enemy_building is None:
-                print('unit_attack_location(): invalid enemy building id')
-                return False
-
-            if self.__game_state.damage_unit(attacking_unit_id, enemy_building.defense):
-                return True #if killed, then simply return
+        #damage all opponents within damage range at once, then take the survivors' retaliation
+        self.__game_state.unit_attack(attacking_unit, x, y)
 
         return True
 
@@ -797,7 +833,6 @@ class RobotController:
             return False
         
 
-        enemy_team = self.get_enemy_team()
         attacking_building = self.__game_state.get_building_from_id(attacking_building_id)
 
         #basic validity
@@ -805,29 +840,8 @@ class RobotController:
             return False
 
 
-        # get all opponents within damage range
-        #list of ids
-        opponent_units_hit: List[int] = []
-
-        #sense all opponents (only units) hit
-        for unit in self.__game_state.units[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(unit.x, unit.y, x, y, attacking_building.damage_range):
-                opponent_units_hit.append(unit.id)
-
-
-        #buliding actions per turn decrement
-        attacking_building.turn_actions_remaining -= 1
-
-        #damage opponent's units
-        for i in range(len(opponent_units_hit)):
-            unit_id_hit = opponent_units_hit[i]
-            #if opponent unit killed, then delete it from the list because they cannot retaliate
-            if self.__game_state.damage_unit(unit_id_hit, attacking_building.damage):
-                del opponent_units_hit[i]
-
-
-        #no retaliation damage taken for buildings
+        #damage all opponents (only units) within damage range at once; no retaliation damage taken for buildings
+        self.__game_state.building_attack(attacking_building, x, y)
 
         return True
 
@@ -858,11 +872,25 @@ class RobotController:
 
 
 
-    def unit_auto_attack(self):
-        pass
+    def unit_auto_attack(self, policy: TargetPolicy = TargetPolicy.LOWEST_HEALTH) -> int:
+        '''
+        Every player's unit that can still attack this turn attacks an enemy unit or building in its attack range,
+        chosen by policy (TargetPolicy.LOWEST_HEALTH, TargetPolicy.NEAREST or TargetPolicy.HIGHEST_VALUE)
 
-    def building_auto_attack(self):
-        pass
+        Attacks are resolved as by unit_attack_location, in order of unit id
+        Returns the number of attacks made
+        '''
+        return self.__game_state.auto_attack(self.__team, policy, units= True, buildings= False)
+
+    def building_auto_attack(self, policy: TargetPolicy = TargetPolicy.LOWEST_HEALTH) -> int:
+        '''
+        Every player's building that can still attack this turn attacks an enemy unit in its attack range,
+        chosen by policy (TargetPolicy.LOWEST_HEALTH, TargetPolicy.NEAREST or TargetPolicy.HIGHEST_VALUE)
+
+        Attacks are resolved as by building_attack_location, in order of building id
+        Returns the number of attacks made
+        '''
+        return self.__game_state.auto_attack(self.__team, policy, units= False, buildings= True)
 
 
 
@@ -930,8 +958,7 @@ class RobotController:
             return False
         
         #check if unit can walk on tile
-        dest_tile: Tile = self.__game_state.map.tiles[dest_x][dest_y]
-        if dest_tile not in unit.walkable_tiles:
+        if not self.__game_state.is_tile_walkable(unit, dest_x, dest_y):
             return False
         
         # if another unit is occupying the new space (that isn't the one that it is occupying right now), return false
@@ -939,6 +966,7 @@ class RobotController:
             return False
 
         #check unit's movement range left for the turn
+        dest_tile: Tile = self.__game_state.map.tiles[dest_x][dest_y]
         if unit.turn_movement_remaining - dest_tile.movement_cost < 0:
             # print(f'{unit_id} has no movement left on its turn')
             return False
@@ -969,17 +997,8 @@ class RobotController:
         dest_tile: Tile = self.__game_state.map.tiles[dest_x][dest_y]
         unit.turn_movement_remaining -= dest_tile.movement_cost
 
-        # update unit_pleaceable map (old is now free)
-        self.__game_state.unit_placeable_map[unit.x][unit.y] = True
-
-        #update location
-        unit.x = dest_x
-        unit.y = dest_y
-
-        # update unit_pleaceable map (new is now taken)
-        self.__game_state.unit_placeable_map[unit.x][unit.y] = False
-
-        return True
+        #update location along with the unit_placeable map and occupancy index
+        return self.__game_state.move_unit(unit_id, dest_x, dest_y)
     
 
     '''
@@ -1038,7 +1057,7 @@ class RobotController:
         if not self.disband_unit(explorer_unit_id):
             return False
         
-        self.__game_state.balance[self.__team] += self.__game_state.balance[self.__team] // 2
+        self.__game_state.set_balance(self.__team, self.__game_state.balance[self.__team] + self.__game_state.balance[self.__team] // 2)
 
         return True
 
@@ -1065,7 +1084,7 @@ class RobotController:
         if unit is None:
             return False
         
-        unit.health = math.ceil(unit.type.health * 1.5)
+        self.__game_state.set_unit_health(unit, math.ceil(unit.type.health * 1.5))
 
         return True
         
@@ -1169,12 +1188,8 @@ class RobotController:
         
         engineer = self.__game_state.get_unit_from_id(engineer_id)
 
-        # Change the tile to BRIDGE
-        self.__game_state.map.tiles[engineer.x][engineer.y] = Tile.BRIDGE
-
-        # Record the map change
-        self.__game_state.changed_maps.append(self.__game_state.map.to_2d_list())
-        self.__game_state.changed_turns.append(self.__game_state.turn)
+        # Change the tile to BRIDGE, recording the map change
+        self.__game_state.set_tile(engineer.x, engineer.y, Tile.BRIDGE)
 
         # Disband the engineer
         if not self.disband_unit(engineer_id):
@@ -1267,7 +1282,7 @@ class RobotController:
         healer_unit.turn_actions_remaining -= 1
 
         #heal
-        target_unit.health = max(target_unit.type.health, target_unit.health + healer_unit.type.heal_amount)
+        self.__game_state.set_unit_health(target_unit, max(target_unit.type.health, target_unit.health + healer_unit.type.heal_amount))
     
 
     '''
@@ -1299,8 +1314,8 @@ class RobotController:
             return False
 
         # Apply penalties
-        self.__game_state.balance[self.get_enemy_team()] *= GameConstants.RAT_OWN_FARM_DAMAGE_MULTIPLIER
-        self.__game_state.balance[self.__team] *= GameConstants.RAT_OPPONENT_FARM_DAMAGE_MULTIPLIER
+        self.__game_state.set_balance(self.get_enemy_team(), self.__game_state.balance[self.get_enemy_team()] * GameConstants.RAT_OWN_FARM_DAMAGE_MULTIPLIER)
+        self.__game_state.set_balance(self.__team, self.__game_state.balance[self.__team] * GameConstants.RAT_OPPONENT_FARM_DAMAGE_MULTIPLIER)
 
         # Disband the Rat after effect is applied
         self.disband_unit(rat_id)
@@ -0,0 +1,54 @@
+''' precomputed chebyshev (chessboard) offset tables and helpers for square range queries '''
+
+from functools import lru_cache
+from typing import List, Tuple
+
+
+def get_chebyshev_distance(x1: int, y1: int, x2: int, y2: int) -> int:
+    '''Chebyshev (chessboard) distance between (x1, y1) and (x2, y2)'''
+    return max(abs(x1 - x2), abs(y1 - y2))
+
+
+@lru_cache(maxsize=None)
+def get_ring_offsets(radius: int) -> Tuple[Tuple[int, int], ...]:
+    '''
+    Offsets (dx, dy) at exactly chebyshev distance radius from a tile, in a fixed order
+    The ring of radius 0 is the tile itself
+    '''
+    if radius < 0:
+        return ()
+    if radius == 0:
+        return ((0, 0),)
+
+    offsets = [(dx, dy) for dx in (-radius, radius) for dy in range(-radius, radius + 1)]
+    offsets += [(dx, dy) for dy in (-radius, radius) for dx in range(-radius + 1, radius)]
+    return tuple(sorted(offsets))
+
+
+@lru_cache(maxsize=None)
+def get_square_offsets(radius: int) -> Tuple[Tuple[int, int], ...]:
+    '''
+    Offsets (dx, dy) within chebyshev distance radius of a tile, ordered ring by ring from the tile outwards
+    '''
+    offsets: List[Tuple[int, int]] = []
+    for ring in range(radius + 1):
+        offsets.extend(get_ring_offsets(ring))
+    return tuple(offsets)
+
+
+def get_square_locations(x: int, y: int, radius: int, width: int, height: int) -> List[Tuple[int, int]]:
+    '''
+    Locations within chebyshev distance radius of (x, y) that are inside a width x height map,
+    ordered ring by ring from (x, y) outwards
+    '''
+    return [(x + dx, y + dy) for dx, dy in get_square_offsets(radius) if 0 <= x + dx < width and 0 <= y + dy < height]
+
+
+def clip_square(x: int, y: int, radius: int, width: int, height: int) -> Tuple[int, int, int, int]:
+    '''
+    Bounds (min x, max x exclusive, min y, max y exclusive) of the square of tiles within chebyshev distance radius
+    of (x, y), clipped to a width x height map; the bounds are empty if the square misses the map
+    '''
+    min_x, max_x = max(x - radius, 0), min(x + radius + 1, width)
+    min_y, max_y = max(y - radius, 0), min(y + radius + 1, height)
+    return min_x, max(min_x, max_x), min_y, max(min_y, max_y)
@@ -0,0 +1,135 @@
+''' connected components of the terrain for one set of walkable tiles '''
+
+from array import array
+from typing import List, Optional
+
+
+class TerrainComponents:
+    '''
+    Labels the connected regions of a legality mask, where tiles connect to all 8 neighbors (units move like a king)
+
+    labels[x * height + y] is the component label of tile (x, y), or -1 if the tile is not walkable.
+    Labels are nodes of a union-find forest (parents), so two tiles are connected iff their labels share a root.
+    When a tile becomes walkable (e.g. a bridge over water) it gets a new label that is unioned with its neighbors,
+    which merges components in near-constant time. A tile becoming unwalkable can split a component, so that
+    case relabels the whole mask.
+    '''
+
+    def __init__(self, width: int, height: int, mask: bytearray, labels: Optional[array] = None, parents: Optional[array] = None):
+        self.width = width
+        self.height = height
+        self.mask = mask
+
+        if labels is None or parents is None:
+            self.relabel()
+        else:
+            self.labels = labels
+            self.parents = parents
+
+
+    def relabel(self):
+        '''
+        Labels every component of the mask from scratch
+
+        Each column is split into runs of walkable tiles with bytearray.find, and every run is unioned with the
+        runs of the previous column it touches, so the work is per run rather than per tile
+        '''
+        mask, height = self.mask, self.height
+
+        self.labels = array('i', [-1]) * (self.width * height)
+        self.parents = array('i')
+
+        columns: List[List[tuple]] = []
+        previous_runs = []
+        for x in range(self.width):
+            base = x * height
+            end_of_column = base + height
+
+            #(start y, end y exclusive, label) of each run of walkable tiles in this column
+            runs = []
+            start = mask.find(1, base, end_of_column)
+            while start != -1:
+                end = mask.find(0, start, end_of_column)
+                if end == -1:
+                    end = end_of_column
+
+                label = len(self.parents)
+                self.parents.append(label)
+                runs.append((start - base, end - base, label))
+
+                start = mask.find(1, end, end_of_column)
+
+            #runs in neighboring columns touch if they overlap once extended by a diagonal step
+            i = j = 0
+            while i < len(runs) and j < len(previous_runs):
+                start, end, label = runs[i]
+                previous_start, previous_end, previous_label = previous_runs[j]
+
+                if previous_start <= end and start <= previous_end:
+                    self.union(label, previous_label)
+
+                if end < previous_end:
+                    i += 1
+                else:
+                    j += 1
+
+            columns.append(runs)
+            previous_runs = runs
+
+        #write every run's root so most lookups do not need to walk the forest
+        for x, runs in enumerate(columns):
+            base = x * height
+            for start, end, label in runs:
+                self.labels[base + start:base + end] = array('i', [self.find(label)]) * (end - start)
+
+
+    def find(self, label: int) -> int:
+        '''Root label of a label's component'''
+        parents = self.parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+
+    def union(self, label_a: int, label_b: int):
+        '''Merges the components of two labels'''
+        root_a, root_b = self.find(label_a), self.find(label_b)
+        if root_a < root_b:
+            self.parents[root_b] = root_a
+        elif root_b < root_a:
+            self.parents[root_a] = root_b
+
+
+    def get_component(self, x: int, y: int) -> int:
+        '''
+        Root label of the component containing (x, y), or -1 if it is not walkable
+        Precondition that (x, y) is in bounds
+        '''
+        label = self.labels[x * self.height + y]
+        return label if label == -1 else self.find(label)
+
+
+    def add_tile(self, x: int, y: int):
+        '''
+        Updates the components after (x, y) became walkable in the mask, merging every component it touches
+        Precondition that (x, y) is in bounds
+        '''
+        label = len(self.parents)
+        self.parents.append(label)
+        self.labels[x * self.height + y] = label
+
+        for neighbor_x in range(max(x - 1, 0), min(x + 2, self.width)):
+            for neighbor_y in range(max(y - 1, 0), min(y + 2, self.height)):
+                neighbor_label = self.labels[neighbor_x * self.height + neighbor_y]
+                if neighbor_label != -1:
+                    self.union(label, neighbor_label)
+
+
+    def is_connected(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        '''
+        True if both tiles are walkable and in the same component
+        Precondition that both tiles are in bounds
+        '''
+        component = self.get_component(x1, y1)
+        return component != -1 and component == self.get_component(x2, y2)
@@ -0,0 +1,16 @@
+''' shared turn counter that units and buildings use to reset their per-turn values lazily '''
+
+
+class TurnClock:
+    '''
+    Holds the current turn of a game.
+
+    Every unit and building of a game keeps a reference to the game's clock, along with the turn in which
+    its per-turn values (actions, movement) were last written. When the clock has moved on since then, the
+    values read as fully reset, so starting a turn does not need to visit every object.
+    '''
+
+    __slots__ = ('turn',)
+
+    def __init__(self, turn: int = 0):
+        self.turn = turn
@@ -0,0 +1,106 @@
+''' per-region heaps that rank a team's units by a key, for "best k units in a square" queries '''
+
+import heapq
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.units import Unit
+
+
+#keys of the rankings the game state can keep; smaller keys rank first
+RANKING_KEYS: Dict[str, Callable[[Unit], Any]] = {
+    'weakest': lambda unit: unit.health,
+    'most_valuable': lambda unit: -unit.type.cost,
+    'most_damaged': lambda unit: unit.health - unit.type.health,
+}
+
+
+class UnitRanking:
+    '''
+    Ranks one team's units by a key, with one heap per square region of the map
+
+    Heap entries are (key, unit id, sequence number, x, y). Updating a unit pushes a new entry and makes it the
+    unit's current one, so older entries are invalidated lazily rather than searched for; a region's heap is
+    rebuilt from its current entries once most of them are stale.
+
+    Queries walk the heaps of the regions a square overlaps best-first without popping them, so finding the
+    k best units costs about k log k heap steps plus the stale or out-of-square entries passed over.
+    '''
+
+    REGION_SIZE = 8
+
+    def __init__(self, key: Callable[[Unit], Any], region_size: int = REGION_SIZE):
+        self.key = key
+        self.region_size = region_size
+
+        self.heaps: Dict[Tuple[int, int], List[tuple]] = {}
+        self.num_current: Dict[Tuple[int, int], int] = {} #number of current entries in each region's heap
+        self.entries: Dict[int, tuple] = {} #current entry of each unit
+        self.sequence = 0
+
+
+    def get_region(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.region_size, y // self.region_size
+
+
+    def update(self, unit: Unit):
+        '''Adds a unit, or refreshes its entry after its key or location changed'''
+        self.remove(unit.id)
+
+        self.sequence += 1
+        entry = (self.key(unit), unit.id, self.sequence, unit.x, unit.y)
+        self.entries[unit.id] = entry
+
+        region = self.get_region(unit.x, unit.y)
+        heapq.heappush(self.heaps.setdefault(region, []), entry)
+        self.num_current[region] = self.num_current.get(region, 0) + 1
+
+
+    def remove(self, unit_id: int):
+        '''Removes a unit's current entry, if it has one'''
+        entry = self.entries.pop(unit_id, None)
+        if entry is None:
+            return
+
+        region = self.get_region(entry[3], entry[4])
+        self.num_current[region] -= 1
+
+        #rebuild the region's heap once most of its entries are stale
+        heap = self.heaps[region]
+        if len(heap) > 2 * self.num_current[region] + 8:
+            heap[:] = [entry for entry in heap if self.entries.get(entry[1]) is entry]
+            heapq.heapify(heap)
+
+
+    def best_in_bounds(self, min_x: int, max_x: int, min_y: int, max_y: int, k: int) -> List[int]:
+        '''
+        Ids of up to k units with the smallest keys among those with min_x <= x < max_x and min_y <= y < max_y,
+        best first; ties are broken by id
+        '''
+        if k <= 0 or min_x >= max_x or min_y >= max_y:
+            return []
+
+        #frontier of (entry, index in heap, heap) over every overlapping region's heap
+        frontier = []
+        min_region_x, min_region_y = self.get_region(min_x, min_y)
+        max_region_x, max_region_y = self.get_region(max_x - 1, max_y - 1)
+        for region_x in range(min_region_x, max_region_x + 1):
+            for region_y in range(min_region_y, max_region_y + 1):
+                heap = self.heaps.get((region_x, region_y))
+                if heap:
+                    frontier.append((heap[0], 0, heap))
+        heapq.heapify(frontier)
+
+        found = []
+        while frontier and len(found) < k:
+            entry, i, heap = heapq.heappop(frontier)
+
+            #children in a heap are never smaller than their parent, so the walk visits entries in order
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child, heap))
+
+            _, unit_id, _, x, y = entry
+            if self.entries.get(unit_id) is entry and min_x <= x < max_x and min_y <= y < max_y:
+                found.append(unit_id)
+
+        return found
@@ -1,17 +1,35 @@
 ''' contains unit classes (soldiers, farmers, builders, etc.) '''
 
-from src.game_constants import GameConstants, UnitType, Team, UnitRender
+import copy
+from typing import List, Optional
+
+from src.game_constants import GameConstants, UnitType, Team, UnitRender, Tile
+from src.turn_clock import TurnClock
 
 class Unit:
     '''
     This is an extensible unit class with all the traits of a building.
     The specifications for a building/unit is given in src/game_constants.py
+
+    Traits that never change over a unit's life (attack_range, damage_range, walkable_tiles)
+    are read through the unit's type unless they have been overridden on this unit.
+
+    turn_actions_remaining and turn_movement_remaining are reset lazily: they read as the type's
+    full allowance once the game's TurnClock has moved past the turn they were last written in.
     '''
 
+    __slots__ = (
+        'id', 'team', 'type', 'x', 'y',
+        '_turn_actions_remaining', '_turn_movement_remaining',
+        '_reset_turn', '_clock', #turn in which the per-turn values were last written, and the game's clock
+        'health', 'damage', 'defense', 'level',
+        '_attack_range', '_damage_range', '_walkable_tiles', #per-unit overrides of type data, None if not overridden
+    )
+
     #ID for participants to interface through instead of through the actual object for safety
     id_counter = 0
-    
-    def __init__(self, team: Team, type: UnitType, x: int, y: int, level: int = 1):
+
+    def __init__(self, team: Team, type: UnitType, x: int, y: int, level: int = 1, clock: Optional[TurnClock] = None):
 
         self.id = self.increment()
 
@@ -21,19 +39,20 @@ class Unit:
         self.y = y
 
         #cannot move and cannot act the turn of its spawn
-        self.turn_actions_remaining = 0
-        self.turn_movement_remaining = 0
-
-        self.attack_range = type.attack_range
+        self._clock = clock
+        self._reset_turn = clock.turn if clock is not None else 0
+        self._turn_actions_remaining = 0
+        self._turn_movement_remaining = 0
 
-        self.health = self.type.health
-        self.damage = self.type.damage
+        self.health = type.health
+        self.damage = type.damage
         self.defense = type.defense
-        self.damage_range = self.type.damage_range
 
         self.level = level
 
-        self.walkable_tiles = self.type.walkable_tiles
+        self._attack_range = None
+        self._damage_range = None
+        self._walkable_tiles = None
 
     @staticmethod
     def increment() -> int:
@@ -41,6 +60,80 @@ class Unit:
         Unit.id_counter += 1
         return res
 
+    def _reset_if_new_turn(self):
+        '''Writes out the lazily reset per-turn values if a turn has started since they were last written'''
+        if self._clock is not None and self._reset_turn != self._clock.turn:
+            self._turn_actions_remaining = self.type.actions_per_turn
+            self._turn_movement_remaining = self.type.move_range
+            self._reset_turn = self._clock.turn
+
+    @property
+    def turn_actions_remaining(self) -> int:
+        if self._clock is not None and self._reset_turn != self._clock.turn:
+            return self.type.actions_per_turn
+        return self._turn_actions_remaining
+
+    @turn_actions_remaining.setter
+    def turn_actions_remaining(self, turn_actions_remaining: int):
+        self._reset_if_new_turn()
+        self._turn_actions_remaining = turn_actions_remaining
+
+    @property
+    def turn_movement_remaining(self) -> int:
+        if self._clock is not None and self._reset_turn != self._clock.turn:
+            return self.type.move_range
+        return self._turn_movement_remaining
+
+    @turn_movement_remaining.setter
+    def turn_movement_remaining(self, turn_movement_remaining: int):
+        self._reset_if_new_turn()
+        self._turn_movement_remaining = turn_movement_remaining
+
+    @property
+    def attack_range(self) -> int:
+        return self.type.attack_range if self._attack_range is None else self._attack_range
+
+    @attack_range.setter
+    def attack_range(self, attack_range: int):
+        self._attack_range = attack_range
+
+    @property
+    def damage_range(self) -> int:
+        return self.type.damage_range if self._damage_range is None else self._damage_range
+
+    @damage_range.setter
+    def damage_range(self, damage_range: int):
+        self._damage_range = damage_range
+
+    @property
+    def walkable_tiles(self) -> List[Tile]:
+        return self.type.walkable_tiles if self._walkable_tiles is None else self._walkable_tiles
+
+    @walkable_tiles.setter
+    def walkable_tiles(self, walkable_tiles: List[Tile]):
+        self._walkable_tiles = walkable_tiles
+
+    def __deepcopy__(self, memo):
+        '''
+        Copies every slot; only overridden type data can be mutable, so only it is deep copied
+        Unless the clock is copied along with the unit, the copy is detached from it and keeps the current per-turn values
+        '''
+        res = Unit.__new__(Unit)
+        for name in Unit.__slots__:
+            setattr(res, name, getattr(self, name))
+
+        if id(self._clock) in memo:
+            res._clock = memo[id(self._clock)]
+        else:
+            res._turn_actions_remaining = self.turn_actions_remaining
+            res._turn_movement_remaining = self.turn_movement_remaining
+            res._clock = None
+
+        if self._walkable_tiles is not None:
+            res._walkable_tiles = copy.deepcopy(self._walkable_tiles, memo)
+
+        return res
+
     def to_dict(self):
         """
         Converts the unit into a dictionary representation.
@@ -59,4 +152,4 @@ class Unit:
             "defense": self.defense,
             "damage_range": self.damage_range,
             "level": self.level
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,111 @@
+''' window that shows a running game from a separate process, so drawing never holds up the simulation '''
+
+import multiprocessing
+import queue
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+#src.renderer is imported before pygame, as it hides pygame's import message
+from src.renderer import Renderer
+from src.map import Map
+
+import pygame
+
+
+#viewer modes: LIVE always shows the newest state received, skipping the ones it had no time to draw;
+#BUFFERED shows every state in order at a fixed number of turns per second, however far behind the game that gets
+LIVE = 'live'
+BUFFERED = 'buffered'
+VIEWER_MODES = (LIVE, BUFFERED)
+
+
+class Viewer:
+    '''
+    Shows the states of a game in a pygame window drawn by its own process
+
+    The game publishes the state of each turn (GameState.to_dict) without waiting, and the viewer process draws
+    them at its own frame rate. The viewer is started with the spawn method, so the game's threads and pygame
+    state are never copied into it. Closing the window stops the viewer, but not the game.
+    '''
+
+    def __init__(self, map_data: Dict, mode: str = LIVE, fps: float = 10):
+        context = multiprocessing.get_context('spawn')
+
+        self.states = context.Queue()
+        self.process = context.Process(target=run_viewer, args=(map_data, self.states, mode, fps), daemon=True)
+        self.process.start()
+
+
+    def publish(self, state: Dict, tiles: Optional[List[List[str]]] = None):
+        '''Sends the state of a turn to the viewer, with the map's tiles when they changed since the last state sent'''
+
+        if self.process.is_alive():
+            self.states.put((state, tiles))
+
+
+    def close(self):
+        '''
+        Tells the viewer the game is over without waiting for it: a buffered viewer may still have many turns to show,
+        and keeps showing them for as long as this process runs (see wait)
+        '''
+
+        if self.process.is_alive():
+            self.states.put(None)
+
+        #states the viewer never takes (the window was closed) need not be flushed when this process exits
+        self.states.cancel_join_thread()
+
+
+    def wait(self):
+        '''Waits until the viewer has shown the last state published, or its window is closed'''
+        self.process.join()
+
+
+def run_viewer(map_data: Dict, states: multiprocessing.Queue, mode: str, fps: float):
+    '''
+    Main loop of the viewer process: draws the states published to it until the game ends and the last one
+    is shown, or the window is closed
+    '''
+
+    renderer = Renderer(Map.from_dict(map_data))
+    renderer.init_render()
+
+    pending: Deque[Tuple[Dict, Optional[List[List[str]]]]] = deque() #states received but not yet shown
+    game_over = False
+
+    while not game_over or pending:
+        frame_start = time.perf_counter()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+
+        #take in everything the game published since the last frame
+        while not game_over:
+            try:
+                item = states.get(timeout= 1 / fps) if not pending else states.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is None:
+                game_over = True
+            else:
+                pending.append(item)
+
+        #a live viewer skips to the newest state; a buffered one shows the next
+        shown = None
+        while pending and (shown is None or mode == LIVE):
+            shown, tiles = pending.popleft()
+
+            #terrain changes of skipped states still have to be applied
+            if tiles is not None:
+                renderer.set_terrain(tiles)
+
+        if shown is not None:
+            renderer.snapshot_render(shown)
+
+        time.sleep(max(0, 1 / fps - (time.perf_counter() - frame_start)))
+
+    pygame.quit()
@@ -0,0 +1,60 @@
+''' checks the incrementally kept building placement candidates against a full rescan of the map '''
+
+import random
+
+import pytest
+
+from src.game_constants import Team, BuildingType, Tile
+from src.game_state import GameState
+from src.map_generator import generate_map
+
+
+SIZE = 24
+BUILDING_TYPES = [building_type for building_type in BuildingType if building_type != BuildingType.MAIN_CASTLE]
+TILES = [Tile.GRASS, Tile.SAND, Tile.WATER, Tile.MOUNTAIN, Tile.BRIDGE]
+
+
+def rescan(game_state: GameState, building_type: BuildingType):
+    height = game_state.map.height
+    return [x * height + y for x in range(game_state.map.width) for y in range(height) if game_state.is_building_placeable(building_type, x, y)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_candidates_match_rescan(seed: int):
+    '''Random builds, building removals, bridges and other terrain changes; the candidates of every building type always match a rescan'''
+
+    rng = random.Random(seed)
+    game_state = GameState(generate_map(SIZE, SIZE, water= 0.3, seed= seed))
+
+    #half the candidate lists are created up front and kept up to date through every change, the rest part-way through
+    queried = set(rng.sample(BUILDING_TYPES, len(BUILDING_TYPES) // 2))
+    for building_type in queried:
+        game_state.get_building_candidates(building_type)
+
+    for step in range(300):
+        operation = rng.random()
+        if operation < 0.5:
+            building_type = rng.choice(BUILDING_TYPES)
+            candidates = game_state.get_building_candidates(building_type)
+            queried.add(building_type)
+            if candidates:
+                x, y = divmod(rng.choice(candidates), SIZE)
+                assert game_state.place_building(rng.choice(list(Team)), building_type, x, y)
+
+        elif operation < 0.8:
+            team = rng.choice(list(Team))
+            removable = [building_id for building_id in game_state.buildings[team] if building_id != game_state.main_castle_ids[team]]
+            if removable:
+                game_state.delete_building(team, rng.choice(removable))
+
+        elif operation < 0.9:
+            water = [(x, y) for x in range(SIZE) for y in range(SIZE) if game_state.map.tiles[x][y] == Tile.WATER]
+            if water:
+                game_state.set_tile(*rng.choice(water), Tile.BRIDGE)
+
+        else:
+            #bridges leave ports placeable, so other terrain changes are made too
+            game_state.set_tile(rng.randrange(SIZE), rng.randrange(SIZE), rng.choice(TILES))
+
+        for building_type in (queried if step % 10 else BUILDING_TYPES):
+            assert game_state.get_building_candidates(building_type) == rescan(game_state, building_type)
@@ -0,0 +1,193 @@
+''' checks batched combat resolution against a brute-force resolution of every target one at a time '''
+
+import random
+from typing import Dict, Tuple
+
+import pytest
+
+from src.game_constants import Team, UnitType, BuildingType
+from src.game_state import GameState
+from src.map import Map
+from src.robot_controller import RobotController
+
+
+SIZE = 16
+MELEE_TYPES = [UnitType.KNIGHT, UnitType.WARRIOR, UnitType.SWORDSMAN, UnitType.DEFENDER]
+
+
+def make_game() -> GameState:
+    '''Game on an open map with the main castles in opposite corners'''
+    return GameState(Map(SIZE, SIZE, blue_castle_loc= (0, 0), red_castle_loc= (SIZE - 1, SIZE - 1)))
+
+
+def place_unit(game_state: GameState, team: Team, unit_type: UnitType, x: int, y: int, health: int = None) -> int:
+    assert game_state.place_unit(team, unit_type, x, y)
+    unit_id = game_state.get_unit_id_at(x, y)
+    if health is not None:
+        game_state.set_unit_health(game_state.units[team][unit_id], health)
+    return unit_id
+
+
+def place_building(game_state: GameState, team: Team, building_type: BuildingType, x: int, y: int) -> int:
+    assert game_state.place_building(team, building_type, x, y)
+    return game_state.get_building_id_at(x, y)
+
+
+def get_healths(game_state: GameState) -> Dict[Tuple[str, int], int]:
+    '''Health of every object in the game, by (kind, id)'''
+    healths = {}
+    for team in Team:
+        healths.update({("unit", unit.id): unit.health for unit in game_state.units[team].values()})
+        healths.update({("building", building.id): building.health for building in game_state.buildings[team].values()})
+    return healths
+
+
+def brute_force_attack(game_state: GameState, attacker, x: int, y: int, hit_buildings: bool, retaliates: bool) -> Dict[Tuple[str, int], int]:
+    '''
+    Healths of the surviving objects after an attack on (x, y), resolved one target at a time without changing the game:
+    every enemy within the attacker's damage range takes its damage, and the attacker takes the defense of each survivor
+    '''
+
+    healths = get_healths(game_state)
+    enemy_team = game_state.get_opposite_team(attacker.team)
+
+    targets = [("unit", unit) for unit in game_state.units[enemy_team].values()]
+    if hit_buildings:
+        targets += [("building", building) for building in game_state.buildings[enemy_team].values()]
+
+    retaliation = 0
+    for kind, target in targets:
+        if max(abs(target.x - x), abs(target.y - y)) > attacker.damage_range:
+            continue
+
+        health = healths[(kind, target.id)] - attacker.damage
+        if health <= 0:
+            del healths[(kind, target.id)]
+        else:
+            healths[(kind, target.id)] = health
+            retaliation += target.defense
+
+    if retaliates and retaliation > 0:
+        health = healths[("unit", attacker.id)] - retaliation
+        if health <= 0:
+            del healths[("unit", attacker.id)]
+        else:
+            healths[("unit", attacker.id)] = health
+
+    return healths
+
+
+def test_damage_unit_reports_kill():
+    game_state = make_game()
+    unit_id = place_unit(game_state, Team.RED, UnitType.KNIGHT, 5, 5, health= 3)
+
+    assert not game_state.damage_unit(unit_id, 2)
+    assert game_state.damage_unit(unit_id, 1)
+    assert unit_id not in game_state.units[Team.RED]
+    assert game_state.get_unit_id_at(5, 5) is None
+
+
+def test_area_attack_kills_and_survivors_retaliate():
+    game_state = make_game()
+    attacker_id = place_unit(game_state, Team.BLUE, UnitType.SWORDSMAN, 4, 4)
+
+    #the swordsman deals 3 damage: the knight dies, the warrior and defender survive and retaliate with 2 each
+    killed_id = place_unit(game_state, Team.RED, UnitType.KNIGHT, 5, 5, health= 3)
+    warrior_id = place_unit(game_state, Team.RED, UnitType.WARRIOR, 6, 5)
+    defender_id = place_unit(game_state, Team.RED, UnitType.DEFENDER, 5, 6)
+    outside_id = place_unit(game_state, Team.RED, UnitType.WARRIOR, 8, 8)
+    game_state.start_turn()
+
+    attacker = game_state.units[Team.BLUE][attacker_id]
+    attacker.damage_range = 1
+    rc = RobotController(Team.BLUE, game_state)
+
+    assert rc.unit_attack_location(attacker_id, 5, 5)
+
+    assert killed_id not in game_state.units[Team.RED]
+    assert game_state.units[Team.RED][warrior_id].health == UnitType.WARRIOR.health - 3
+    assert game_state.units[Team.RED][defender_id].health == UnitType.DEFENDER.health - 3
+    assert game_state.units[Team.RED][outside_id].health == UnitType.WARRIOR.health
+    assert attacker.health == UnitType.SWORDSMAN.health - UnitType.WARRIOR.defense - UnitType.DEFENDER.defense
+
+    #a unit can only attack once a turn
+    assert not rc.unit_attack_location(attacker_id, 5, 5)
+
+
+def test_attacker_killed_by_retaliation():
+    game_state = make_game()
+    attacker_id = place_unit(game_state, Team.BLUE, UnitType.KNIGHT, 4, 4, health= 2)
+    place_unit(game_state, Team.RED, UnitType.SWORDSMAN, 5, 4)
+    game_state.start_turn()
+
+    rc = RobotController(Team.BLUE, game_state)
+    assert rc.unit_attack_location(attacker_id, 5, 4)
+    assert attacker_id not in game_state.units[Team.BLUE]
+
+
+def test_building_attack_hits_only_units_without_retaliation():
+    game_state = make_game()
+    tower_id = place_building(game_state, Team.BLUE, BuildingType.FARM_1, 4, 4)
+    unit_id = place_unit(game_state, Team.RED, UnitType.SWORDSMAN, 6, 6)
+    killed_id = place_unit(game_state, Team.RED, UnitType.KNIGHT, 7, 7, health= 2)
+    farm_id = place_building(game_state, Team.RED, BuildingType.FARM_1, 6, 7)
+    game_state.start_turn()
+
+    #no building type attacks, so the farm is given a tower's stats
+    tower = game_state.buildings[Team.BLUE][tower_id]
+    tower.attack_range, tower.damage_range, tower.damage, tower.defense = 4, 1, 2, 0
+
+    rc = RobotController(Team.BLUE, game_state)
+    assert rc.building_attack_location(tower_id, 6, 6)
+
+    assert game_state.units[Team.RED][unit_id].health == UnitType.SWORDSMAN.health - 2
+    assert killed_id not in game_state.units[Team.RED]
+    assert game_state.buildings[Team.RED][farm_id].health == BuildingType.FARM_1.health
+    assert tower.health == BuildingType.FARM_1.health
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("damage_range", [0, 1, 2])
+def test_melee_cluster_matches_brute_force(seed: int, damage_range: int):
+    '''Every unit of a dense mixed cluster attacks in turn; after each attack the game matches the brute-force resolution'''
+
+    rng = random.Random(seed)
+    game_state = make_game()
+
+    #a checkerboard of both teams' units with low health, so attacks kill, plus some red buildings
+    for x in range(3, 11):
+        for y in range(3, 11):
+            if rng.random() < 0.15:
+                place_building(game_state, Team.RED, BuildingType.FARM_1, x, y)
+            elif rng.random() < 0.8:
+                team = Team.BLUE if (x + y) % 2 == 0 else Team.RED
+                place_unit(game_state, team, rng.choice(MELEE_TYPES), x, y, health= rng.randint(1, 6))
+    game_state.start_turn()
+
+    rc = {team: RobotController(team, game_state) for team in Team}
+    attacks = 0
+    for unit_id in list(game_state.units[Team.BLUE]) + list(game_state.units[Team.RED]):
+        team = game_state.get_team_of_unit(unit_id)
+        if team is None:
+            continue
+
+        attacker = game_state.units[team][unit_id]
+        attacker.damage_range = damage_range
+        enemy_team = game_state.get_opposite_team(team)
+        targets = game_state.units_in_square(attacker.x, attacker.y, attacker.attack_range, enemy_team)
+        if not targets:
+            continue
+
+        x, y = targets[0].x, targets[0].y
+        expected = brute_force_attack(game_state, attacker, x, y, hit_buildings= True, retaliates= True)
+
+        assert rc[team].unit_attack_location(unit_id, x, y)
+        assert get_healths(game_state) == expected
+
+        #every removed object is gone from the location maps too
+        for team_units in game_state.units.values():
+            for unit in team_units.values():
+                assert game_state.get_unit_id_at(unit.x, unit.y) == unit.id
+        attacks += 1
+
+    assert attacks > 0
@@ -0,0 +1,81 @@
+''' checks that the controller profiler charges each call with the time its work takes '''
+
+import time
+from typing import Iterator, Tuple
+
+from src import robot_controller
+from src.controller_profiler import ProfilingController
+from src.game_constants import Team, BuildingType
+from src.game_state import GameState
+from src.map import Map
+from src.robot_controller import RobotController
+
+
+STEP_SECONDS = 0.002
+STEPS = 10
+
+
+class SlowController(RobotController):
+    '''Controller whose placeable locations take STEP_SECONDS to produce each'''
+
+    def get_building_placeable_locations(self, building_type: BuildingType) -> Iterator[Tuple[int, int]]:
+        for i in range(STEPS):
+            time.sleep(STEP_SECONDS)
+            yield i, 0
+
+
+def make_profiler(controller_class= RobotController) -> ProfilingController:
+    game_state = GameState(Map(8, 8, blue_castle_loc= (0, 0), red_castle_loc= (7, 7)))
+    return ProfilingController(controller_class(Team.BLUE, game_state))
+
+
+def test_generator_iteration_is_timed():
+    profiler = make_profiler(SlowController)
+
+    profiler.start_turn()
+    locations = []
+    for location in profiler.get_building_placeable_locations(BuildingType.FARM_1):
+        locations.append(location)
+        #time the bot spends between steps is its own
+        time.sleep(STEP_SECONDS)
+    profiler.end_turn()
+
+    assert len(locations) == STEPS
+    method = profiler.get_summary()["methods"]["get_building_placeable_locations"]
+    assert method["calls"] == 1
+    assert STEPS * STEP_SECONDS <= method["seconds"] < 2 * STEPS * STEP_SECONDS
+
+
+def test_calls_are_recorded_per_turn():
+    profiler = make_profiler()
+
+    for turn in range(3):
+        profiler.start_turn()
+        for _ in range(turn + 1):
+            profiler.get_units(Team.BLUE)
+        profiler.end_turn()
+
+    summary = profiler.get_summary()
+    assert [turn["methods"]["get_units"][0] for turn in summary["turns"]] == [1, 2, 3]
+    assert summary["methods"]["get_units"]["calls"] == 6
+    assert summary["methods"]["get_units"]["max_calls_per_turn"] == 3
+
+    #the controller's copy module is only replaced during profiled turns
+    assert robot_controller.copy.__name__ == 'copy'
+
+
+def test_calls_after_timeout_are_not_recorded():
+    profiler = make_profiler()
+
+    profiler.start_turn()
+    profiler.get_units(Team.BLUE)
+    profiler.end_turn(timed_out= True)
+
+    #a bot thread still running past its time limit keeps calling the controller
+    profiler.get_units(Team.BLUE)
+    list(profiler.get_building_placeable_locations(BuildingType.FARM_1))
+
+    summary = profiler.get_summary()
+    assert summary["turns"][-1]["timed_out"]
+    assert summary["calls"] == 1
+    assert profiler.turn_stats == {}
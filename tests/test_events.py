@@ -0,0 +1,67 @@
+''' checks the event log's per-team cursors against the full history of events, and the events the game emits '''
+
+import random
+
+import pytest
+
+from src.events import EventLog, EventType, GameEvent
+from src.game_constants import Team, UnitType, Direction
+from src.game_state import GameState
+from src.map import Map
+from src.robot_controller import RobotController
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cursors_match_full_history(seed: int):
+    '''Random runs of events and turn ends; each team always sees exactly the events since the end of its last turn'''
+
+    rng = random.Random(seed)
+    log = EventLog()
+    history = []
+    turn_ends = {Team.BLUE: 0, Team.RED: 0}
+
+    for turn in range(200):
+        for _ in range(rng.randrange(10)):
+            event = GameEvent(turn, EventType.BALANCE_CHANGED, rng.choice(list(Team)), None, None, value= len(history))
+            log.emit(event)
+            history.append(event)
+
+        #teams usually alternate, but a team can end several turns in a row (e.g. the other one timed out)
+        team = rng.choice(list(Team))
+        log.end_turn(team)
+        turn_ends[team] = len(history)
+
+        for team in Team:
+            assert log.get_events_since_turn_end(team) == history[turn_ends[team]:]
+        assert log.get_end() == len(history)
+
+        #events both teams have seen are dropped, but never one a team has yet to read
+        assert log.start <= min(turn_ends.values())
+        assert len(log.events) <= 2 * (len(history) - min(turn_ends.values())) + 1
+
+
+def test_game_events_since_last_turn():
+    game_state = GameState(Map(8, 8, blue_castle_loc= (0, 0), red_castle_loc= (7, 7)))
+    rc = {team: RobotController(team, game_state) for team in Team}
+    game_state.place_unit(Team.BLUE, UnitType.KNIGHT, 3, 3)
+    unit_id = game_state.get_unit_id_at(3, 3)
+    game_state.start_turn()
+
+    game_state.events.end_turn(Team.RED)
+    game_state.events.end_turn(Team.BLUE)
+    assert rc[Team.BLUE].get_events_since_last_turn() == []
+
+    #staying in place is not a move
+    assert rc[Team.BLUE].move_unit_in_direction(unit_id, Direction.STAY)
+    assert rc[Team.BLUE].get_events_since_last_turn() == []
+
+    #staying used up the knight's movement for the turn
+    game_state.start_turn()
+    assert rc[Team.BLUE].move_unit_in_direction(unit_id, Direction.RIGHT)
+    moves = [event for event in rc[Team.RED].get_events_since_last_turn() if event.type == EventType.MOVED]
+    assert [(event.object_id, event.x, event.y) for event in moves] == [(unit_id, *rc[Team.BLUE].new_location(3, 3, Direction.RIGHT))]
+
+    #red still sees the move until its turn ends, blue no longer does after its turn
+    game_state.events.end_turn(Team.BLUE)
+    assert rc[Team.BLUE].get_events_since_last_turn() == []
+    assert [event for event in rc[Team.RED].get_events_since_last_turn() if event.type == EventType.MOVED] == moves
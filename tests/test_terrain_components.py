@@ -0,0 +1,78 @@
+''' checks the terrain components kept by the map against a flood fill of each legality mask '''
+
+import random
+from collections import deque
+
+import pytest
+
+from src.game_constants import Tile
+from src.map_generator import generate_map
+from src.terrain_components import TerrainComponents
+
+
+SIZE = 16
+TILES = [Tile.GRASS, Tile.SAND, Tile.WATER, Tile.MOUNTAIN, Tile.BRIDGE]
+
+
+def flood_fill(components: TerrainComponents) -> list:
+    '''Component number of every tile of the mask (-1 if not walkable), found by a breadth-first search over all 8 neighbors'''
+
+    width, height, mask = components.width, components.height, components.mask
+    numbers = [-1] * (width * height)
+    count = 0
+    for i in range(width * height):
+        if not mask[i] or numbers[i] != -1:
+            continue
+
+        numbers[i] = count
+        queue = deque([divmod(i, height)])
+        while queue:
+            x, y = queue.popleft()
+            for neighbor_x in range(max(x - 1, 0), min(x + 2, width)):
+                for neighbor_y in range(max(y - 1, 0), min(y + 2, height)):
+                    j = neighbor_x * height + neighbor_y
+                    if mask[j] and numbers[j] == -1:
+                        numbers[j] = count
+                        queue.append((neighbor_x, neighbor_y))
+        count += 1
+
+    return numbers
+
+
+def assert_same_partition(components: TerrainComponents):
+    '''The components label exactly the walkable tiles, and two tiles share a component iff the flood fill connects them'''
+
+    numbers = flood_fill(components)
+    height = components.height
+    roots = [components.get_component(*divmod(i, height)) for i in range(components.width * height)]
+
+    assert [root == -1 for root in roots] == [number == -1 for number in numbers]
+
+    #a one-to-one mapping between component roots and flood fill numbers
+    root_to_number, number_to_root = {}, {}
+    for root, number in zip(roots, numbers):
+        if root != -1:
+            assert root_to_number.setdefault(root, number) == number
+            assert number_to_root.setdefault(number, root) == root
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_components_match_flood_fill(seed: int):
+    '''Random tile changes, mostly bridges over water; the components of every set of walkable tiles always match a flood fill'''
+
+    rng = random.Random(seed)
+    game_map = generate_map(SIZE, SIZE, water= 0.4, seed= seed)
+
+    for components in game_map.components.values():
+        assert_same_partition(components)
+
+    for _ in range(100):
+        #bridges join components (add_tile), other changes can also split them (relabel)
+        water = [(x, y) for x in range(SIZE) for y in range(SIZE) if game_map.tiles[x][y] == Tile.WATER]
+        if water and rng.random() < 0.5:
+            game_map.set_tile(*rng.choice(water), Tile.BRIDGE)
+        else:
+            game_map.set_tile(rng.randrange(SIZE), rng.randrange(SIZE), rng.choice(TILES))
+
+        for components in game_map.components.values():
+            assert_same_partition(components)
@@ -0,0 +1,70 @@
+''' checks the per-region unit rankings against a brute-force ranking of every unit '''
+
+import random
+
+import pytest
+
+from src.game_constants import Team, UnitType, Tile
+from src.game_state import GameState
+from src.map import Map
+from src.unit_ranking import RANKING_KEYS, UnitRanking
+
+
+SIZE = 32
+LAND_TYPES = [unit_type for unit_type in UnitType if Tile.GRASS in unit_type.walkable_tiles]
+
+
+def brute_force_best(game_state: GameState, team: Team, ranking_name: str, x: int, y: int, radius: int, k: int):
+    key = RANKING_KEYS[ranking_name]
+    in_square = [unit for unit in game_state.units[team].values() if max(abs(unit.x - x), abs(unit.y - y)) <= radius]
+    return sorted(in_square, key= lambda unit: (key(unit), unit.id))[:k]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_best_units_match_brute_force(seed: int):
+    '''Random unit placements, moves, health changes and deaths; the best units in large squares always match a full sort'''
+
+    rng = random.Random(seed)
+    game_state = GameState(Map(SIZE, SIZE, blue_castle_loc= (0, 0), red_castle_loc= (SIZE - 1, SIZE - 1)))
+
+    #squares mostly bigger than a region, which are answered from the heaps rather than ranked directly
+    def query():
+        team = rng.choice(list(Team))
+        ranking_name = rng.choice(list(RANKING_KEYS))
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        radius = rng.randint(UnitRanking.REGION_SIZE // 2, SIZE)
+        k = rng.randint(1, 20)
+
+        best = game_state.best_units_in_square(team, ranking_name, x, y, radius, k)
+        assert [unit.id for unit in best] == [unit.id for unit in brute_force_best(game_state, team, ranking_name, x, y, radius, k)]
+
+    #the rankings are created part-way through, and kept up to date after
+    for step in range(400):
+        team = rng.choice(list(Team))
+        units = list(game_state.units[team].values())
+        operation = rng.random()
+
+        if operation < 0.35 or not units:
+            x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+            if game_state.unit_placeable_map[x][y]:
+                assert game_state.place_unit(team, rng.choice(LAND_TYPES), x, y)
+
+        elif operation < 0.6:
+            unit = rng.choice(units)
+            x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+            if game_state.unit_placeable_map[x][y]:
+                assert game_state.move_unit(unit.id, x, y)
+
+        elif operation < 0.85:
+            #few distinct healths, so ties are broken by id
+            game_state.set_unit_health(rng.choice(units), rng.randint(1, 5))
+
+        else:
+            game_state.delete_unit(team, rng.choice(units).id)
+
+        if step >= 50:
+            query()
+
+    for team in Team:
+        for ranking_name in RANKING_KEYS:
+            assert ranking_name in game_state.unit_rankings[team]